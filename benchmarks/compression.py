@@ -0,0 +1,108 @@
+# ruff: noqa: T201
+"""
+Measure bytes on the wire and end-to-end latency of bulk sends with and without request compression.
+
+Bulk jobs are posted to a local server that reads the whole body. The server waits as long as
+the body would take to arrive over a link of the given bandwidth, so that the latency reflects
+both the compression time and the bytes saved.
+
+Run with `python -m benchmarks.compression`.
+
+Usage:
+  compression [--rows=<n>...] [--bandwidth=<mbps>] [--number=<n>]
+
+Options:
+  --rows=<n>          Rows per bulk job, can be repeated [default: 1000 10000 50000].
+  --bandwidth=<mbps>  Simulated upload bandwidth in megabits per second, 0 for none [default: 50].
+  --number=<n>        Requests sent per measurement [default: 5].
+"""
+
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from docopt import docopt
+
+from notifications_python_client.compression import RequestCompression, available_encodings
+from notifications_python_client.notifications import NotificationsAPIClient
+
+API_KEY = "bench-c745a8d8-b48a-4b0d-96e5-dbea0165ebd1-8b3aa916-ec82-434e-b0c5-d5d9b371d6a3"
+RESPONSE = json.dumps({"data": {"id": "bulk"}}).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.wire_bytes = len(body)
+        if self.server.bandwidth:
+            time.sleep(len(body) * 8 / (self.server.bandwidth * 1e6))
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def bulk_rows(count):
+    rows = [["email address", "prénom", "nom", "référence", "montant"]]
+    for i in range(count):
+        rows.append(
+            [f"citoyen{i}@example.com", f"Prénom{i % 500}", f"Nom{i % 2000}", f"DOSSIER-{i:08d}", f"{i % 997}.00"]
+        )
+    return rows
+
+
+def main(row_counts, bandwidth, number):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.bandwidth = bandwidth
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    configurations = [("none", None)] + [
+        (f"{encoding} level {level}", RequestCompression(encoding, level=level))
+        for encoding in available_encodings()
+        for level in sorted({1, RequestCompression(encoding).level})
+    ]
+
+    print(f"simulated bandwidth: {bandwidth or 'unlimited'} Mbit/s, median of {number} requests")
+    print(f"{'rows':>7} {'compression':<16} {'bytes on wire':>14} {'ratio':>7} {'compress':>10} {'latency':>10}")
+    try:
+        for count in row_counts:
+            rows = bulk_rows(count)
+            raw_size = None
+            for label, request_compression in configurations:
+                client = NotificationsAPIClient(API_KEY, base_url=url, request_compression=request_compression)
+                body = client._serialize_data({"template_id": "456", "name": "bench", "rows": rows})
+
+                start = time.perf_counter()
+                if request_compression is not None:
+                    request_compression.compress(body)
+                compress_time = time.perf_counter() - start
+
+                latencies = []
+                for _ in range(number):
+                    start = time.perf_counter()
+                    client.send_bulk_notifications("456", "bench", rows=rows)
+                    latencies.append(time.perf_counter() - start)
+
+                raw_size = raw_size or server.wire_bytes
+                print(
+                    f"{count:>7} {label:<16} {server.wire_bytes:>14,} {raw_size / server.wire_bytes:>6.1f}x "
+                    f"{compress_time * 1e3:>8.1f}ms {statistics.median(latencies) * 1e3:>8.1f}ms"
+                )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    arguments = docopt(__doc__)
+    main([int(rows) for rows in arguments["--rows"]], float(arguments["--bandwidth"]), int(arguments["--number"]))
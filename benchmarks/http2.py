@@ -0,0 +1,151 @@
+# ruff: noqa: T201
+"""
+Compare throughput and connection count of HTTP/1.1 and HTTP/2 under concurrent load.
+
+Tasks sharing one AsyncNotificationsAPIClient, or threads sharing one NotificationsAPIClient
+with --threads, call a local hypercorn server speaking both protocols in cleartext; HTTP/2 is
+spoken with prior knowledge. The server holds each response to simulate API latency, which is
+when multiplexing matters: HTTP/1.1 needs a connection per request in flight while HTTP/2
+streams share a few connections.
+
+Requires notification-python-client[async,http2] and hypercorn.
+
+Run with `python -m benchmarks.http2`.
+
+Usage:
+  http2 [--concurrency=<n>...] [--requests=<n>] [--latency=<ms>] [--threads]
+
+Options:
+  --concurrency=<n>  Requests in flight, can be repeated [default: 50 500].
+  --requests=<n>     Requests sent per measurement [default: 5000].
+  --latency=<ms>     Time the server takes to answer each request [default: 20].
+  --threads          Send from threads with the synchronous client.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from docopt import docopt
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+
+from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+from notifications_python_client.notifications import NotificationsAPIClient
+
+API_KEY = "bench-c745a8d8-b48a-4b0d-96e5-dbea0165ebd1-8b3aa916-ec82-434e-b0c5-d5d9b371d6a3"
+RESPONSE = json.dumps({"templates": []}).encode()
+
+
+class App:
+    def __init__(self, latency):
+        self.latency = latency
+        self.connections = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while (await receive())["type"] != "lifespan.shutdown":
+                await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+        self.connections.add(tuple(scope["client"]))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(RESPONSE)).encode())]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": RESPONSE})
+
+
+def start_server(app):
+    listener = socket.create_server(("127.0.0.1", 0), backlog=4096)
+    url = f"http://127.0.0.1:{listener.getsockname()[1]}"
+    config = Config()
+    config.bind = [f"fd://{listener.detach()}"]
+    config.loglevel = "ERROR"
+    # hypercorn closes connections after 1000 requests by default, which would count as new connections
+    config.keep_alive_max_requests = 10**9
+    config.h2_max_concurrent_streams = 1000
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def run():
+        app.shutdown = asyncio.Event()
+        started.set()
+        await serve(app, config, shutdown_trigger=app.shutdown.wait)
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True)
+    thread.start()
+    started.wait()
+
+    def stop():
+        loop.call_soon_threadsafe(app.shutdown.set)
+        thread.join(5)
+
+    return url, stop
+
+
+def measure_threads(url, concurrency, requests, **kwargs):
+    client = NotificationsAPIClient(API_KEY, base_url=url, pool_maxsize=concurrency, **kwargs)
+    try:
+        with ThreadPoolExecutor(concurrency) as executor:
+            # open the connections before timing
+            list(executor.map(lambda _: client.get_all_templates(), range(concurrency)))
+            start = time.perf_counter()
+            list(executor.map(lambda _: client.get_all_templates(), range(requests)))
+            return requests / (time.perf_counter() - start)
+    finally:
+        client.close()
+
+
+async def measure_tasks(url, concurrency, requests, **kwargs):
+    async with AsyncNotificationsAPIClient(
+        API_KEY, base_url=url, max_connections=concurrency, max_keepalive_connections=concurrency, **kwargs
+    ) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call():
+            async with semaphore:
+                await client.get_all_templates()
+
+        # open the connections before timing
+        await asyncio.gather(*[call() for _ in range(concurrency)])
+        start = time.perf_counter()
+        await asyncio.gather(*[call() for _ in range(requests)])
+        return requests / (time.perf_counter() - start)
+
+
+def main(concurrencies, requests, latency, threads):
+    app = App(latency)
+    url, stop = start_server(app)
+    configurations = {
+        "HTTP/1.1": {},
+        "HTTP/2": {"http2": True, "http1": False},
+    }
+
+    print(f"{'threads' if threads else 'asyncio tasks'}, server latency: {latency * 1e3:.0f}ms, {requests} requests")
+    print(f"{'concurrency':>11} {'protocol':<9} {'requests/s':>11} {'connections':>12}")
+    try:
+        for concurrency in concurrencies:
+            for label, kwargs in configurations.items():
+                app.connections.clear()
+                if threads:
+                    throughput = measure_threads(url, concurrency, requests, **kwargs)
+                else:
+                    throughput = asyncio.run(measure_tasks(url, concurrency, requests, **kwargs))
+                print(f"{concurrency:>11} {label:<9} {throughput:>11,.0f} {len(app.connections):>12}")
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    arguments = docopt(__doc__)
+    main(
+        [int(concurrency) for concurrency in arguments["--concurrency"]],
+        int(arguments["--requests"]),
+        float(arguments["--latency"]) / 1e3,
+        arguments["--threads"],
+    )
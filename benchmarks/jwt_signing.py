@@ -0,0 +1,54 @@
+# ruff: noqa: T201
+"""
+Compare the cost of signing PGN tokens with PyJWT and with JWTSigner.
+
+Run with `python -m benchmarks.jwt_signing`.
+
+Usage:
+  jwt_signing [--services=<n>] [--number=<n>]
+
+Options:
+  --services=<n>  Number of distinct services to sign for [default: 1000].
+  --number=<n>    Number of tokens signed per measurement [default: 100000].
+"""
+
+import timeit
+
+import jwt
+from docopt import docopt
+
+from notifications_python_client.authentication import JWTSigner, create_jwt_token, epoch_seconds
+
+
+def report(label, seconds, number):
+    print(f"{label:<45} {seconds / number * 1e6:8.2f} µs/token")
+
+
+def main(services, number):
+    secrets = [f"{i:036d}" for i in range(services)]
+    client_ids = [f"service-{i}" for i in range(services)]
+    signers = [JWTSigner(secrets[i], client_ids[i]) for i in range(services)]
+    headers = {"typ": "JWT", "alg": "HS256"}
+
+    def pyjwt():
+        for i in range(number):
+            j = i % services
+            jwt.encode(payload={"iss": client_ids[j], "iat": epoch_seconds()}, key=secrets[j], headers=headers)
+
+    def cold():
+        for i in range(number):
+            j = i % services
+            create_jwt_token(secrets[j], client_ids[j])
+
+    def warm():
+        for i in range(number):
+            signers[i % services].sign()
+
+    report("jwt.encode (previous create_jwt_token)", min(timeit.repeat(pyjwt, number=1, repeat=3)), number)
+    report("create_jwt_token (new signer per token)", min(timeit.repeat(cold, number=1, repeat=3)), number)
+    report(f"JWTSigner.sign ({services} prepared signers)", min(timeit.repeat(warm, number=1, repeat=3)), number)
+
+
+if __name__ == "__main__":
+    arguments = docopt(__doc__)
+    main(int(arguments["--services"]), int(arguments["--number"]))
@@ -0,0 +1,74 @@
+# ruff: noqa: T201
+"""
+Measure the client overhead per request, with and without prepared requests.
+
+The transport is replaced by an adapter answering every request from memory, so the time
+measured is spent building, preparing and sending the request and decoding the response.
+
+Run with `python -m benchmarks.request_overhead`.
+
+Usage:
+  request_overhead [--number=<n>]
+
+Options:
+  --number=<n>  Number of requests sent per measurement [default: 20000].
+"""
+
+import functools
+import timeit
+
+from docopt import docopt
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from notifications_python_client.notifications import NotificationsAPIClient
+
+API_KEY = "bench-c745a8d8-b48a-4b0d-96e5-dbea0165ebd1-8b3aa916-ec82-434e-b0c5-d5d9b371d6a3"
+BASE_URL = "https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn"
+NOTIFICATION_ID = "3d1ce039-5476-414c-99b2-fac1e6add62c"
+BODY = b'{"id":"3d1ce039-5476-414c-99b2-fac1e6add62c","status":"delivered"}'
+
+
+class StubAdapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        response = Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        response._content = BODY
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def client(prepared_requests):
+    client = NotificationsAPIClient(
+        API_KEY, client_id="bench-client", base_url=BASE_URL, prepared_requests=prepared_requests
+    )
+    client.request_session.mount("https://", StubAdapter())
+    return client
+
+
+def main(number):
+    calls = {
+        "GET notification by id": lambda client: client.get_notification_by_id(NOTIFICATION_ID),
+        "GET notifications with params": lambda client: client.get_all_notifications(status="delivered"),
+        "POST sms": lambda client: client.send_sms_notification("+15145550123", "456", reference="ref"),
+    }
+
+    print(f"{'request':<32} {'default':>12} {'prepared':>12} {'saved':>7}")
+    for label, call in calls.items():
+        timings = []
+        for prepared_requests in (False, True):
+            api_client = client(prepared_requests)
+            seconds = min(timeit.repeat(functools.partial(call, api_client), number=number, repeat=3))
+            timings.append(seconds / number * 1e6)
+        print(f"{label:<32} {timings[0]:>9.1f} µs {timings[1]:>9.1f} µs {1 - timings[1] / timings[0]:>6.0%}")
+
+
+if __name__ == "__main__":
+    arguments = docopt(__doc__)
+    main(int(arguments["--number"]))
@@ -0,0 +1,124 @@
+# ruff: noqa: T201
+"""
+Compare sending notifications one at a time with send_many at several concurrencies.
+
+A local HTTP/1.1 server holds each response to simulate API latency, so the time per
+notification of a sequential loop is the latency itself, while send_many overlaps as many
+requests as its concurrency over the client's connection pool. With --async, send_many of
+AsyncNotificationsAPIClient is measured as well, sending from a single event loop; it requires
+notification-python-client[async].
+
+Run with `python -m benchmarks.send_many`.
+
+Usage:
+  send_many [--concurrency=<n>...] [--number=<n>] [--latency=<ms>] [--async]
+
+Options:
+  --concurrency=<n>  Requests in flight with send_many, can be repeated [default: 8 32 128].
+  --number=<n>       Notifications sent per measurement [default: 2000].
+  --latency=<ms>     Time the server takes to answer each request [default: 20].
+  --async            Also measure the asyncio client.
+"""
+
+import asyncio
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from docopt import docopt
+
+from notifications_python_client.notifications import NotificationsAPIClient
+
+API_KEY = "bench-c745a8d8-b48a-4b0d-96e5-dbea0165ebd1-8b3aa916-ec82-434e-b0c5-d5d9b371d6a3"
+BODY = b'{"id":"3d1ce039-5476-414c-99b2-fac1e6add62c"}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.02
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.latency)
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def emails(number):
+    for i in range(number):
+        yield {"email_address": f"recipient-{i}@example.com", "template_id": "456", "reference": f"ref-{i}"}
+
+
+def sequential(url, number):
+    client = NotificationsAPIClient(API_KEY, base_url=url)
+    start = time.perf_counter()
+    for item in emails(number):
+        client.send_email_notification(**item)
+    seconds = time.perf_counter() - start
+    client.close()
+    return seconds, 0
+
+
+def send_many(url, number, concurrency):
+    client = NotificationsAPIClient(API_KEY, base_url=url, pool_maxsize=concurrency)
+    start = time.perf_counter()
+    failed = sum(not result.ok for result in client.send_many(emails(number), concurrency=concurrency))
+    seconds = time.perf_counter() - start
+    client.close()
+    return seconds, failed
+
+
+def send_many_async(url, number, concurrency):
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    async def run():
+        async with AsyncNotificationsAPIClient(
+            API_KEY, base_url=url, max_connections=concurrency, max_keepalive_connections=concurrency
+        ) as client:
+            start = time.perf_counter()
+            failed = 0
+            async for result in client.send_many(emails(number), concurrency=concurrency):
+                failed += not result.ok
+            return time.perf_counter() - start, failed
+
+    return asyncio.run(run())
+
+
+def main(concurrencies, number, latency, use_async):
+    Handler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{number} notifications, {latency * 1000:.0f} ms of latency per request")
+    print(f"{'mode':<24} {'seconds':>8} {'per second':>11} {'failed':>7}")
+    try:
+        runs = [("loop", lambda: sequential(url, number))]
+        runs += [(f"send_many({c})", lambda c=c: send_many(url, number, c)) for c in concurrencies]
+        if use_async:
+            runs += [(f"async send_many({c})", lambda c=c: send_many_async(url, number, c)) for c in concurrencies]
+        for label, run in runs:
+            seconds, failed = run()
+            print(f"{label:<24} {seconds:>8.2f} {number / seconds:>11,.0f} {failed:>7}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    arguments = docopt(__doc__)
+    main(
+        [int(c) for c in arguments["--concurrency"]],
+        int(arguments["--number"]),
+        int(arguments["--latency"]) / 1000,
+        arguments["--async"],
+    )
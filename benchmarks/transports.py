@@ -0,0 +1,104 @@
+# ruff: noqa: T201
+"""
+Measure the time per API call with each transport against a local HTTP/1.1 server.
+
+The server answers every request from memory over keep-alive connections, so the time
+measured is spent in the client and its HTTP library. InProcessTransport does not use the
+network and gives the client's own overhead.
+
+Run with `python -m benchmarks.transports`.
+
+Usage:
+  transports [--number=<n>] [--threads=<n>]
+
+Options:
+  --number=<n>   Calls per measurement [default: 5000].
+  --threads=<n>  Threads sharing the client [default: 1].
+"""
+
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from docopt import docopt
+
+from notifications_python_client.notifications import NotificationsAPIClient
+from notifications_python_client.transport import InProcessTransport, RequestsTransport, Urllib3Transport
+
+API_KEY = "bench-c745a8d8-b48a-4b0d-96e5-dbea0165ebd1-8b3aa916-ec82-434e-b0c5-d5d9b371d6a3"
+NOTIFICATION_ID = "3d1ce039-5476-414c-99b2-fac1e6add62c"
+BODY = b'{"id":"3d1ce039-5476-414c-99b2-fac1e6add62c","status":"delivered"}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def in_process(method, url, headers, body):
+    return 200, {"Content-Type": "application/json"}, BODY
+
+
+def transports(pool_maxsize):
+    yield "requests.Session (default)", None
+    yield "RequestsTransport", RequestsTransport()
+    yield "Urllib3Transport", Urllib3Transport(pool_maxsize=pool_maxsize)
+    try:
+        from notifications_python_client.httpx_transport import HTTP2Transport, HTTPXTransport
+    except ImportError:
+        pass
+    else:
+        yield "HTTPXTransport", HTTPXTransport(pool_maxsize=pool_maxsize)
+        try:
+            yield "HTTP2Transport (over HTTP/1.1)", HTTP2Transport(pool_maxsize=pool_maxsize)
+        except ImportError:
+            pass
+    yield "InProcessTransport", InProcessTransport(in_process)
+
+
+def measure(client, number, threads):
+    call = functools.partial(client.get_notification_by_id, NOTIFICATION_ID)
+    with ThreadPoolExecutor(threads) as executor:
+        # open the connections before timing
+        list(executor.map(lambda _: call(), range(threads)))
+        start = time.perf_counter()
+        list(executor.map(lambda _: call(), range(number)))
+        return time.perf_counter() - start
+
+
+def main(number, threads):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{number} calls from {threads} thread(s)")
+    print(f"{'transport':<32} {'per call':>10} {'calls/s':>9}")
+    try:
+        for label, transport in transports(threads):
+            client = NotificationsAPIClient(API_KEY, base_url=url, pool_maxsize=threads, transport=transport)
+            try:
+                seconds = measure(client, number, threads)
+            finally:
+                client.close()
+            print(f"{label:<32} {seconds / number * 1e6:>7.1f} µs {number / seconds:>9,.0f}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    arguments = docopt(__doc__)
+    main(int(arguments["--number"]), int(arguments["--threads"]))
@@ -1,6 +1,6 @@
 import json
 import uuid
-from unittest.mock import patch, MagicMock, ANY
+from unittest.mock import patch, MagicMock, ANY, PropertyMock
 
 import pytest
 from jsonschema import Draft4Validator
@@ -47,6 +47,9 @@ def check_get_call_with_params(mock_session_instance, verb, url):
 @pytest.fixture
 def mock_response():
     mock_response = MagicMock(name="response")
+    # the client decodes the raw body itself, so serve the configured json() value as the body
+    type(mock_response).content = PropertyMock(
+        side_effect=lambda: json.dumps(mock_response.json.return_value).encode())
     return mock_response
 
 
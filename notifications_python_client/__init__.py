@@ -13,4 +13,24 @@ from notifications_python_client.errors import (  # noqa
     REQUEST_ERROR_MESSAGE,
     REQUEST_ERROR_STATUS_CODE,
 )
-from notifications_python_client.notifications import NotificationsAPIClient  # noqa
+
+# Imported on first access so that importing the package (or only its errors and authentication
+# helpers) does not pull in requests and jwt.
+_LAZY_ATTRIBUTES = {
+    "NotificationsAPIClient": "notifications_python_client.notifications",
+    "AsyncNotificationsAPIClient": "notifications_python_client.async_notifications",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import time
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    httpx = None
+
+from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.endpoints import endpoint_family
+from notifications_python_client.errors import HTTPError
+from notifications_python_client.httpx_transport import httpx_timeout
+from notifications_python_client.idempotency import IDEMPOTENCY_HEADER, request_fingerprint
+from notifications_python_client.streaming import AsyncStreamedPage
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBaseAPIClient(BaseAPIClient):
+    """
+    asyncio version of BaseAPIClient, sending requests through a pooled httpx.AsyncClient.
+
+    Request building, authentication and error mapping are inherited from BaseAPIClient;
+    only sending the request is asynchronous. Requires the optional httpx dependency
+    (pip install notification-python-client[async]).
+
+     Args:
+        api_key (str): The combined API key used to authenticate requests to the Notification API.
+        client_id (str or None): Optional. Required only if the proxy is MCN (PGGAPI).
+    """
+
+    def __init__(
+        self,
+        api_key,
+        client_id=None,
+        base_url="https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn",
+        timeout=30,
+        token_refresh_margin=10,
+        max_connections=100,
+        max_keepalive_connections=20,
+        retry_policy=None,
+        rate_limiter=None,
+        circuit_breaker=None,
+        json_codec=None,
+        request_compression=None,
+        prepared_requests=False,
+        metrics=None,
+        tracer=None,
+        http2=False,
+        http1=True,
+        hedging=None,
+        idempotency=None,
+    ):
+        """
+        Other arguments are the same as for BaseAPIClient.
+        :param max_connections - maximum number of concurrent connections to the API
+        :param max_keepalive_connections - idle connections kept open for reuse
+        :param http2 - negotiate HTTP/2 so that concurrent requests share multiplexed connections;
+            requires notification-python-client[http2]
+        :param http1 - with http2, False to speak HTTP/2 without negotiation (prior knowledge)
+        :param hedging - HedgingPolicy; the request that loses a hedge race is cancelled
+        """
+        if httpx is None:
+            raise ImportError("AsyncBaseAPIClient requires httpx: pip install notification-python-client[async]")
+
+        super().__init__(
+            api_key,
+            client_id=client_id,
+            base_url=base_url,
+            timeout=timeout,
+            token_refresh_margin=token_refresh_margin,
+            retry_policy=retry_policy,
+            rate_limiter=rate_limiter,
+            circuit_breaker=circuit_breaker,
+            json_codec=json_codec,
+            request_compression=request_compression,
+            prepared_requests=prepared_requests,
+            metrics=metrics,
+            tracer=tracer,
+            idempotency=idempotency,
+        )
+        # hedged requests run as tasks on the caller's event loop rather than in the base class executor
+        self.hedging = hedging
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+            follow_redirects=True,
+            http1=http1,
+            http2=http2,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        await self.http_client.aclose()
+
+    def close(self):
+        raise TypeError("AsyncBaseAPIClient is closed with `await client.aclose()`, or by leaving `async with`")
+
+    def pool_stats(self):
+        raise NotImplementedError(
+            "AsyncBaseAPIClient does not report pool statistics, its connections are pooled by http_client"
+        )
+
+    def _init_requests_session(self, pool_maxsize, pool_block, max_retries, tcp_keepalive, session_per_thread):
+        # requests are sent by http_client: no requests.Session, nor its connection pool, is needed
+        self.http_adapter = self._thread_sessions = self._request_session = None
+
+    def _prepare_endpoint(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}", None, None
+
+    async def request(self, method, url, data=None, params=None, idempotency_key=None):
+        if idempotency_key is not None and self.idempotency is not None:
+            return await self.idempotency.call_async(
+                (self.service_id, idempotency_key),
+                self._request,
+                method,
+                url,
+                data,
+                params,
+                idempotency_key,
+                fingerprint=request_fingerprint(method, url, data),
+            )
+        return await self._request(method, url, data, params, idempotency_key)
+
+    async def _request(self, method, url, data, params, idempotency_key):
+        logger.debug("API request %s %s", method, url)
+        with self._trace("notifications.request", {"http.request.method": method, "url.path": url}):
+            url, kwargs = self._create_request_objects(url, data, params)
+            if idempotency_key is not None:
+                kwargs["headers"][IDEMPOTENCY_HEADER] = idempotency_key
+
+            response = await self._perform_request(method, url, kwargs)
+
+            with self._trace("notifications.parse"):
+                return self._process_json_response(response)
+
+    async def get_stream(self, url, items_key, params=None):
+        logger.debug("API request %s %s", "GET", url)
+        with self._trace("notifications.request", {"http.request.method": "GET", "url.path": url}):
+            url, kwargs = self._create_request_objects(url, None, params)
+            kwargs["stream"] = True
+
+            response = await self._perform_request("GET", url, kwargs)
+
+        return AsyncStreamedPage(response, items_key)
+
+    async def _perform_request(self, method, url, kwargs):
+        started_at = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                return await self._send_attempt(method, url, kwargs, attempt)
+            except HTTPError as e:
+                delay = self._retry_delay(method, e, attempt, started_at, kwargs)
+                if delay is None:
+                    self._check_deadline(e)
+                    raise
+
+            logger.info("Retrying API %s request on %s in %.2fs (attempt %s)", method, url, delay, attempt + 1)
+            await asyncio.sleep(delay)
+            attempt += 1
+            self._refresh_authorization(kwargs)
+
+    async def _send_attempt(self, method, url, kwargs, attempt):
+        endpoint = self._hedged_endpoint(method, url, kwargs)
+        if endpoint is None:
+            return await self._send_request(method, url, kwargs, attempt)
+
+        delay = self.hedging.hedge_delay(endpoint)
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(self._send_request(method, url, kwargs, attempt))
+        primary.add_done_callback(self._observe_latency(endpoint, started_at))
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self.hedging.acquire():
+                return await primary
+
+            logger.info("Hedging API %s request on %s after %.3fs", method, url, delay)
+            hedge = asyncio.ensure_future(
+                self._send_request(method, url, self._copy_request_kwargs(kwargs), attempt, hedge=True)
+            )
+            return await self._first_response(primary, hedge)
+        finally:
+            # cancel the request that lost, or both if the caller was cancelled
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def _first_response(self, primary, hedge):
+        errors = {}
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    errors[task] = task.exception()
+                    continue
+                if task is hedge:
+                    self.hedging.record_win()
+                return task.result()
+        raise errors[primary]
+
+    async def _send_request(self, method, url, kwargs, attempt=1, hedge=False):
+        family = endpoint_family(method, url)
+        # an open circuit fails fast, without waiting for or spending a rate limit token
+        self._before_send(family)
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(family)
+            timeout = self._send_timeout(kwargs["timeout"])
+        except BaseException:
+            self._cancel_send(family)
+            raise
+
+        attributes = {"notifications.family": family, "notifications.attempt": attempt}
+        if hedge:
+            attributes["notifications.hedge"] = True
+        with self._trace("notifications.send", attributes) as span:
+            if span is not None:
+                self.tracer.inject(kwargs["headers"])
+
+            start_time = time.monotonic()
+            response = api_error = None
+            timed_out = cancelled = False
+            try:
+                request = self.http_client.build_request(
+                    method,
+                    url,
+                    headers=kwargs["headers"],
+                    content=kwargs.get("data"),
+                    params=kwargs.get("params"),
+                    timeout=httpx_timeout(timeout),
+                )
+                response = await self.http_client.send(request, stream=kwargs.get("stream", False))
+                if response.is_error and not response.is_stream_consumed:
+                    # the error message is read from the body
+                    await response.aread()
+                response.raise_for_status()
+                return response
+            except httpx.HTTPError as e:
+                timed_out = isinstance(e, httpx.TimeoutException)
+                api_error = HTTPError.create(e)
+                logger.warning(
+                    "API %s request on %s failed with %s '%s'", method, url, api_error.status_code, api_error.message
+                )
+                raise api_error from e
+            except asyncio.CancelledError:
+                # the request lost a hedge race, or its caller gave up: it says nothing about the API
+                cancelled = True
+                raise
+            finally:
+                elapsed_time = time.monotonic() - start_time
+                logger.debug("API %s request on %s finished in %s", method, url, elapsed_time)
+                if cancelled:
+                    # a half-open circuit must get its probe slot back
+                    self._cancel_send(family)
+                else:
+                    self._after_send(family, response, api_error, elapsed_time)
+                    # httpx does not expose the time spent waiting for a pooled connection
+                    self._observe_send(
+                        span, None, method, family, attempt, kwargs, response, elapsed_time, timed_out, None, hedge
+                    )
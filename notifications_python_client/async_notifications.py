@@ -0,0 +1,168 @@
+import asyncio
+import functools
+import itertools
+import logging
+
+from notifications_python_client.async_base import AsyncBaseAPIClient
+from notifications_python_client.batch import SendResult, bounded_map_async
+from notifications_python_client.bulk import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_ROWS,
+    BulkChunkResult,
+    BulkResult,
+    bulk_chunks,
+)
+from notifications_python_client.errors import APIError
+from notifications_python_client.notifications import NotificationsAPIClient, older_than_from_next_link
+from notifications_python_client.timeouts import Deadline, within
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNotificationsAPIClient(AsyncBaseAPIClient, NotificationsAPIClient):
+    """
+    Client asyncio pour l'API PGN.
+
+    Expose les mêmes méthodes que NotificationsAPIClient, qui doivent être attendues (await).
+    Les données envoyées sont construites par NotificationsAPIClient afin que les deux clients
+    restent identiques.
+    """
+
+    def send_many(self, items, concurrency=10, ordered=True, window=None, stop=None):
+        """
+        Envoie des notifications SMS et courriel en parallèle depuis la boucle d'événements.
+        :param items: Itérable, ou itérable asynchrone, de dictionnaires contenant les arguments de
+            send_sms_notification (avec phone_number) ou de send_email_notification (avec
+            email_address). Il n'est lu que lorsque la fenêtre d'envoi a de la place, ce qui
+            ralentit un producteur plus rapide que l'API.
+        :param concurrency: (optionnel) Nombre maximal de requêtes en cours, limité par un sémaphore.
+        :param ordered: (optionnel) Produire les résultats dans l'ordre des items plutôt qu'au fur
+            et à mesure des réponses.
+        :param window: (optionnel) Nombre maximal d'items lus en avance sur les résultats produits,
+            le double de concurrency par défaut.
+        :param stop: (optionnel) asyncio.Event qui, une fois déclenché, arrête la lecture des items ;
+            l'itération se termine lorsque les requêtes en cours sont terminées. Fermer l'itérateur
+            ou annuler la tâche qui le parcourt annule plutôt les requêtes en cours.
+        :yield: Un SendResult par item, avec la réponse ou l'erreur de l'envoi (APIError, ou
+            ValueError pour un item invalide) ; une erreur n'interrompt pas les autres envois.
+        """
+        return bounded_map_async(self._send_item, items, concurrency, ordered, window, stop)
+
+    async def _send_item(self, index, item):
+        try:
+            # the payload is built, and checked, by the send methods of NotificationsAPIClient
+            response = await self._send_notification(item)
+        except (APIError, ValueError) as e:
+            return SendResult(index, item, None, e)
+        return SendResult(index, item, response, None)
+
+    async def send_bulk_notifications_chunked(
+        self,
+        template_id,
+        name,
+        rows=None,
+        csv_file=None,
+        reference=None,
+        scheduled_for=None,
+        reply_to_id=None,
+        max_rows=DEFAULT_MAX_ROWS,
+        max_bytes=DEFAULT_MAX_BYTES,
+        concurrency=4,
+    ):
+        """
+        Envoie de notifications en masse de taille quelconque, découpées en plusieurs envois en masse.
+        Les arguments et le résultat sont ceux de NotificationsAPIClient.send_bulk_notifications_chunked ;
+        les lots sont envoyés depuis la boucle d'événements, et les données sont lues et découpées dans
+        un fil d'exécution pour ne pas la bloquer.
+        """
+        if rows is None and csv_file is None:
+            raise ValueError("Vous devez fournir soit 'rows', soit 'csv_file'.")
+        if rows is not None and csv_file is not None:
+            raise ValueError("Vous ne pouvez pas fournir à la fois 'rows' et 'csv_file'.")
+
+        chunks = bulk_chunks(name, reference, rows, csv_file, max_rows, max_bytes)
+        send = functools.partial(self._send_bulk_chunk, template_id, scheduled_for, reply_to_id)
+        results = bounded_map_async(send, _read_in_thread(chunks), concurrency, True, concurrency)
+        return BulkResult([result async for result in results])
+
+    async def _send_bulk_chunk(self, template_id, scheduled_for, reply_to_id, index, chunk):
+        if chunk.error is not None:
+            return BulkChunkResult(chunk.index, chunk.name, chunk.reference, chunk.count, None, chunk.error)
+        try:
+            response = await self._create_bulk_job(template_id, scheduled_for, reply_to_id, chunk)
+        except APIError as e:
+            return BulkChunkResult(chunk.index, chunk.name, chunk.reference, chunk.count, None, e)
+        return BulkChunkResult(chunk.index, chunk.name, chunk.reference, chunk.count, response, None)
+
+    async def get_all_notifications_iterator(
+        self, status=None, template_type=None, reference=None, older_than=None, stream=False, deadline=None
+    ):
+        """
+        Itère sur toutes les notifications en paginant automatiquement.
+        :param status: Filtrer par statut de notification.
+        :param template_type: Filtrer par type de gabarit ('email', 'sms').
+        :param reference: Filtrer par référence unique.
+        :param older_than: Récupérer les notifications plus anciennes qu'un ID donné.
+        :param stream: (optionnel) Produire chaque notification dès sa réception plutôt qu'après
+            le téléchargement de la page entière.
+        :param deadline: (optionnel) Secondes allouées à l'ensemble de l'itération, à partir de la
+            première page. Chaque page n'obtient que le temps restant ; DeadlineExceededError est levée
+            une fois ce délai écoulé.
+        :yield: Une notification à la fois.
+        """
+        operation = Deadline(deadline) if deadline is not None else None
+        if stream:
+            async for notification in self._stream_all_notifications(
+                status, template_type, reference, older_than, operation
+            ):
+                yield notification
+            return
+
+        page_number = 1
+        result = await self._get_notifications_page(
+            page_number, status, template_type, reference, older_than, deadline=operation
+        )
+        notifications = result.get("notifications")
+        while notifications:
+            for notification in notifications:
+                yield notification
+            notification_id = older_than_from_next_link(result["links"].get("next"))
+            page_number += 1
+            result = await self._get_notifications_page(
+                page_number, status, template_type, reference, notification_id, deadline=operation
+            )
+            notifications = result.get("notifications")
+
+    async def _get_notifications_page(
+        self, page_number, status, template_type, reference, older_than, stream=False, deadline=None
+    ):
+        with self._trace("notifications.page", {"notifications.page": page_number}) as span, within(deadline):
+            result = await self.get_all_notifications(status, template_type, reference, older_than, stream=stream)
+            if span is not None and not stream:
+                span.set_attribute("notifications.count", len(result.get("notifications") or ()))
+            return result
+
+    async def _stream_all_notifications(self, status, template_type, reference, older_than, deadline=None):
+        for page_number in itertools.count(1):
+            page = await self._get_notifications_page(
+                page_number, status, template_type, reference, older_than, True, deadline
+            )
+            async with page:
+                received = 0
+                async for notification in page:
+                    received += 1
+                    yield notification
+                if not received:
+                    return
+                older_than = older_than_from_next_link((await page.get("links")).get("next"))
+
+
+async def _read_in_thread(iterator):
+    """Yield the items of iterator, each read in the default executor, as reading may block on a file."""
+    loop = asyncio.get_running_loop()
+    end = object()
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, end)
+        if item is end:
+            return
+        yield item
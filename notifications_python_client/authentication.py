@@ -1,7 +1,13 @@
+import base64
+import binascii
 import calendar
+import hashlib
+import hmac
+import json
+import threading
 import time
-
-import jwt
+from collections import OrderedDict
+from collections.abc import Mapping
 
 from notifications_python_client.errors import (
     TokenAlgorithmError,
@@ -19,6 +25,64 @@ __bound__ = 30
 INVALID_FUTURE_TOKEN_ERROR_MESSAGE = "Token can not be in the future"
 
 
+def __getattr__(name):
+    # PyJWT is only needed to decode tokens, so it is imported on first use rather than with this module
+    if name == "jwt":
+        import jwt
+
+        return jwt
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _base64url_encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _base64url_decode(segment):
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+# PyJWT serialises the header with sorted keys and no whitespace
+_HEADER_SEGMENT = _base64url_encode(
+    json.dumps({"typ": __type__, "alg": __algorithm__}, separators=(",", ":"), sort_keys=True).encode("utf-8")
+)
+
+
+class JWTSigner:
+    """
+    Signs PGN tokens for one secret and client id without going through PyJWT.
+
+    The header and the claim names never change, so the header segment is encoded once and
+    the HMAC key state is prepared once and copied for each token. The result is byte-identical
+    to jwt.encode with the same header and claims.
+    """
+
+    __slots__ = ("_hmac", "_claims_prefix")
+
+    def __init__(self, secret, client_id):
+        assert secret, "Missing secret key"
+        assert client_id, "Missing client id"
+
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+
+        self._hmac = hmac.new(secret, _HEADER_SEGMENT + b".", hashlib.sha256)
+        self._claims_prefix = '{"iss":' + json.dumps(client_id) + ',"iat":'
+
+    def sign(self, issued_at=None):
+        """
+        :param issued_at: iat claim in epoch seconds, defaults to now
+        :return: JWT token
+        """
+        if issued_at is None:
+            issued_at = epoch_seconds()
+
+        claims_segment = _base64url_encode(f"{self._claims_prefix}{issued_at}}}".encode())
+        mac = self._hmac.copy()
+        mac.update(claims_segment)
+        return b".".join((_HEADER_SEGMENT, claims_segment, _base64url_encode(mac.digest()))).decode("ascii")
+
+
 def create_jwt_token(secret, client_id):
     """
     Create JWT token for PGN
@@ -37,17 +101,7 @@ def create_jwt_token(secret, client_id):
     :param client_id: Identifier for the client
     :return: JWT token for this request
     """
-    assert secret, "Missing secret key"
-    assert client_id, "Missing client id"
-
-    headers = {"typ": __type__, "alg": __algorithm__}
-
-    claims = {"iss": client_id, "iat": epoch_seconds()}
-    t = jwt.encode(payload=claims, key=secret, headers=headers)
-    if isinstance(t, str):
-        return t
-    else:
-        return t.decode()
+    return JWTSigner(secret, client_id).sign()
 
 
 def get_token_issuer(token):
@@ -60,6 +114,8 @@ def get_token_issuer(token):
     :raises TokenIssuerError: if iss field not present
     :raises TokenDecodeError: if token does not conform to JWT spec
     """
+    import jwt
+
     try:
         unverified = decode_token(token)
 
@@ -71,7 +127,59 @@ def get_token_issuer(token):
         raise TokenDecodeError from e
 
 
-def decode_jwt_token(token, secret):
+class VerifiedTokenCache:
+    """
+    Bounded LRU of tokens whose signature and claims have already been verified.
+
+    Entries are keyed by token and secret and kept until iat + __bound__, after which the
+    token could not pass validate_jwt_token anyway. The least recently used entry is evicted
+    once maxsize is reached. Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token, secret):
+        """
+        :return: the cached claims, or None if the token is not cached or has expired
+        """
+        key = (token, secret)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if epoch_seconds() > entry[1]:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, token, secret, claims):
+        now = epoch_seconds()
+        with self._lock:
+            self._entries[(token, secret)] = (claims, int(claims["iat"]) + __bound__)
+            self._entries.move_to_end((token, secret))
+
+            # tokens are mostly inserted in iat order, so expired entries gather at the LRU end
+            while self._entries:
+                oldest = next(iter(self._entries.values()))
+                if len(self._entries) <= self.maxsize and now <= oldest[1]:
+                    break
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def decode_jwt_token(token, secret, cache=None):
     """
     Validates and decodes the JWT token
     Token checked for
@@ -80,6 +188,8 @@ def decode_jwt_token(token, secret):
 
     :param token: jwt token
     :param secret: client specific secret
+    :param cache: optional VerifiedTokenCache; a cached token skips the signature check but its
+        iat is still checked against the current time
     :return boolean: True if valid token, False otherwise
     :raises TokenIssuerError: if iss field not present
     :raises TokenIssuedAtError: if iat field not present
@@ -88,12 +198,22 @@ def decode_jwt_token(token, secret):
     :raises TokenAlgorithmError: If the algorithm is not recognised
     :raises TokenError: If any other type of jwt exception is raised when trying jwt.decode
     """
+    if cache is not None:
+        cached_token = cache.get(token, secret)
+        if cached_token is not None:
+            return validate_jwt_token(cached_token)
+
+    import jwt
+
     try:
         # check signature of the token
         decoded_token = jwt.decode(
             token, key=secret, options={"verify_signature": True}, algorithms=[__algorithm__], leeway=__bound__
         )
-        return validate_jwt_token(decoded_token)
+        valid = validate_jwt_token(decoded_token)
+        if cache is not None:
+            cache.set(token, secret, decoded_token)
+        return valid
     except jwt.InvalidIssuedAtError as e:
         raise TokenExpiredError("Token has invalid iat field", decode_token(token)) from e
     except jwt.ImmatureSignatureError as e:
@@ -112,6 +232,93 @@ def decode_jwt_token(token, secret):
         raise TokenError from e
 
 
+class TokenVerifier:
+    """
+    Verifies tokens from many issuers, base64-decoding and parsing each token only once.
+
+    Performs the same checks as get_token_issuer followed by decode_jwt_token and raises the
+    same TokenError subclasses.
+
+    :param secrets: mapping of issuer to secret, or a callable returning the secret for an
+        issuer (or None if the issuer is unknown)
+    """
+
+    def __init__(self, secrets):
+        self._get_secret = secrets.get if isinstance(secrets, Mapping) else secrets
+
+    def verify(self, token):
+        """
+        :param token: signed JWT token
+        :return: the verified claims
+        :raises TokenIssuerError: if iss field not present
+        :raises TokenIssuedAtError: if iat field not present
+        :raises TokenExpiredError: If the iat value expires this token
+        :raises TokenDecodeError: If the token is malformed, its issuer is unknown or its signature is invalid
+        :raises TokenAlgorithmError: If the algorithm is not recognised
+        :raises TokenError: If any other claim makes the token invalid
+        """
+        header, claims, signing_input, signature = self._parse(token)
+
+        if header.get("alg") != __algorithm__:
+            raise TokenAlgorithmError
+        if "iss" not in claims:
+            raise TokenIssuerError
+
+        # an issuer that is not a string, such as a list, is neither known nor usable as a mapping key
+        secret = self._get_secret(claims["iss"]) if isinstance(claims["iss"], str) else None
+        if not secret:
+            raise TokenDecodeError("Invalid token: issuer not recognised")
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+
+        expected = hmac.new(secret, signing_input, hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, signature):
+            raise TokenDecodeError
+
+        self._validate_registered_claims(claims)
+        validate_jwt_token(claims)
+        return claims
+
+    @staticmethod
+    def _parse(token):
+        if isinstance(token, str):
+            token = token.encode("utf-8")
+
+        try:
+            signing_input, signature_segment = token.rsplit(b".", 1)
+            header_segment, claims_segment = signing_input.split(b".", 1)
+            header = json.loads(_base64url_decode(header_segment))
+            claims = json.loads(_base64url_decode(claims_segment))
+            signature = _base64url_decode(signature_segment)
+        except (TypeError, ValueError, binascii.Error) as e:
+            raise TokenDecodeError from e
+
+        if not isinstance(header, dict) or not isinstance(claims, dict):
+            raise TokenDecodeError
+
+        return header, claims, signing_input, signature
+
+    @staticmethod
+    def _validate_registered_claims(claims):
+        # the checks jwt.decode applies before validate_jwt_token is reached
+        now = epoch_seconds()
+        try:
+            if "iat" in claims:
+                int(claims["iat"])
+        except (TypeError, ValueError) as e:
+            raise TokenExpiredError("Token has invalid iat field", claims) from e
+        try:
+            nbf = int(claims["nbf"]) if "nbf" in claims else None
+            exp = int(claims["exp"]) if "exp" in claims else None
+        except (TypeError, ValueError) as e:
+            raise TokenDecodeError from e
+
+        if nbf is not None and nbf > now + __bound__:
+            raise TokenExpiredError(INVALID_FUTURE_TOKEN_ERROR_MESSAGE, claims)
+        if (exp is not None and exp <= now - __bound__) or claims.get("aud"):
+            raise TokenError
+
+
 def validate_jwt_token(decoded_token):
     # token has all the required fields
     if "iss" not in decoded_token:
@@ -136,6 +343,8 @@ def decode_token(token):
     :param token:
     :return decoded token:
     """
+    import jwt
+
     return jwt.decode(token, options={"verify_signature": False}, algorithms=[__algorithm__])
 
 
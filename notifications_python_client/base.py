@@ -1,15 +1,45 @@
-import json
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
 import logging
+import threading
 import time
+import urllib.parse
 
 import requests
 
 from notifications_python_client import __version__
-from notifications_python_client.authentication import create_jwt_token
-from notifications_python_client.errors import HTTPError, InvalidResponse
+from notifications_python_client.authentication import JWTSigner, __bound__, epoch_seconds
+from notifications_python_client.codec import default_codec
+from notifications_python_client.endpoints import endpoint_family
+from notifications_python_client.errors import APIError, DeadlineExceededError, HTTPError, InvalidResponse
+from notifications_python_client.hedging import CachedThreadPool
+from notifications_python_client.idempotency import IDEMPOTENCY_HEADER, request_fingerprint
+from notifications_python_client.metrics import RequestSample
+from notifications_python_client.pool import PooledHTTPAdapter
+from notifications_python_client.streaming import StreamedPage
+from notifications_python_client.timeouts import Timeout, current_deadline
+from notifications_python_client.transport import TransportError, TransportTimeout
 
 logger = logging.getLogger(__name__)
 
+# span returned by _trace when the client has no tracer
+_NO_SPAN = contextlib.nullcontext()
+
+
+def _requests_timeout(timeout):
+    # requests takes the connect and read timeouts, and applies the read one while sending
+    if isinstance(timeout, Timeout):
+        return timeout.connect, timeout.read
+    return timeout
+
+
+def _close_response(future):
+    # gives the connection of the request that lost a hedge race back to the pool
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
 
 class BaseAPIClient:
     """
@@ -20,13 +50,70 @@ class BaseAPIClient:
         client_id (str or None): Optional. Required only if the proxy is MCN (PGGAPI).
     """
 
-    def __init__(self, api_key, client_id=None, base_url="https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn", timeout=30):
+    def __init__(
+        self,
+        api_key,
+        client_id=None,
+        base_url="https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn",
+        timeout=30,
+        token_refresh_margin=10,
+        pool_maxsize=10,
+        pool_block=False,
+        max_retries=0,
+        tcp_keepalive=None,
+        session_per_thread=False,
+        retry_policy=None,
+        rate_limiter=None,
+        circuit_breaker=None,
+        json_codec=None,
+        request_compression=None,
+        prepared_requests=False,
+        metrics=None,
+        tracer=None,
+        http2=False,
+        http1=True,
+        transport=None,
+        hedging=None,
+        idempotency=None,
+    ):
         """
         Initialise the client
         Error if either of base_url or secret missing
         :param base_url - base URL of PGN API:
         :param secret - application secret - used to sign the request:
-        :param timeout - request timeout on the client
+        :param timeout - seconds allowed to each phase of a request, a (connect, read) tuple, or a Timeout with
+            separate connect, read and write timeouts. Within a Deadline, requests only get the time left.
+        :param token_refresh_margin - seconds before expiry at which a cached token is replaced;
+            a value of __bound__ or more disables token reuse
+        :param pool_maxsize - connections kept open to the API; set it to the number of threads sharing the client
+        :param pool_block - wait for a free connection rather than open one that is discarded afterwards
+        :param max_retries - connection-level retries done by urllib3
+        :param tcp_keepalive - seconds of inactivity before TCP keep-alive probes, None to disable
+        :param session_per_thread - give each thread its own requests.Session; all of them share one
+            connection pool
+        :param retry_policy - RetryPolicy deciding which failed requests are retried, None to never retry
+        :param rate_limiter - RateLimiter throttling requests per endpoint family, None to not throttle
+        :param circuit_breaker - CircuitBreaker failing fast while the API is unhealthy, None to always call it
+        :param json_codec - JSONCodec used for request and response bodies, defaults to the fastest installed
+        :param request_compression - RequestCompression applied to large request bodies, None to send them as is
+        :param prepared_requests - prepare the URL and static headers of each endpoint once and only fill in
+            the token and body for each request. Session cookies and proxy environment variables are then
+            read when an endpoint is first called.
+        :param metrics - MetricsSink, or list of them, receiving a RequestSample for every attempt
+        :param tracer - Tracer or OpenTelemetryTracer recording a span for each phase of every call and
+            propagating the trace context to the API, None to not trace
+        :param http2 - send requests over HTTP/2 with httpx, so that concurrent requests share up to pool_maxsize
+            multiplexed connections; requires notification-python-client[http2]
+        :param http1 - with http2, False to speak HTTP/2 without negotiation (prior knowledge), for example to a
+            cleartext local proxy
+        :param transport - Transport sending the requests instead of the client's requests.Session, such as
+            Urllib3Transport or InProcessTransport; the client closes it in close()
+        :param hedging - HedgingPolicy sending a second request when a GET to a hedged endpoint is slower than
+            its delay and returning the first response, None to never hedge
+        :param idempotency - IdempotencyStore remembering the outcome of calls sent with an idempotency key, so
+            that sending a notification again returns its first outcome; notifications then get a key derived
+            from their reference and content, or a new one. The retry_policy only retries them with
+            retry_idempotency_keys
         :return:
         """
         service_id = api_key[-73:-37]
@@ -41,13 +128,112 @@ class BaseAPIClient:
 
         if "mcn.api.gouv.qc.ca" in base_url and not client_id:
             raise ValueError("A valid client identifier (X-QC-Client-Id) is required when using the PGGAPI proxy.")
+        if token_refresh_margin < 0:
+            raise ValueError("token_refresh_margin must not be negative")
 
         self.client_id = client_id
-        self.base_url = base_url
+        self.base_url = base_url.rstrip("/")
         self.service_id = service_id
         self.api_key = api_key
         self.timeout = timeout
-        self.request_session = requests.Session()
+        self.token_refresh_margin = token_refresh_margin
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.json_codec = json_codec if json_codec is not None else default_codec()
+        self.request_compression = request_compression
+        self.prepared_requests = prepared_requests
+        if metrics is None:
+            self.metrics_sinks = ()
+        elif hasattr(metrics, "record"):
+            self.metrics_sinks = (metrics,)
+        else:
+            self.metrics_sinks = tuple(metrics)
+        self.tracer = tracer
+        self._init_requests_session(pool_maxsize, pool_block, max_retries, tcp_keepalive, session_per_thread)
+        # errors of either sending path are mapped by HTTPError.create
+        self._transport_errors = (requests.RequestException, TransportError)
+        self._timeout_errors = (requests.Timeout, TransportTimeout)
+        self.transport = self._create_transport(transport, http2, http1, pool_maxsize)
+        self.hedging = hedging
+        self.idempotency = idempotency
+        self._hedge_executor = None
+        if hedging is not None:
+            # both requests of a hedged call run in the executor while the caller waits for the first response;
+            # it is not bounded, so that callers are not queued behind each other for a worker
+            self._hedge_executor = CachedThreadPool("notifications-hedge")
+
+        # the header segment and HMAC key state are prepared once for every token of the client
+        self._signer = JWTSigner(self.api_key, self.service_id)
+        # (token, issued_at, refresh_at) of the last token minted by this client
+        self._token_state = None
+        self._token_lock = threading.Lock()
+
+        if prepared_requests:
+            self._static_headers = self.generate_headers(None, self.base_url)
+            del self._static_headers["Authorization"]
+            # paths include notification and template ids, so keep only the most recent ones
+            self._prepare_endpoint = functools.lru_cache(maxsize=256)(self._prepare_endpoint)
+
+    @property
+    def request_session(self):
+        """
+        The requests.Session used by the calling thread.
+
+        A client, and its shared session, can be used from several threads at once: requests are
+        built without touching client state and the connection pool is thread-safe. With
+        session_per_thread each thread gets its own session so that session-level state such as
+        cookies is never shared.
+        """
+        if self._thread_sessions is None:
+            return self._request_session
+        session = getattr(self._thread_sessions, "session", None)
+        if session is None:
+            session = self._thread_sessions.session = self._create_session()
+        return session
+
+    @request_session.setter
+    def request_session(self, session):
+        self._request_session = session
+
+    def _init_requests_session(self, pool_maxsize, pool_block, max_retries, tcp_keepalive, session_per_thread):
+        self.http_adapter = PooledHTTPAdapter(
+            pool_maxsize=pool_maxsize, pool_block=pool_block, max_retries=max_retries, tcp_keepalive=tcp_keepalive
+        )
+        self._thread_sessions = threading.local() if session_per_thread else None
+        self._request_session = self._create_session()
+
+    def _create_session(self):
+        session = requests.Session()
+        session.mount("https://", self.http_adapter)
+        session.mount("http://", self.http_adapter)
+        return session
+
+    @staticmethod
+    def _create_transport(transport, http2, http1, pool_maxsize):
+        if not http2:
+            return transport
+        if transport is not None:
+            raise ValueError("http2 and transport cannot be used together")
+
+        # imported here so that httpx and h2 are only loaded by clients using HTTP/2
+        from notifications_python_client.httpx_transport import HTTP2Transport
+
+        return HTTP2Transport(pool_maxsize, http1)
+
+    def close(self):
+        """Close the pooled connections."""
+        self.request_session.close()
+        if self.transport is not None:
+            self.transport.close()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown()
+
+    def pool_stats(self):
+        """
+        :return: PoolStats with the connections in use, idle, created and discarded so far
+        """
+        return self.http_adapter.stats()
 
     def put(self, url, data):
         return self.request("PUT", url, data=data)
@@ -56,9 +242,15 @@ class BaseAPIClient:
         """Send a GET request."""
         return self.request("GET", url, params=params)
 
-    def post(self, url, data):
-        """Send a POST request."""
-        return self.request("POST", url, data=data)
+    def post(self, url, data, idempotency_key=None):
+        """
+        Send a POST request.
+
+        :param idempotency_key: sent as the Idempotency-Key header, letting a RetryPolicy with
+            retry_idempotency_keys retry the request; with an IdempotencyStore, a call with a key already sent
+            returns the outcome of that call, or raises ValueError if that call sent other data
+        """
+        return self.request("POST", url, data=data, idempotency_key=idempotency_key)
 
     def delete(self, url, data=None):
         """Send a DELETE request."""
@@ -80,34 +272,160 @@ class BaseAPIClient:
 
         return headers
 
-    def request(self, method, url, data=None, params=None):
+    def request(self, method, url, data=None, params=None, idempotency_key=None):
+        if idempotency_key is not None and self.idempotency is not None:
+            return self.idempotency.call(
+                (self.service_id, idempotency_key),
+                self._request,
+                method,
+                url,
+                data,
+                params,
+                idempotency_key,
+                fingerprint=request_fingerprint(method, url, data),
+            )
+        return self._request(method, url, data, params, idempotency_key)
+
+    def _request(self, method, url, data, params, idempotency_key):
         logger.debug("API request %s %s", method, url)
-        url, kwargs = self._create_request_objects(url, data, params)
+        with self._trace("notifications.request", {"http.request.method": method, "url.path": url}):
+            url, kwargs = self._create_request_objects(url, data, params)
+            if idempotency_key is not None:
+                kwargs["headers"][IDEMPOTENCY_HEADER] = idempotency_key
+
+            response = self._perform_request(method, url, kwargs)
+
+            with self._trace("notifications.parse"):
+                return self._process_json_response(response)
+
+    def get_stream(self, url, items_key, params=None):
+        """
+        Send a GET request and parse the items_key list of the response while it is downloaded.
+
+        :return: StreamedPage yielding the elements of the list one at a time
+        """
+        logger.debug("API request %s %s", "GET", url)
+        with self._trace("notifications.request", {"http.request.method": "GET", "url.path": url}):
+            url, kwargs = self._create_request_objects(url, None, params)
+            kwargs["stream"] = True
 
-        response = self._perform_request(method, url, kwargs)
+            response = self._perform_request("GET", url, kwargs)
 
-        return self._process_json_response(response)
+        return StreamedPage(response, items_key)
+
+    def _trace(self, name, attributes=None):
+        """
+        :return: context manager recording a span named name, or doing nothing if the client has no tracer
+        """
+        if self.tracer is None:
+            return _NO_SPAN
+        return self.tracer.span(name, attributes)
 
     def _create_request_objects(self, url, data, params):
+        if self.prepared_requests:
+            return self._create_prepared_request_objects(url, data, params)
+
         # Construire l'URL complète sans supprimer le chemin de base
-        if not self.base_url.endswith("/"):
-            self.base_url += "/"
-        url = f"{self.base_url.rstrip('/')}/{url.lstrip('/')}"
+        url = f"{self.base_url}/{url.lstrip('/')}"
+
+        with self._trace("notifications.token"):
+            api_token = self._get_api_token()
+
+        headers = self.generate_headers(api_token, url)
+        kwargs = {"headers": headers, "timeout": self.timeout}
+
+        if data is not None:
+            kwargs.update(data=self._encode_body(headers, data))
+
+        if params is not None:
+            kwargs.update(params=params)
+
+        return url, kwargs
+
+    def _prepare_endpoint(self, path):
+        """
+        :return: (url, template, settings) where template is a requests.PreparedRequest holding the URL and
+            the headers that never change, and settings the arguments Session.request would pass to send
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        if self.transport is not None:
+            return url, None, None
+        session = self.request_session
+        template = session.prepare_request(requests.Request("GET", url, headers=self._static_headers))
+        settings = session.merge_environment_settings(url, {}, None, None, None)
+        return url, template, settings
+
+    def _create_prepared_request_objects(self, url, data, params):
+        url, template, settings = self._prepare_endpoint(url)
+        if template is None:
+            return self._create_static_request_objects(url, data, params)
+
+        prepared = template.copy()
+        with self._trace("notifications.token"):
+            prepared.headers["Authorization"] = f"Bearer {self._get_api_token()}"
 
-        api_token = create_jwt_token(self.api_key, self.service_id)
+        kwargs = {"headers": prepared.headers, "timeout": self.timeout, "prepared": prepared, "settings": settings}
 
-        kwargs = {"headers": self.generate_headers(api_token, url), "timeout": self.timeout}
+        if data is not None:
+            prepared.body = kwargs["data"] = self._encode_body(prepared.headers, data)
+            prepared.headers["Content-Length"] = str(len(prepared.body))
+
+        if params is not None:
+            prepared.prepare_url(url, params)
+            kwargs.update(params=params)
+
+        return url, kwargs
+
+    def _create_static_request_objects(self, url, data, params):
+        # prepared requests for clients that do not send through requests: only the URL and headers are reused
+        headers = dict(self._static_headers)
+        with self._trace("notifications.token"):
+            headers["Authorization"] = f"Bearer {self._get_api_token()}"
+
+        kwargs = {"headers": headers, "timeout": self.timeout}
 
         if data is not None:
-            kwargs.update(data=self._serialize_data(data))
+            kwargs.update(data=self._encode_body(headers, data))
 
         if params is not None:
             kwargs.update(params=params)
 
         return url, kwargs
 
+    def _encode_body(self, headers, data):
+        with self._trace("notifications.serialize"):
+            body = self._serialize_data(data)
+            compressed = self.request_compression.compress(body) if self.request_compression is not None else None
+        if compressed is None:
+            return body
+        headers["Content-Encoding"] = self.request_compression.encoding
+        return compressed
+
+    def _get_api_token(self):
+        """
+        Return a JWT for this client, reusing the previous one while it is still valid.
+
+        The API accepts a token for __bound__ seconds after its iat claim, so a token is kept
+        until token_refresh_margin seconds before that limit and only then re-signed.
+        """
+        now = epoch_seconds()
+        state = self._token_state
+        if state is not None and state[1] <= now < state[2]:
+            return state[0]
+
+        with self._token_lock:
+            # another thread may have refreshed the token while we were waiting for the lock
+            now = epoch_seconds()
+            state = self._token_state
+            if state is not None and state[1] <= now < state[2]:
+                return state[0]
+
+            token = self._signer.sign(now)
+            self._token_state = (token, now, now + __bound__ - self.token_refresh_margin)
+            return token
+
     def _serialize_data(self, data):
-        return json.dumps(data, default=self._extended_json_encoder)
+        return self.json_codec.dumps(data, default=self._extended_json_encoder)
 
     def _extended_json_encoder(self, obj):
         if isinstance(obj, set):
@@ -116,25 +434,273 @@ class BaseAPIClient:
         raise TypeError
 
     def _perform_request(self, method, url, kwargs):
-        start_time = time.monotonic()
+        started_at = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                return self._send_attempt(method, url, kwargs, attempt)
+            except HTTPError as e:
+                delay = self._retry_delay(method, e, attempt, started_at, kwargs)
+                if delay is None:
+                    self._check_deadline(e)
+                    raise
+
+            logger.info("Retrying API %s request on %s in %.2fs (attempt %s)", method, url, delay, attempt + 1)
+            time.sleep(delay)
+            attempt += 1
+            self._refresh_authorization(kwargs)
+
+    def _send_attempt(self, method, url, kwargs, attempt):
+        endpoint = self._hedged_endpoint(method, url, kwargs)
+        if endpoint is None:
+            return self._send_request(method, url, kwargs, attempt)
+
+        delay = self.hedging.hedge_delay(endpoint)
+        started_at = time.monotonic()
+        primary = self._submit(self._send_request, method, url, kwargs, attempt)
+        primary.add_done_callback(self._observe_latency(endpoint, started_at))
+        done, _ = concurrent.futures.wait([primary], timeout=delay)
+        if done or not self.hedging.acquire():
+            return primary.result()
+
+        logger.info("Hedging API %s request on %s after %.3fs", method, url, delay)
+        hedge = self._submit(self._send_request, method, url, self._copy_request_kwargs(kwargs), attempt, hedge=True)
+        return self._first_response(primary, hedge)
+
+    def _hedged_endpoint(self, method, url, kwargs):
+        if self.hedging is None or kwargs.get("stream"):
+            return None
+        return self.hedging.endpoint(method, url[len(self.base_url) :])
+
+    def _observe_latency(self, endpoint, started_at):
+        def observe(future):
+            # a request cancelled before it completed has no latency to learn from
+            if not future.cancelled():
+                self.hedging.observe(endpoint, time.monotonic() - started_at)
+
+        return observe
+
+    def _submit(self, fn, *args, **kwargs):
+        # run in a copy of the caller's context so that spans nest under the caller's
+        return self._hedge_executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def _first_response(self, primary, hedge):
+        """
+        :return: the response of whichever request succeeds first; the other one is already running and
+            can not be interrupted, so it is left to finish in the background and its response closed
+        :raises APIError: the error of the first request if both failed
+        """
+        errors = {}
+        pending = {primary, hedge}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except APIError as e:
+                    errors[future] = e
+                    continue
+                if future is hedge:
+                    self.hedging.record_win()
+                for other in pending:
+                    other.add_done_callback(_close_response)
+                return response
+        raise errors[primary]
+
+    @staticmethod
+    def _copy_request_kwargs(kwargs):
+        # requests sent at the same time each need their own headers
+        kwargs = dict(kwargs)
+        prepared = kwargs.get("prepared")
+        if prepared is not None:
+            kwargs["prepared"] = prepared = prepared.copy()
+            kwargs["headers"] = prepared.headers
+        else:
+            kwargs["headers"] = dict(kwargs["headers"])
+        return kwargs
+
+    def _retry_delay(self, method, error, attempt, started_at, kwargs):
+        if self.retry_policy is None:
+            return None
+        deadline = current_deadline()
+        time_left = deadline.remaining() if deadline is not None else None
+        idempotent = IDEMPOTENCY_HEADER in kwargs["headers"]
+        return self.retry_policy.next_delay(method, error, attempt, started_at, time_left, idempotent)
+
+    @staticmethod
+    def _check_deadline(error):
+        """
+        :raises DeadlineExceededError: from error if the request got no response and the deadline of the
+            operation has passed, so that the timeout it was given is reported as the deadline it came from
+        """
+        deadline = current_deadline()
+        if deadline is not None and error.response is None and deadline.expired:
+            raise DeadlineExceededError(deadline.seconds) from error
+
+    @staticmethod
+    def _send_timeout(timeout):
+        """
+        :return: timeout, shortened to the time left before the deadline of the current operation
+        :raises DeadlineExceededError: if that deadline has passed
+        """
+        deadline = current_deadline()
+        if deadline is None:
+            return timeout
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError(deadline.seconds)
+        return Timeout.create(timeout).clip(remaining)
+
+    def _refresh_authorization(self, kwargs):
+        # a retry can happen long after the request was built, so make sure its token is still valid
+        kwargs["headers"]["Authorization"] = f"Bearer {self._get_api_token()}"
+
+    def _before_send(self, family):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call((self.base_url, family))
+
+    def _after_send(self, family, response, error, elapsed_time):
+        """
+        Called once for every attempt that passed _before_send, unless it was cancelled (see _cancel_send).
+
+        :param response: the response received, None if there was none
+        :param error: the APIError raised for the attempt, None if it succeeded
+        """
+        if self.rate_limiter is not None and response is not None:
+            self.rate_limiter.on_response(family, response.status_code, response.headers)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record((self.base_url, family), error, elapsed_time)
+
+    def _cancel_send(self, family):
+        """Called instead of _after_send for an attempt cancelled, or given up, before it completed."""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.release((self.base_url, family))
+
+    def _observe_send(
+        self, span, sent_at, method, family, attempt, kwargs, response, elapsed_time, timed_out, pool_wait, hedge=False
+    ):
+        """Add the outcome of an attempt to its span and to the metrics sinks."""
+        if span is not None:
+            if response is not None:
+                span.set_attribute("http.response.status_code", response.status_code)
+            if pool_wait is not None:
+                self.tracer.record_span("notifications.pool_wait", sent_at, sent_at + int(pool_wait * 1e9))
+        if self.metrics_sinks:
+            self._record_metrics(method, family, attempt, kwargs, response, elapsed_time, timed_out, pool_wait, hedge)
+
+    def _record_metrics(self, method, family, attempt, kwargs, response, elapsed_time, timed_out, pool_wait, hedge):
+        status_code = response_bytes = None
+        if response is not None:
+            status_code = response.status_code
+            content_length = response.headers.get("Content-Length")
+            if content_length is not None:
+                response_bytes = int(content_length)
+            elif not kwargs.get("stream"):
+                response_bytes = len(response.content)
+
+        sample = RequestSample(
+            method=method,
+            family=family,
+            status_code=status_code,
+            duration=elapsed_time,
+            attempt=attempt,
+            timed_out=timed_out,
+            request_bytes=len(kwargs.get("data") or b""),
+            response_bytes=response_bytes,
+            pool_wait=pool_wait,
+            hedge=hedge,
+        )
+        for sink in self.metrics_sinks:
+            try:
+                sink.record(sample)
+            except Exception:
+                logger.exception("Metrics sink %r failed to record API %s request", sink, method)
+
+    def _send_request(self, method, url, kwargs, attempt=1, hedge=False):
+        family = endpoint_family(method, url)
+        # an open circuit fails fast, without waiting for or spending a rate limit token
+        self._before_send(family)
         try:
-            response = self.request_session.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response
-        except requests.RequestException as e:
-            api_error = HTTPError.create(e)
-            logger.warning(
-                "API %s request on %s failed with %s '%s'", method, url, api_error.status_code, api_error.message
-            )
-            raise api_error from e
-        finally:
-            elapsed_time = time.monotonic() - start_time
-            logger.debug("API %s request on %s finished in %s", method, url, elapsed_time)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(family)
+            timeout = self._send_timeout(kwargs["timeout"])
+        except BaseException:
+            self._cancel_send(family)
+            raise
+
+        attributes = {"notifications.family": family, "notifications.attempt": attempt}
+        if hedge:
+            attributes["notifications.hedge"] = True
+        with self._trace("notifications.send", attributes) as span:
+            sent_at = None
+            if span is not None:
+                self.tracer.inject(kwargs["headers"])
+                sent_at = time.time_ns()
+
+            start_time = time.monotonic()
+            response = api_error = None
+            timed_out = False
+            try:
+                if self.transport is not None:
+                    response = self._send_transport(method, url, kwargs, timeout)
+                elif "prepared" in kwargs:
+                    response = self._send_prepared(method, kwargs, _requests_timeout(timeout))
+                else:
+                    response = self.request_session.request(
+                        method, url, **dict(kwargs, timeout=_requests_timeout(timeout))
+                    )
+                response.raise_for_status()
+                return response
+            except self._transport_errors as e:
+                timed_out = isinstance(e, self._timeout_errors)
+                api_error = HTTPError.create(e)
+                logger.warning(
+                    "API %s request on %s failed with %s '%s'", method, url, api_error.status_code, api_error.message
+                )
+                raise api_error from e
+            finally:
+                elapsed_time = time.monotonic() - start_time
+                logger.debug("API %s request on %s finished in %s", method, url, elapsed_time)
+                self._after_send(family, response, api_error, elapsed_time)
+                if self.metrics_sinks or span is not None:
+                    pool_wait = self.http_adapter.pop_pool_wait()
+                    self._observe_send(
+                        span,
+                        sent_at,
+                        method,
+                        family,
+                        attempt,
+                        kwargs,
+                        response,
+                        elapsed_time,
+                        timed_out,
+                        pool_wait,
+                        hedge,
+                    )
+
+    def _send_prepared(self, method, kwargs, timeout):
+        prepared = kwargs["prepared"]
+        prepared.method = method
+        if prepared.body is None and method not in ("GET", "HEAD"):
+            prepared.headers["Content-Length"] = "0"
+        settings = dict(kwargs["settings"], stream=kwargs.get("stream", False))
+        return self.request_session.send(prepared, timeout=timeout, **settings)
+
+    def _send_transport(self, method, url, kwargs, timeout):
+        params = kwargs.get("params")
+        if params:
+            # like requests, leave out parameters set to None
+            url = f"{url}?{urllib.parse.urlencode({k: v for k, v in params.items() if v is not None}, doseq=True)}"
+        response = self.transport.send(method, url, kwargs["headers"], kwargs.get("data"), timeout)
+        if not kwargs.get("stream") or response.is_error:
+            # release the connection, the error message is read from the body
+            response.read()
+        return response
 
     def _process_json_response(self, response):
         try:
             if response.status_code == 204:
                 return
-            return response.json()
+            return self.json_codec.loads(response.content)
         except ValueError as e:
             raise InvalidResponse(response, message="No JSON response object could be decoded") from e
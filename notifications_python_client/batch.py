@@ -0,0 +1,248 @@
+import asyncio
+import collections
+import concurrent.futures
+import contextvars
+import itertools
+from typing import Any, NamedTuple, Optional
+
+
+class SendResult(NamedTuple):
+    """Outcome of one item of a batch send."""
+
+    # position of the item in the input
+    index: int
+    item: Any
+    # the API response, None if the item failed
+    response: Optional[dict]  # noqa: UP007 – Python <3.10 compatibility
+    # the APIError or ValueError raised for the item, None if it succeeded
+    error: Optional[Exception]  # noqa: UP007 – Python <3.10 compatibility
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def check_concurrency(concurrency, window):
+    """
+    :return: the window to use, twice the concurrency by default
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if window is None:
+        return 2 * concurrency
+    if window < concurrency:
+        raise ValueError("window can not be smaller than concurrency")
+    return window
+
+
+def bounded_map(fn, items, concurrency, ordered=True, window=None, thread_name_prefix="notifications-batch"):
+    """
+    Call fn(index, item) for each of items from concurrency threads, yielding the results as they come.
+
+    items is read as results are consumed: at most window items are in flight or waiting to be
+    yielded, so memory does not grow with the input. Each call runs in a copy of the caller's
+    context, so a Deadline or trace span of the caller applies to it. When the iterator is closed
+    early, or fn raises, the calls not started are cancelled and the running ones waited for.
+
+    :param ordered: yield the results in the order of items rather than as they complete
+    :param window: items read ahead of the results yielded, twice the concurrency by default
+    """
+    window = check_concurrency(concurrency, window)
+    return _bounded_map(fn, iter(items), concurrency, ordered, window, thread_name_prefix)
+
+
+def _bounded_map(fn, items, concurrency, ordered, window, thread_name_prefix):
+    executor = concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix=thread_name_prefix)
+    pending = collections.deque() if ordered else set()
+    try:
+        for index, item in enumerate(items):
+            yield from _completed(pending, ordered, wait=len(pending) >= window)
+            future = executor.submit(contextvars.copy_context().run, fn, index, item)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+        while pending:
+            yield from _completed(pending, ordered, wait=True)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _completed(pending, ordered, wait):
+    """
+    Remove the futures of pending whose results can be yielded, waiting for one if wait is set.
+
+    :return: their results
+    """
+    if ordered:
+        results = []
+        if wait:
+            results.append(pending.popleft().result())
+        while pending and pending[0].done():
+            results.append(pending.popleft().result())
+        return results
+
+    done, _ = concurrent.futures.wait(
+        pending, timeout=None if wait else 0, return_when=concurrent.futures.FIRST_COMPLETED
+    )
+    pending -= done
+    return [future.result() for future in done]
+
+
+def bounded_map_async(fn, items, concurrency, ordered=True, window=None, stop=None):
+    """
+    asyncio version of bounded_map: await fn(index, item) for each of items, an iterable or async
+    iterable, with at most concurrency calls running at once.
+
+    Results are yielded as soon as they can be, even while waiting for the next item. items is
+    only read while fewer than window items are in flight or waiting to be yielded, which holds
+    back a producer that is faster than the API. Each call runs in a task, in a copy of the
+    caller's context.
+
+    Once stop is set, no more items are read and the iteration ends when the calls in flight
+    have finished and their results have been yielded. Closing the iterator early, cancelling the
+    task consuming it, or fn raising cancels the calls in flight instead.
+
+    :param ordered: yield the results in the order of items rather than as they complete
+    :param window: items read ahead of the results yielded, twice the concurrency by default
+    :param stop: asyncio.Event draining the calls in flight once set, None to read all of items
+    """
+    window = check_concurrency(concurrency, window)
+    return _bounded_map_async(fn, items, concurrency, ordered, window, stop)
+
+
+async def _bounded_map_async(fn, items, concurrency, ordered, window, stop):
+    semaphore = asyncio.Semaphore(concurrency)
+    # set whenever a call completes, an item is read or stop is set
+    wakeup = asyncio.Event()
+    # tasks of the calls not yet yielded, in the order of items
+    pending = {}
+    # calls completed and not yet yielded, in completion order
+    completed = collections.deque()
+
+    def on_done(task):
+        completed.append(task)
+        wakeup.set()
+
+    reader = _ItemReader(items, stop, wakeup.set)
+    try:
+        while True:
+            wakeup.clear()
+            # the producer is only read while the window has room
+            while len(pending) < window:
+                received = reader.read()
+                if received is None:
+                    break
+                task = asyncio.ensure_future(_call_limited(semaphore, fn, *received))
+                task.add_done_callback(on_done)
+                pending[task] = None
+
+            results = _finished(pending, completed, ordered)
+            for result in results:
+                yield result
+            if not pending and reader.closed:
+                return
+            if not results:
+                await wakeup.wait()
+    finally:
+        reader.close()
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _call_limited(semaphore, fn, index, item):
+    async with semaphore:
+        return await fn(index, item)
+
+
+def _finished(pending, completed, ordered):
+    """
+    Remove the tasks of pending whose results can be yielded.
+
+    :return: their results
+    """
+    if ordered:
+        completed.clear()
+        done = list(itertools.takewhile(lambda task: task.done(), pending))
+    else:
+        done = list(completed)
+        completed.clear()
+    for task in done:
+        del pending[task]
+    return [task.result() for task in done]
+
+
+class _ItemReader:
+    """
+    Reads items without blocking the iteration: the items of an async iterable are awaited in a
+    task, so that results can be yielded while the next one is produced.
+
+    :param on_ready: called when an awaited item, or stop, is ready
+    """
+
+    def __init__(self, items, stop, on_ready):
+        if hasattr(items, "__aiter__"):
+            self._items, self._iterator = items.__aiter__(), None
+        else:
+            self._items, self._iterator = None, iter(items)
+        self._on_ready = on_ready
+        self._next_item = None
+        self._stop = stop
+        self._stopped = None
+        if stop is not None:
+            self._stopped = asyncio.ensure_future(stop.wait())
+            self._stopped.add_done_callback(lambda task: on_ready())
+        self._index = 0
+        self.closed = False
+
+    def read(self):
+        """
+        :return: (index, item) of the next item, None if it is not ready yet or there are no more
+        """
+        if self._stop is not None and self._stop.is_set():
+            self.close()
+        if self.closed:
+            return None
+
+        if self._iterator is not None:
+            found, item = _next_sync(self._iterator)
+        elif self._next_item is None:
+            self._next_item = asyncio.ensure_future(_next_async(self._items))
+            self._next_item.add_done_callback(lambda task: self._on_ready())
+            return None
+        elif self._next_item.done():
+            found, item = self._next_item.result()
+            self._next_item = None
+        else:
+            return None
+
+        if not found:
+            self.close()
+            return None
+        self._index += 1
+        return self._index - 1, item
+
+    def close(self):
+        self.closed = True
+        for task in (self._next_item, self._stopped):
+            if task is not None:
+                task.cancel()
+
+
+def _next_sync(iterator):
+    try:
+        return True, next(iterator)
+    except StopIteration:
+        return False, None
+
+
+async def _next_async(iterator):
+    # the end of the items is returned, so that only errors of the producer are raised
+    try:
+        return True, await iterator.__anext__()
+    except StopAsyncIteration:
+        return False, None
@@ -0,0 +1,198 @@
+import codecs
+import csv
+import io
+import json
+import os
+from typing import List, NamedTuple, Optional  # noqa: UP035 – Python <3.10 compatibility
+
+# rows accepted by the API in one bulk job
+DEFAULT_MAX_ROWS = 50000
+# bytes of rows, or CSV, sent in one bulk job, well under the size of request accepted by the API
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
+
+class BulkChunk(NamedTuple):
+    """
+    One bulk job of a chunked bulk send, with the header row repeated.
+
+    A chunk whose input could not be read or split has an error instead of rows or csv, and is the last one.
+    """
+
+    # position of the chunk in the input
+    index: int
+    name: str
+    reference: Optional[str]  # noqa: UP007 – Python <3.10 compatibility
+    # data rows in the chunk, not counting the header
+    count: int
+    # the chunk as the rows or the csv of send_bulk_notifications, the other one is None
+    rows: Optional[list]  # noqa: UP007 – Python <3.10 compatibility
+    csv: Optional[str]  # noqa: UP007 – Python <3.10 compatibility
+    # the ValueError or csv.Error met reading the chunk, which is then not sent
+    error: Optional[Exception] = None  # noqa: UP007 – Python <3.10 compatibility
+
+
+class BulkChunkResult(NamedTuple):
+    """Outcome of one bulk job of a chunked bulk send."""
+
+    index: int
+    name: str
+    reference: Optional[str]  # noqa: UP007 – Python <3.10 compatibility
+    count: int
+    # the API response, None if the job could not be created
+    response: Optional[dict]  # noqa: UP007 – Python <3.10 compatibility
+    # the APIError raised when creating the job, or the error met reading its input, None if it succeeded
+    error: Optional[Exception]  # noqa: UP007 – Python <3.10 compatibility
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def job_id(self):
+        return self.response["data"]["id"] if self.ok else None
+
+
+class BulkResult(NamedTuple):
+    """Outcome of a chunked bulk send: one BulkChunkResult per bulk job, in the order of the input."""
+
+    chunks: List[BulkChunkResult]  # noqa: UP006 – Python <3.10 compatibility
+
+    @property
+    def ok(self):
+        return all(chunk.ok for chunk in self.chunks)
+
+    @property
+    def job_ids(self):
+        """IDs of the jobs created, in the order of the input."""
+        return [chunk.job_id for chunk in self.chunks if chunk.ok]
+
+    @property
+    def failed(self):
+        return [chunk for chunk in self.chunks if not chunk.ok]
+
+    @property
+    def count(self):
+        """Data rows in the jobs created."""
+        return sum(chunk.count for chunk in self.chunks if chunk.ok)
+
+
+def bulk_chunks(name, reference=None, rows=None, csv_file=None, max_rows=DEFAULT_MAX_ROWS, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Split rows, or csv_file, into bulk jobs of at most max_rows data rows and max_bytes bytes.
+
+    The input is read as the chunks are consumed. Every chunk starts with the header row, the first
+    row of the input, and its name and reference get the suffix " - n" and "-n", n counting from 1.
+    Rows are measured as JSON, and CSV records as UTF-8 bytes of their original text, which is sent
+    unchanged.
+
+    An input that can not be read or split, because it is not valid UTF-8 or CSV or has a row larger
+    than max_bytes, is not raised: the rows read before the error are chunked as usual, then a last
+    chunk holds the error, so that the jobs already created for the chunks before it are still reported.
+
+    :param rows: iterable of rows, each a list of values, the first one being the header
+    :param csv_file: path, or text or binary stream, of a CSV file whose first record is the header
+    :return: an iterator of BulkChunk
+    """
+    if (rows is None) == (csv_file is None):
+        raise ValueError("exactly one of rows and csv_file must be given")
+    if max_rows < 1:
+        raise ValueError("max_rows must be at least 1")
+    if rows is not None:
+        return _chunks(name, reference, iter(rows), max_rows, max_bytes, _row_size, _as_rows)
+    return _chunks(name, reference, _csv_records(csv_file), max_rows, max_bytes, _record_size, _as_csv)
+
+
+def _chunks(name, reference, records, max_rows, max_bytes, size, build):
+    index = 0
+    chunk = []
+    try:
+        header = next(records, None)
+        if header is None:
+            raise ValueError("bulk input must start with a header row")
+        header_size = size(header)
+
+        chunk_size = header_size
+        for number, record in enumerate(records, 1):
+            record_size = size(record)
+            if header_size + record_size > max_bytes:
+                raise ValueError(f"row {number} does not fit in max_bytes with the header")
+            if len(chunk) >= max_rows or chunk_size + record_size > max_bytes:
+                yield _chunk(name, reference, index, header, chunk, build)
+                index += 1
+                chunk, chunk_size = [], header_size
+            chunk.append(record)
+            chunk_size += record_size
+    except (ValueError, csv.Error) as e:
+        # the rows read before the error are sent, and the error marks where the input must be fixed
+        if chunk:
+            yield _chunk(name, reference, index, header, chunk, build)
+            index += 1
+        yield BulkChunk(index, *_suffixed(name, reference, index), 0, None, None, e)
+        return
+    if chunk:
+        yield _chunk(name, reference, index, header, chunk, build)
+
+
+def _chunk(name, reference, index, header, records, build):
+    return BulkChunk(index, *_suffixed(name, reference, index), len(records), *build(header, records))
+
+
+def _suffixed(name, reference, index):
+    return f"{name} - {index + 1}", f"{reference}-{index + 1}" if reference else None
+
+
+def _row_size(row):
+    # with the comma separating it from the next row
+    return len(json.dumps(row)) + 1
+
+
+def _record_size(record):
+    return len(record.encode())
+
+
+def _as_rows(header, records):
+    return [header, *records], None
+
+
+def _as_csv(header, records):
+    return None, header + "".join(records)
+
+
+def _csv_records(csv_file):
+    """
+    :return: an iterator of the text of each record of csv_file, ending with a newline, blank lines skipped
+    """
+    if isinstance(csv_file, (str, os.PathLike)):  # noqa: UP038 – Python <3.10 compatibility
+        with open(csv_file, "rb") as f:
+            yield from _split_records(_decoded_lines(f))
+    elif isinstance(csv_file, io.TextIOBase):
+        yield from _split_records(csv_file)
+    else:
+        yield from _split_records(_decoded_lines(csv_file))
+
+
+def _decoded_lines(lines):
+    # decoded line by line, rather than by block, so that an invalid byte fails at the record holding it
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    for line in lines:
+        yield decoder.decode(line)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _split_records(lines):
+    # the csv module only tells where records end, quoted values can span several lines
+    consumed = []
+
+    def capture():
+        for line in lines:
+            consumed.append(line)
+            yield line
+
+    for _ in csv.reader(capture()):
+        record = "".join(consumed)
+        consumed.clear()
+        if not record.strip():
+            continue
+        yield record if record.endswith(("\n", "\r")) else record + "\n"
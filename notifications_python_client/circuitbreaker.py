@@ -0,0 +1,173 @@
+import threading
+import time
+from collections import deque
+
+from notifications_python_client.errors import CircuitOpenError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    def __init__(self, window_size):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window_size)
+        self.opened_at = None
+        self.probes = 0
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for API calls, with one circuit per base URL and endpoint family.
+
+    A circuit opens when, over its last window_size calls (and at least minimum_calls), the share
+    of failed calls reaches failure_rate_threshold. Connection errors, timeouts and 5xx responses
+    are failures, and so are calls slower than slow_call_duration. While open, calls fail fast with
+    CircuitOpenError. After open_duration seconds the circuit is half-open: half_open_max_calls
+    probe calls are let through, and it closes if they all succeed or opens again otherwise.
+
+    One breaker can be shared between clients and threads.
+
+    :param on_state_change: optional callable(key, old_state, new_state), called without the lock held
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold=0.5,
+        slow_call_duration=None,
+        minimum_calls=10,
+        window_size=20,
+        open_duration=30,
+        half_open_max_calls=1,
+        on_state_change=None,
+    ):
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold must be between 0 and 1")
+        if minimum_calls > window_size:
+            raise ValueError("minimum_calls can not be larger than window_size")
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.minimum_calls = minimum_calls
+        self.window_size = window_size
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self.on_state_change = on_state_change
+
+        self._lock = threading.Lock()
+        self._circuits = {}
+
+    def state(self, key):
+        """
+        :param key: (base_url, endpoint family)
+        :return: CLOSED, OPEN or HALF_OPEN
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return CLOSED
+            expired = self._expire_open(circuit, time.monotonic())
+            state = circuit.state
+
+        if expired:
+            self._notify(key, OPEN, HALF_OPEN)
+        return state
+
+    def states(self):
+        """
+        :return: dict of key to state for every circuit seen so far
+        """
+        with self._lock:
+            now = time.monotonic()
+            expired = [key for key, circuit in self._circuits.items() if self._expire_open(circuit, now)]
+            states = {key: circuit.state for key, circuit in self._circuits.items()}
+
+        for key in expired:
+            self._notify(key, OPEN, HALF_OPEN)
+        return states
+
+    def before_call(self, key):
+        """
+        Must be followed by exactly one call to record, or to release, for the same key.
+
+        :raises CircuitOpenError: if the circuit does not let the call through
+        """
+        transition = None
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                circuit = self._circuits[key] = _Circuit(self.window_size)
+
+            now = time.monotonic()
+            if self._expire_open(circuit, now):
+                transition = (OPEN, HALF_OPEN)
+
+            if circuit.state == OPEN:
+                raise CircuitOpenError(key, circuit.opened_at + self.open_duration - now)
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_max_calls:
+                    raise CircuitOpenError(key, 0)
+                circuit.probes += 1
+
+        if transition:
+            self._notify(key, *transition)
+
+    def record(self, key, error, duration):
+        """
+        :param error: the APIError raised by the call, None if it succeeded
+        :param duration: seconds the call took
+        """
+        failed = self.is_failure(error) or (self.slow_call_duration is not None and duration >= self.slow_call_duration)
+        transition = None
+        with self._lock:
+            circuit = self._circuits[key]
+            if circuit.state == HALF_OPEN:
+                circuit.probes -= 1
+                if failed:
+                    transition = self._open(circuit, HALF_OPEN)
+                elif circuit.probes == 0:
+                    circuit.state = CLOSED
+                    circuit.outcomes.clear()
+                    transition = (HALF_OPEN, CLOSED)
+            elif circuit.state == CLOSED:
+                circuit.outcomes.append(failed)
+                if (
+                    len(circuit.outcomes) >= self.minimum_calls
+                    and sum(circuit.outcomes) / len(circuit.outcomes) >= self.failure_rate_threshold
+                ):
+                    transition = self._open(circuit, CLOSED)
+
+        if transition:
+            self._notify(key, *transition)
+
+    def release(self, key):
+        """
+        End a call let through by before_call without recording an outcome, for a call cancelled
+        before it completed: a half-open probe slot it held is given back.
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None and circuit.state == HALF_OPEN and circuit.probes > 0:
+                circuit.probes -= 1
+
+    @staticmethod
+    def is_failure(error):
+        # 4xx (including 429) mean the API is up and answering
+        return error is not None and (error.response is None or error.status_code >= 500)
+
+    def _open(self, circuit, previous_state):
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.outcomes.clear()
+        return previous_state, OPEN
+
+    def _expire_open(self, circuit, now):
+        if circuit.state == OPEN and now >= circuit.opened_at + self.open_duration:
+            circuit.state = HALF_OPEN
+            circuit.probes = 0
+            return True
+        return False
+
+    def _notify(self, key, old_state, new_state):
+        if self.on_state_change is not None:
+            self.on_state_change(key, old_state, new_state)
@@ -0,0 +1,76 @@
+import json
+
+
+class JSONCodec:
+    """
+    Encodes request bodies to compact UTF-8 JSON bytes and decodes response bodies, using the
+    standard library json module.
+
+    Subclasses wrap faster JSON libraries; default_codec() picks the fastest one installed.
+    """
+
+    name = "json"
+
+    def dumps(self, obj, default=None):
+        """
+        :param default: called for objects that can not otherwise be serialised
+        :return: bytes
+        """
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def loads(self, data):
+        """
+        :param data: bytes or str
+        :raises ValueError: if data is not valid JSON
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj, default=None):
+        return self._orjson.dumps(obj, default=default, option=self._orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._ujson = ujson
+
+    def dumps(self, obj, default=None):
+        return self._ujson.dumps(obj, default=default, ensure_ascii=False, escape_forward_slashes=False).encode()
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+
+_default_codec = None
+
+
+def default_codec():
+    """
+    :return: a shared codec using orjson if installed, else ujson, else the standard library
+    """
+    global _default_codec
+    if _default_codec is None:
+        for codec_class in (OrjsonCodec, UjsonCodec):
+            try:
+                _default_codec = codec_class()
+                break
+            except ImportError:
+                continue
+        else:
+            _default_codec = JSONCodec()
+    return _default_codec
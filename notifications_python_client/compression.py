@@ -0,0 +1,73 @@
+import gzip
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+DEFAULT_LEVELS = {"gzip": 6, "zstd": 3, "br": 5}
+
+
+def available_encodings():
+    """
+    :return: the Content-Encoding values RequestCompression can produce with the installed packages
+    """
+    encodings = ["gzip"]
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    return encodings
+
+
+class RequestCompression:
+    """
+    Compresses request bodies, such as the rows or csv of bulk sends, before they are sent.
+
+    Bodies of at least min_size bytes are compressed and sent with a Content-Encoding header;
+    smaller ones are sent as they are, since compressing them costs more than it saves. Only
+    enable it for an API that accepts compressed requests.
+
+    Compressed responses are negotiated by the HTTP library: requests and httpx both send an
+    Accept-Encoding header listing gzip and deflate, plus br and zstd when brotli and zstandard
+    are installed, and decode the response accordingly.
+
+    :param encoding: "gzip", "zstd" (requires zstandard) or "br" (requires brotli)
+    :param level: compression level, defaults to one favouring speed over size for the encoding
+    :param min_size: smallest body, in bytes, that is compressed
+    """
+
+    def __init__(self, encoding="gzip", level=None, min_size=1024):
+        if encoding not in DEFAULT_LEVELS:
+            raise ValueError(f"Unsupported encoding {encoding!r}, expected one of {', '.join(DEFAULT_LEVELS)}")
+        if encoding not in available_encodings():
+            raise ImportError(f"The {encoding!r} encoding requires {'zstandard' if encoding == 'zstd' else 'brotli'}")
+        if min_size < 0:
+            raise ValueError("min_size must not be negative")
+
+        self.encoding = encoding
+        self.level = DEFAULT_LEVELS[encoding] if level is None else level
+        self.min_size = min_size
+
+    def compress(self, body):
+        """
+        :param body: serialised request body
+        :return: the compressed body, or None if body is smaller than min_size
+        """
+        if len(body) < self.min_size:
+            return None
+        if self.encoding == "gzip":
+            # a fixed mtime keeps the output identical for identical bodies
+            return gzip.compress(body, compresslevel=self.level, mtime=0)
+        if self.encoding == "zstd":
+            # compressor objects cannot be shared between threads
+            return zstandard.ZstdCompressor(level=self.level).compress(body)
+        return brotli.compress(body, quality=self.level)
@@ -0,0 +1,30 @@
+from urllib.parse import urlsplit
+
+SMS = "sms"
+EMAIL = "email"
+BULK = "bulk"
+READS = "reads"
+
+ENDPOINT_FAMILIES = (SMS, EMAIL, BULK, READS)
+
+_SEND_ENDPOINTS = {
+    "/v2/notifications/sms": SMS,
+    "/v2/notifications/email": EMAIL,
+    "/v2/notifications/bulk": BULK,
+}
+
+
+def endpoint_family(method, url):
+    """
+    Group API calls the way the API limits and monitors them.
+
+    :param method: HTTP method
+    :param url: full URL or path of the request
+    :return: one of SMS, EMAIL, BULK or READS
+    """
+    if method.upper() == "POST":
+        path = urlsplit(url).path.rstrip("/")
+        for suffix, family in _SEND_ENDPOINTS.items():
+            if path.endswith(suffix):
+                return family
+    return READS
@@ -1,6 +1,7 @@
-from typing import List, Union  # noqa: UP035 – Python <3.10 compatibility
+from typing import TYPE_CHECKING, List, Union  # noqa: UP035 – Python <3.10 compatibility
 
-from requests import RequestException, Response
+if TYPE_CHECKING:
+    from requests import RequestException, Response
 
 REQUEST_ERROR_STATUS_CODE = 503
 REQUEST_ERROR_MESSAGE = "Request failed"
@@ -42,7 +43,7 @@ class TokenIssuedAtError(TokenDecodeError):
 
 
 class APIError(Exception):
-    def __init__(self, response: Response = None, message: str = None):
+    def __init__(self, response: "Response" = None, message: str = None):
         self.response = response
         self._message = message
 
@@ -67,10 +68,14 @@ class APIError(Exception):
 
 class HTTPError(APIError):
     @staticmethod
-    def create(e: RequestException) -> "HTTPError":
-        error = HTTPError(e.response)
+    def create(e: "RequestException") -> "HTTPError":
+        # connection errors carry no response, whichever HTTP library raised them
+        response = getattr(e, "response", None)
+        error = HTTPError(response)
         if error.status_code == 503:
-            error = HTTP503Error(e.response)
+            error = HTTP503Error(response)
+        elif error.status_code == 429:
+            error = HTTP429Error(response)
         return error
 
 
@@ -81,5 +86,39 @@ class HTTP503Error(HTTPError):
     """
 
 
+class HTTP429Error(HTTPError):
+    """Specific instance of HTTPError for 429 errors
+
+    Raised when the API rate limit is exceeded; the response may carry a Retry-After header.
+    """
+
+
+class CircuitOpenError(APIError):
+    """Raised without calling the API while its circuit breaker is open
+
+    :param key: (base_url, endpoint family) of the open circuit
+    :param retry_after: seconds until the circuit lets a probe call through
+    """
+
+    def __init__(self, key, retry_after):
+        super().__init__(message=f"Circuit open for {key[1]} requests to {key[0]}")
+        self.key = key
+        self.retry_after = max(0.0, retry_after)
+
+
+class DeadlineExceededError(APIError):
+    """Raised when the Deadline of an operation passes before its calls complete
+
+    Raised instead of sending a call once the deadline has passed, and from the error of a call
+    that timed out or could not be retried in the time left.
+
+    :param seconds: time the operation was allowed
+    """
+
+    def __init__(self, seconds):
+        super().__init__(message=f"Deadline of {seconds:g}s exceeded")
+        self.seconds = seconds
+
+
 class InvalidResponse(APIError):
     pass
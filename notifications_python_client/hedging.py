@@ -0,0 +1,234 @@
+import collections
+import concurrent.futures
+import math
+import queue
+import threading
+from typing import NamedTuple
+
+# GET endpoints hedged by default: a notification by id and a template, or one of its versions
+DEFAULT_HEDGED_PATHS = ("/v2/notifications/", "/v2/template/")
+
+
+class HedgeStats(NamedTuple):
+    """Counters kept by a HedgingPolicy."""
+
+    # calls that could have been hedged
+    calls: int
+    # duplicate requests sent
+    hedges: int
+    # calls answered by their duplicate request
+    wins: int
+    # duplicate requests not sent because the budget was spent
+    throttled: int
+
+    @property
+    def hedge_rate(self):
+        return self.hedges / self.calls if self.calls else 0.0
+
+
+class _LatencyWindow:
+    def __init__(self, size):
+        self.latencies = collections.deque(maxlen=size)
+        self.delay = None
+        self.pending = 0
+
+
+class HedgingPolicy:
+    """
+    Decides when a slow GET request is duplicated to cut tail latency.
+
+    When the response to a call has not arrived after the hedge delay, the client sends the same
+    request again and returns whichever response arrives first. The delay is either fixed or the
+    given percentile of the latencies recently observed for the endpoint, so that only the
+    slowest calls are hedged.
+
+    Every call adds budget tokens to a bucket holding at most max_burst tokens, and each hedge
+    takes one, so hedges never add more than a budget fraction of extra requests. Only GET
+    requests to one of paths are hedged; streamed pages are not.
+
+    A policy can be shared between clients; its counters then cover all of them.
+
+    :param delay: seconds to wait before hedging, None to use the observed percentile
+    :param percentile: latency percentile, between 0 and 1, used as the delay
+    :param initial_delay: delay used until min_samples latencies have been observed for an endpoint
+    :param min_delay: lower bound of the observed delay
+    :param min_samples: latencies observed for an endpoint before its percentile is used
+    :param window: number of most recent latencies kept for each endpoint
+    :param budget: hedges allowed per call, on average
+    :param max_burst: hedges that can be sent in a row once the budget has accumulated
+    :param paths: path prefixes, relative to the base URL, of the GET requests that may be hedged
+    """
+
+    def __init__(
+        self,
+        delay=None,
+        percentile=0.95,
+        initial_delay=0.5,
+        min_delay=0.01,
+        min_samples=20,
+        window=1000,
+        budget=0.05,
+        max_burst=10,
+        paths=DEFAULT_HEDGED_PATHS,
+    ):
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.delay = delay
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.budget = budget
+        self.max_burst = max_burst
+        self.paths = tuple(paths)
+
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._tokens = max_burst
+        self._calls = 0
+        self._hedges = 0
+        self._wins = 0
+        self._throttled = 0
+
+    def stats(self):
+        with self._lock:
+            return HedgeStats(calls=self._calls, hedges=self._hedges, wins=self._wins, throttled=self._throttled)
+
+    def endpoint(self, method, path):
+        """
+        :param path: path of the request relative to the base URL
+        :return: the path prefix the request is hedged under, None if it is not hedged
+        """
+        if method.upper() != "GET":
+            return None
+        for prefix in self.paths:
+            if path.startswith(prefix):
+                return prefix
+        return None
+
+    def hedge_delay(self, endpoint):
+        """
+        Count a call to endpoint and add to the budget.
+
+        :return: seconds to wait for the response before hedging
+        """
+        with self._lock:
+            self._calls += 1
+            self._tokens = min(self.max_burst, self._tokens + self.budget)
+            if self.delay is not None:
+                return self.delay
+            window = self._windows.get(endpoint)
+            if window is None or window.delay is None:
+                return self.initial_delay
+            return window.delay
+
+    def acquire(self):
+        """
+        Take a hedge from the budget.
+
+        :return: True if a hedge may be sent
+        """
+        with self._lock:
+            if self._tokens < 1:
+                self._throttled += 1
+                return False
+            self._tokens -= 1
+            self._hedges += 1
+            return True
+
+    def observe(self, endpoint, latency):
+        """Record the latency of a first request to endpoint, whether or not it was hedged."""
+        with self._lock:
+            window = self._windows.get(endpoint)
+            if window is None:
+                window = self._windows[endpoint] = _LatencyWindow(self.window)
+            window.latencies.append(latency)
+            window.pending += 1
+            # sorting the window for every call would cost more than the requests it saves
+            if len(window.latencies) >= self.min_samples and (
+                window.delay is None or window.pending >= max(1, len(window.latencies) // 20)
+            ):
+                window.pending = 0
+                latencies = sorted(window.latencies)
+                index = min(len(latencies) - 1, math.ceil(self.percentile * len(latencies)) - 1)
+                window.delay = max(self.min_delay, latencies[index])
+
+    def record_win(self):
+        with self._lock:
+            self._wins += 1
+
+
+class CachedThreadPool:
+    """
+    Runs each call on an idle worker thread, or on a new one when all are busy.
+
+    Unlike ThreadPoolExecutor, calls never wait in a queue for a worker, so the requests of hedged
+    calls are not held back by other calls in flight. Workers left idle for idle_timeout seconds exit.
+
+    :param idle_timeout: seconds an idle worker waits for a call before exiting
+    """
+
+    def __init__(self, thread_name_prefix="notifications-hedge", idle_timeout=60):
+        self.thread_name_prefix = thread_name_prefix
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._calls = queue.SimpleQueue()
+        self._idle = 0
+        self._started = 0
+        self._shutdown = False
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        :return: a concurrent.futures.Future of fn(*args, **kwargs)
+        """
+        future = concurrent.futures.Future()
+        call = (future, fn, args, kwargs)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit calls after shutdown")
+            if self._idle:
+                # handed to an idle worker, which can not exit before taking it (see _next_call)
+                self._idle -= 1
+                self._calls.put(call)
+                return future
+            self._started += 1
+            name = f"{self.thread_name_prefix}_{self._started}"
+        threading.Thread(target=self._work, args=(call,), name=name, daemon=True).start()
+        return future
+
+    def shutdown(self):
+        """Let the idle workers exit, and the busy ones once their call is done."""
+        with self._lock:
+            self._shutdown = True
+            for _ in range(self._idle):
+                self._calls.put(None)
+            self._idle = 0
+
+    def _work(self, call):
+        while call is not None:
+            future, fn, args, kwargs = call
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+            del call, future
+            call = self._next_call()
+
+    def _next_call(self):
+        with self._lock:
+            if self._shutdown:
+                return None
+            self._idle += 1
+        try:
+            return self._calls.get(timeout=self.idle_timeout)
+        except queue.Empty:
+            with self._lock:
+                # submit may have handed this worker a call since the timeout
+                try:
+                    return self._calls.get_nowait()
+                except queue.Empty:
+                    self._idle -= 1
+                    return None
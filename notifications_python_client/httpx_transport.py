@@ -0,0 +1,143 @@
+import asyncio
+import threading
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    httpx = None
+
+try:
+    import h2
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    h2 = None
+
+from notifications_python_client.timeouts import Timeout
+from notifications_python_client.transport import (
+    CHUNK_SIZE,
+    Transport,
+    TransportError,
+    TransportResponse,
+    TransportTimeout,
+)
+
+
+def httpx_timeout(timeout):
+    """
+    :param timeout: Timeout, or seconds allowed to each phase, as accepted by Transport.send
+    :return: the equivalent httpx.Timeout
+    """
+    timeout = Timeout.create(timeout)
+    return httpx.Timeout(connect=timeout.connect, read=timeout.read, write=timeout.write, pool=timeout.pool)
+
+
+class HTTPXTransport(Transport):
+    """
+    Transport sending requests over HTTP/1.1 through an httpx.Client.
+
+    Requires httpx (pip install notification-python-client[async]). Use HTTP2Transport for HTTP/2.
+
+    :param client: the httpx.Client to use, a new one by default
+    :param pool_maxsize: maximum number of connections of the new client
+    """
+
+    def __init__(self, client=None, pool_maxsize=10):
+        if httpx is None:
+            raise ImportError("HTTPXTransport requires httpx: pip install notification-python-client[async]")
+
+        if client is None:
+            client = httpx.Client(
+                limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+                follow_redirects=True,
+            )
+        self.client = client
+
+    def send(self, method, url, headers, body=None, timeout=None):
+        request = self.client.build_request(method, url, headers=headers, content=body, timeout=httpx_timeout(timeout))
+        try:
+            response = self.client.send(request, stream=True)
+        except httpx.TimeoutException as e:
+            raise TransportTimeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise TransportError(str(e)) from e
+        return TransportResponse(
+            response.status_code, response.headers, response.iter_bytes(CHUNK_SIZE), close=response.close
+        )
+
+    def close(self):
+        self.client.close()
+
+
+class HTTP2Transport(Transport):
+    """
+    Transport sending requests over multiplexed HTTP/2 connections, used by clients created with
+    http2=True.
+
+    The synchronous HTTP/2 connections of httpcore can open streams out of order when several
+    threads share them, which servers reject as a protocol error. Requests are therefore sent by
+    an httpx.AsyncClient running in a background event loop, and each calling thread waits for
+    its own response.
+
+    Requires httpx and h2 (pip install notification-python-client[http2]).
+
+    :param pool_maxsize: maximum number of connections to the API
+    :param http1: False to speak HTTP/2 without negotiation (prior knowledge)
+    """
+
+    def __init__(self, pool_maxsize=10, http1=True):
+        if h2 is None or httpx is None:
+            raise ImportError("http2 requires httpx and h2: pip install notification-python-client[http2]")
+
+        self.client = httpx.AsyncClient(
+            http1=http1,
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            follow_redirects=True,
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="notifications-http2", daemon=True)
+        self._thread.start()
+
+    def send(self, method, url, headers, body=None, timeout=None):
+        request = self.client.build_request(method, url, headers=headers, content=body, timeout=httpx_timeout(timeout))
+        try:
+            response = self._call(self.client.send(request, stream=True))
+        except httpx.TimeoutException as e:
+            raise TransportTimeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise TransportError(str(e)) from e
+        return TransportResponse(
+            response.status_code,
+            response.headers,
+            self._iter_chunks(response),
+            close=lambda: self._call(response.aclose()),
+        )
+
+    def _iter_chunks(self, response):
+        chunks = response.aiter_bytes(CHUNK_SIZE)
+        try:
+            while True:
+                try:
+                    yield self._call(_next_chunk(chunks))
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._call(chunks.aclose())
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    @property
+    def is_closed(self):
+        return self._loop.is_closed()
+
+    def close(self):
+        if self.is_closed:
+            return
+        self._call(self.client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+async def _next_chunk(chunks):
+    return await chunks.__anext__()
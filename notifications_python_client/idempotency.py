@@ -0,0 +1,190 @@
+import asyncio
+import collections
+import concurrent.futures
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import NamedTuple
+
+from notifications_python_client.errors import APIError
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# namespace of the keys derived from a notification reference
+_REFERENCE_NAMESPACE = uuid.UUID("0b7c3a4e-5d43-4a54-9c0b-6c1f4fd1e0a2")
+
+
+def idempotency_key_for(service_id, notification_type, reference, notification):
+    """
+    :param notification: the data sent for the notification; notifications sharing a reference but sent to
+        another recipient, or with another template or personalisation, get different keys
+    :return: the idempotency key of the notification of notification_type sent by service_id with reference,
+        the same for every call and process
+    """
+    name = f"{service_id}:{notification_type}:{reference}:{_digest(notification)}"
+    return str(uuid.uuid5(_REFERENCE_NAMESPACE, name))
+
+
+def request_fingerprint(method, url, data):
+    """
+    :return: a digest of the request, telling apart different requests sent with the same idempotency key
+    """
+    return _digest([method, url, data])
+
+
+def _digest(data):
+    # sets are serialised as lists by the client, in no particular order
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=lambda obj: sorted(obj, key=repr))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def new_idempotency_key():
+    return str(uuid.uuid4())
+
+
+def is_transient(error):
+    """
+    :return: True if the request that failed with error may not have been processed, and may succeed if sent again
+    """
+    return error.response is None or error.status_code == 429 or error.status_code >= 500
+
+
+class IdempotencyStats(NamedTuple):
+    """Counters kept by an IdempotencyStore."""
+
+    # calls sent to the API
+    sent: int
+    # calls answered with the outcome of an earlier or concurrent call with the same key
+    replayed: int
+    # keys currently stored
+    size: int
+
+
+class _Entry:
+    def __init__(self, expires_at, fingerprint):
+        self.outcome = concurrent.futures.Future()
+        self.expires_at = expires_at
+        self.fingerprint = fingerprint
+
+
+class IdempotencyStore:
+    """
+    Remembers the outcome of the calls sent with an idempotency key, so that sending the same key
+    again does not send the notification twice.
+
+    A call whose key is in flight waits for it and shares its outcome; a call whose key has
+    completed gets a copy of the response, or the same error, without calling the API. Transient
+    errors (connection errors, timeouts, 429 and 5xx responses) are not stored, so that the next
+    call with the key is sent again, with the same Idempotency-Key header.
+
+    A key sent again with a different request raises ValueError rather than returning the outcome of
+    another notification.
+
+    Keys are kept for ttl seconds, and the least recently stored completed keys are dropped beyond
+    max_size. The store only covers the process it lives in; only the API can recognise a key sent
+    from another process.
+
+    A store can be shared between clients, threads and event loops.
+
+    :param max_size: completed keys kept
+    :param ttl: seconds a completed key is kept
+    """
+
+    def __init__(self, max_size=10000, ttl=24 * 60 * 60):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._sent = 0
+        self._replayed = 0
+
+    def stats(self):
+        with self._lock:
+            return IdempotencyStats(sent=self._sent, replayed=self._replayed, size=len(self._entries))
+
+    def call(self, key, fn, *args, fingerprint=None):
+        """
+        :param fingerprint: request_fingerprint of the request made by fn
+        :return: fn(*args), or the outcome of the call already made with key
+        :raises ValueError: if the call already made with key had another fingerprint
+        """
+        entry, owner = self._begin(key, fingerprint)
+        if not owner:
+            logger.debug("Replaying outcome of API call with idempotency key %s", key)
+            return self._replay(entry.outcome.result())
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._fail(key, entry, e)
+            raise
+        entry.outcome.set_result(result)
+        return self._replay(result)
+
+    async def call_async(self, key, fn, *args, fingerprint=None):
+        """
+        :return: await fn(*args), or the outcome of the call already made with key
+        """
+        entry, owner = self._begin(key, fingerprint)
+        if not owner:
+            logger.debug("Replaying outcome of API call with idempotency key %s", key)
+            return self._replay(await asyncio.wrap_future(entry.outcome))
+        try:
+            result = await fn(*args)
+        except BaseException as e:
+            self._fail(key, entry, e)
+            raise
+        entry.outcome.set_result(result)
+        return self._replay(result)
+
+    def _begin(self, key, fingerprint):
+        """
+        :return: (entry, owner) where owner is True if the caller must make the call and set its outcome
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                if entry.fingerprint != fingerprint:
+                    raise ValueError(f"idempotency key {key} was already used for a different request")
+                self._replayed += 1
+                return entry, False
+            self._sent += 1
+            entry = self._entries[key] = _Entry(now + self.ttl, fingerprint)
+            self._entries.move_to_end(key)
+            self._evict(now)
+            return entry, True
+
+    def _fail(self, key, entry, error):
+        if not isinstance(error, APIError) or is_transient(error):
+            # the next call with the key is sent again
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+        # calls waiting for the key get the error too
+        entry.outcome.set_exception(error)
+
+    def _evict(self, now):
+        excess = len(self._entries) - self.max_size
+        evicted = []
+        for key, entry in self._entries.items():
+            expired = entry.expires_at <= now
+            if not expired and excess <= 0:
+                break
+            # keys in flight are needed by the calls waiting for them
+            if entry.outcome.done() or expired:
+                evicted.append(key)
+                excess -= 1
+        for key in evicted:
+            del self._entries[key]
+
+    @staticmethod
+    def _replay(result):
+        # every caller gets its own copy of the response
+        return copy.deepcopy(result)
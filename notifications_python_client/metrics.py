@@ -0,0 +1,194 @@
+import abc
+import bisect
+import threading
+from typing import NamedTuple, Optional
+
+# upper bounds, in seconds, of the latency and pool wait histogram buckets
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DEFAULT_POOL_WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+class RequestSample(NamedTuple):
+    """Measurements of one attempt at an API call, passed to MetricsSink.record."""
+
+    method: str
+    family: str
+    # None if no response was received
+    status_code: Optional[int]  # noqa: UP007 – Python <3.10 compatibility
+    duration: float
+    # 1 for the first attempt, 2 for the first retry...
+    attempt: int
+    timed_out: bool
+    request_bytes: int
+    # bytes received, None when unknown because the response is streamed without a Content-Length
+    response_bytes: Optional[int]  # noqa: UP007 – Python <3.10 compatibility
+    # seconds spent waiting for a pooled connection, None if not measured
+    pool_wait: Optional[float]  # noqa: UP007 – Python <3.10 compatibility
+    # True for the second request of a hedged call
+    hedge: bool = False
+
+
+class MetricsSink(abc.ABC):
+    """
+    Receives a RequestSample for every attempt a client makes.
+
+    Pass sinks as metrics= to a client. record is called from the thread or task that sent the
+    request, once the response headers have been received or the attempt failed, so it must be
+    thread-safe and fast.
+    """
+
+    @abc.abstractmethod
+    def record(self, sample):
+        """Take the RequestSample of an attempt."""
+
+
+class Histogram:
+    """Prometheus-style histogram: count of observations per bucket upper bound, their sum and count."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """
+        :return: list of (upper bound, observations less than or equal to it), ending with +Inf
+        """
+        bounds = (*self.buckets, float("inf"))
+        total = 0
+        cumulative = []
+        for index, count in enumerate(self.counts):
+            total += count
+            cumulative.append((bounds[index], total))
+        return cumulative
+
+
+class EndpointMetrics:
+    """Metrics collected by MetricsRegistry for one method and endpoint family."""
+
+    def __init__(self, latency_buckets, pool_wait_buckets):
+        # status code, or "error" when no response was received, to number of attempts
+        self.responses = {}
+        self.latency = Histogram(latency_buckets)
+        self.pool_wait = Histogram(pool_wait_buckets)
+        self.retries = 0
+        self.hedges = 0
+        self.timeouts = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+
+class MetricsRegistry(MetricsSink):
+    """
+    In-memory MetricsSink aggregating samples per method and endpoint family.
+
+    render() exports the metrics in the Prometheus text format so they can be served from an
+    application's /metrics endpoint.
+
+    :param prefix: prefix of the exported metric names
+    :param latency_buckets: upper bounds, in seconds, of the request duration histogram
+    :param pool_wait_buckets: upper bounds, in seconds, of the connection pool wait histogram
+    """
+
+    def __init__(
+        self,
+        prefix="notifications_client",
+        latency_buckets=DEFAULT_LATENCY_BUCKETS,
+        pool_wait_buckets=DEFAULT_POOL_WAIT_BUCKETS,
+    ):
+        self.prefix = prefix
+        self.latency_buckets = latency_buckets
+        self.pool_wait_buckets = pool_wait_buckets
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, sample):
+        key = (sample.method, sample.family)
+        with self._lock:
+            metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = self._endpoints[key] = EndpointMetrics(self.latency_buckets, self.pool_wait_buckets)
+
+            status = sample.status_code if sample.status_code is not None else "error"
+            metrics.responses[status] = metrics.responses.get(status, 0) + 1
+            metrics.latency.observe(sample.duration)
+            if sample.pool_wait is not None:
+                metrics.pool_wait.observe(sample.pool_wait)
+            if sample.attempt > 1:
+                metrics.retries += 1
+            if sample.hedge:
+                metrics.hedges += 1
+            if sample.timed_out:
+                metrics.timeouts += 1
+            metrics.request_bytes += sample.request_bytes
+            metrics.response_bytes += sample.response_bytes or 0
+
+    def get(self, method, family):
+        """
+        :return: the EndpointMetrics of method and family, None if no request was recorded for them
+        """
+        return self._endpoints.get((method, family))
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def render(self):
+        """
+        :return: the metrics in the Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+
+            self._render_header(lines, "requests_total", "counter", "API call attempts by response status.")
+            for labels, metrics in self._labelled(endpoints):
+                for status, count in sorted(metrics.responses.items(), key=lambda item: str(item[0])):
+                    lines.append(f'{self.prefix}_requests_total{{{labels},status="{status}"}} {count}')
+
+            for name, help_text, attribute in (
+                ("retries_total", "Attempts that were retries.", "retries"),
+                ("hedges_total", "Attempts that were hedges of a slow request.", "hedges"),
+                ("timeouts_total", "Attempts that timed out.", "timeouts"),
+                ("request_bytes_total", "Request body bytes sent.", "request_bytes"),
+                ("response_bytes_total", "Response body bytes received.", "response_bytes"),
+            ):
+                self._render_header(lines, name, "counter", help_text)
+                for labels, metrics in self._labelled(endpoints):
+                    lines.append(f"{self.prefix}_{name}{{{labels}}} {getattr(metrics, attribute)}")
+
+            for name, help_text, attribute in (
+                ("request_duration_seconds", "Time until the response headers were received.", "latency"),
+                ("pool_wait_seconds", "Time spent waiting for a pooled connection.", "pool_wait"),
+            ):
+                self._render_header(lines, name, "histogram", help_text)
+                for labels, metrics in self._labelled(endpoints):
+                    self._render_histogram(lines, f"{self.prefix}_{name}", labels, getattr(metrics, attribute))
+
+        return "\n".join(lines) + "\n"
+
+    def _render_header(self, lines, name, metric_type, help_text):
+        lines.append(f"# HELP {self.prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {self.prefix}_{name} {metric_type}")
+
+    @staticmethod
+    def _labelled(endpoints):
+        for (method, family), metrics in endpoints:
+            yield f'method="{method}",family="{family}"', metrics
+
+    @staticmethod
+    def _render_histogram(lines, name, labels, histogram):
+        for bound, count in histogram.cumulative_counts():
+            lines.append(f'{name}_bucket{{{labels},le="{_format_bound(bound)}"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
@@ -1,14 +1,39 @@
+import functools
+import inspect
+import itertools
 import logging
 import re
 
 from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.batch import SendResult, bounded_map
+from notifications_python_client.bulk import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_ROWS,
+    BulkChunkResult,
+    BulkResult,
+    bulk_chunks,
+)
+from notifications_python_client.errors import APIError
+from notifications_python_client.idempotency import idempotency_key_for, new_idempotency_key
+from notifications_python_client.timeouts import Deadline, within
 
 logger = logging.getLogger(__name__)
 
+NOTIFICATION_ID_RE = re.compile("[0-F]{8}-[0-F]{4}-[0-F]{4}-[0-F]{4}-[0-F]{12}", re.I)
+
+
+def older_than_from_next_link(next_link):
+    """
+    Extrait l'ID de notification du lien "next" d'une page de notifications.
+    :param next_link: Lien vers la page suivante.
+    :return: Valeur du paramètre older_than pour la page suivante.
+    """
+    return NOTIFICATION_ID_RE.search(next_link).group(0)
+
 
 class NotificationsAPIClient(BaseAPIClient):
     def send_sms_notification(
-        self, phone_number, template_id, personalisation=None, reference=None, sms_sender_id=None
+        self, phone_number, template_id, personalisation=None, reference=None, sms_sender_id=None, idempotency_key=None
     ):
         """
         Envoie d'une notification de type SMS.
@@ -17,6 +42,9 @@ class NotificationsAPIClient(BaseAPIClient):
         :param personalisation: (optionnel) Données de personnalisation pour le gabarit.
         :param reference: (optionnel) Référence unique pour identifier la notification.
         :param sms_sender_id: (optionnel) ID de l'expéditeur du SMS.
+        :param idempotency_key: (optionnel) Clé d'idempotence envoyée dans l'en-tête Idempotency-Key,
+            qui permet de réessayer l'envoi sans doublon. Avec un IdempotencyStore, elle est par défaut
+            dérivée de reference et du contenu de la notification, ou générée pour l'appel.
         :return: Résultat de l'appel API POST.
         """
         notification = {
@@ -26,7 +54,11 @@ class NotificationsAPIClient(BaseAPIClient):
             **({"reference": reference} if reference else {}),
             **({"sms_sender_id": sms_sender_id} if sms_sender_id else {}),
         }
-        return self.post("/v2/notifications/sms", data=notification)
+        return self.post(
+            "/v2/notifications/sms",
+            data=notification,
+            idempotency_key=self._idempotency_key("sms", notification, reference, idempotency_key),
+        )
 
     def send_email_notification(
         self,
@@ -38,6 +70,7 @@ class NotificationsAPIClient(BaseAPIClient):
         scheduled_for=None,
         importance=None,
         cc_address=None,
+        idempotency_key=None,
     ):
         """
         Envoie d'une notification de type email.
@@ -49,6 +82,9 @@ class NotificationsAPIClient(BaseAPIClient):
         :param scheduled_for: (optionnel) Date d'envoi programmé.
         :param importance: (optionnel) Niveau d'importance ("high", "normal", "low").
         :param cc_address: (optionnel) L'adresse courriel en copie.
+        :param idempotency_key: (optionnel) Clé d'idempotence envoyée dans l'en-tête Idempotency-Key,
+            qui permet de réessayer l'envoi sans doublon. Avec un IdempotencyStore, elle est par défaut
+            dérivée de reference et du contenu de la notification, ou générée pour l'appel.
         :return: Résultat de l'appel API POST.
         """
 
@@ -70,7 +106,11 @@ class NotificationsAPIClient(BaseAPIClient):
         if cc_address:
             notification.update({"cc_address": cc_address})
 
-        return self.post("/v2/notifications/email", data=notification)
+        return self.post(
+            "/v2/notifications/email",
+            data=notification,
+            idempotency_key=self._idempotency_key("email", notification, reference, idempotency_key),
+        )
 
     def send_bulk_notifications(
         self, template_id, name, rows=None, csv=None, reference=None, scheduled_for=None, reply_to_id=None
@@ -104,6 +144,118 @@ class NotificationsAPIClient(BaseAPIClient):
 
         return self.post("/v2/notifications/bulk", data=data)
 
+    def send_bulk_notifications_chunked(
+        self,
+        template_id,
+        name,
+        rows=None,
+        csv_file=None,
+        reference=None,
+        scheduled_for=None,
+        reply_to_id=None,
+        max_rows=DEFAULT_MAX_ROWS,
+        max_bytes=DEFAULT_MAX_BYTES,
+        concurrency=4,
+    ):
+        """
+        Envoie de notifications en masse de taille quelconque, découpées en plusieurs envois en masse.
+        Les données sont lues au fur et à mesure : seuls les lots en cours d'envoi sont en mémoire.
+        :param template_id: ID du gabarit utilisé pour les notifications.
+        :param name: Nom de l'envoi en masse ; chaque lot reçoit le suffixe " - 1", " - 2", etc.
+        :param rows: (optionnel) Itérable, ou générateur, des lignes de données. La première ligne
+                     contient les en-têtes, répétés dans chaque lot.
+        :param csv_file: (optionnel) Chemin, ou flux texte ou binaire, d'un fichier CSV dont la première
+                         ligne contient les en-têtes, répétés dans chaque lot.
+        :param reference: (optionnel) Référence de l'envoi en masse ; chaque lot reçoit le suffixe
+                          "-1", "-2", etc.
+        :param scheduled_for: (optionnel) Date et heure de planification de l'envoi (format ISO 8601).
+        :param reply_to_id: (optionnel) ID de l'adresse de réponse.
+        :param max_rows: (optionnel) Nombre maximal de lignes de données par lot.
+        :param max_bytes: (optionnel) Taille maximale en octets des données d'un lot.
+        :param concurrency: (optionnel) Nombre de lots envoyés simultanément.
+        :return: BulkResult contenant un BulkChunkResult par lot, dans l'ordre des données, avec la
+            réponse ou l'APIError de son envoi ; job_ids donne les IDs des envois créés. Si les données
+            ne peuvent pas être lues ou découpées (CSV invalide, ligne plus grande que max_bytes), la
+            lecture s'arrête et le dernier BulkChunkResult porte l'erreur (ValueError ou csv.Error),
+            sans que les envois déjà créés ne soient perdus.
+        """
+        if rows is None and csv_file is None:
+            raise ValueError("Vous devez fournir soit 'rows', soit 'csv_file'.")
+        if rows is not None and csv_file is not None:
+            raise ValueError("Vous ne pouvez pas fournir à la fois 'rows' et 'csv_file'.")
+
+        chunks = bulk_chunks(name, reference, rows, csv_file, max_rows, max_bytes)
+        send = functools.partial(self._send_bulk_chunk, template_id, scheduled_for, reply_to_id)
+        # a chunk can be large, so only the chunks being sent are read ahead
+        return BulkResult(list(bounded_map(send, chunks, concurrency, True, concurrency, "notifications-bulk")))
+
+    def _send_bulk_chunk(self, template_id, scheduled_for, reply_to_id, index, chunk):
+        if chunk.error is not None:
+            return BulkChunkResult(chunk.index, chunk.name, chunk.reference, chunk.count, None, chunk.error)
+        try:
+            response = self._create_bulk_job(template_id, scheduled_for, reply_to_id, chunk)
+        except APIError as e:
+            return BulkChunkResult(chunk.index, chunk.name, chunk.reference, chunk.count, None, e)
+        return BulkChunkResult(chunk.index, chunk.name, chunk.reference, chunk.count, response, None)
+
+    def _create_bulk_job(self, template_id, scheduled_for, reply_to_id, chunk):
+        logger.debug("Creating bulk job %s with %d rows", chunk.name, chunk.count)
+        return self.send_bulk_notifications(
+            template_id,
+            chunk.name,
+            rows=chunk.rows,
+            csv=chunk.csv,
+            reference=chunk.reference,
+            scheduled_for=scheduled_for,
+            reply_to_id=reply_to_id,
+        )
+
+    def send_many(self, items, concurrency=10, ordered=True, window=None):
+        """
+        Envoie des notifications SMS et courriel en parallèle.
+        :param items: Itérable, ou générateur, de dictionnaires contenant les arguments de
+            send_sms_notification (avec phone_number) ou de send_email_notification (avec
+            email_address). Il est lu au fur et à mesure des envois.
+        :param concurrency: (optionnel) Nombre d'envois simultanés. Pour que les connexions soient
+            réutilisées, pool_maxsize doit être au moins égal.
+        :param ordered: (optionnel) Produire les résultats dans l'ordre des items plutôt qu'au fur
+            et à mesure des réponses.
+        :param window: (optionnel) Nombre maximal d'items lus en avance sur les résultats produits,
+            le double de concurrency par défaut.
+        :yield: Un SendResult par item, avec la réponse ou l'erreur de l'envoi (APIError, ou
+            ValueError pour un item invalide) ; une erreur n'interrompt pas les autres envois.
+        """
+        return bounded_map(self._send_item, items, concurrency, ordered, window, "notifications-send")
+
+    def _send_item(self, index, item):
+        try:
+            response = self._send_notification(item)
+        except (APIError, ValueError) as e:
+            return SendResult(index, item, None, e)
+        return SendResult(index, item, response, None)
+
+    def _send_notification(self, item):
+        if "phone_number" in item:
+            send = self.send_sms_notification
+        elif "email_address" in item:
+            send = self.send_email_notification
+        else:
+            raise ValueError("Chaque item doit contenir 'phone_number' ou 'email_address'.")
+        # a missing or unknown argument is an invalid item, not a TypeError ending every other send
+        try:
+            inspect.signature(send).bind(**item)
+        except TypeError as e:
+            raise ValueError(f"Item invalide pour {send.__name__} : {e}") from e
+        return send(**item)
+
+    def _idempotency_key(self, notification_type, notification, reference, idempotency_key):
+        if idempotency_key is not None or self.idempotency is None:
+            return idempotency_key
+        if reference:
+            return idempotency_key_for(self.service_id, notification_type, reference, notification)
+        # without a reference, the key only makes the retries of this call safe
+        return new_idempotency_key()
+
     def get_notification_by_id(self, id):
         """
         Récupère les détails d'une notification spécifique par son ID.
@@ -112,7 +264,7 @@ class NotificationsAPIClient(BaseAPIClient):
         """
         return self.get(f"/v2/notifications/{id}")
 
-    def get_all_notifications(self, status=None, template_type=None, reference=None, older_than=None):
+    def get_all_notifications(self, status=None, template_type=None, reference=None, older_than=None, stream=False):
         """
         Récupère toutes les notifications avec des filtres optionnels.
         :param status: Filtrer par statut de notification.
@@ -120,7 +272,8 @@ class NotificationsAPIClient(BaseAPIClient):
         :param reference: Filtrer par référence unique.
         :param older_than: Récupérer les notifications plus anciennes qu'un ID donné.
         :param include_jobs: Inclure les notifications liées aux jobs.
-        :return: Liste des notifications.
+        :param stream: (optionnel) Analyser les notifications au fur et à mesure de leur réception.
+        :return: Liste des notifications, ou StreamedPage à parcourir si stream est vrai.
         """
         params = {}
         if status:
@@ -132,26 +285,68 @@ class NotificationsAPIClient(BaseAPIClient):
         if older_than:
             params["older_than"] = older_than
 
+        if stream:
+            return self.get_stream("/v2/notifications", "notifications", params=params)
         return self.get("/v2/notifications", params=params)
 
-    def get_all_notifications_iterator(self, status=None, template_type=None, reference=None, older_than=None):
+    def get_all_notifications_iterator(
+        self, status=None, template_type=None, reference=None, older_than=None, stream=False, deadline=None
+    ):
         """
         Itère sur toutes les notifications en paginant automatiquement.
         :param status: Filtrer par statut de notification.
         :param template_type: Filtrer par type de gabarit ('email', 'sms').
         :param reference: Filtrer par référence unique.
         :param older_than: Récupérer les notifications plus anciennes qu'un ID donné.
+        :param stream: (optionnel) Produire chaque notification dès sa réception plutôt qu'après
+            le téléchargement de la page entière.
+        :param deadline: (optionnel) Secondes allouées à l'ensemble de l'itération, à partir de la
+            première page. Chaque page n'obtient que le temps restant ; DeadlineExceededError est levée
+            une fois ce délai écoulé.
         :yield: Une notification à la fois.
         """
-        result = self.get_all_notifications(status, template_type, reference, older_than)
+        operation = Deadline(deadline) if deadline is not None else None
+        if stream:
+            yield from self._stream_all_notifications(status, template_type, reference, older_than, operation)
+            return
+
+        page_number = 1
+        result = self._get_notifications_page(
+            page_number, status, template_type, reference, older_than, deadline=operation
+        )
         notifications = result.get("notifications")
         while notifications:
             yield from notifications
-            next_link = result["links"].get("next")
-            notification_id = re.search("[0-F]{8}-[0-F]{4}-[0-F]{4}-[0-F]{4}-[0-F]{12}", next_link, re.I).group(0)
-            result = self.get_all_notifications(status, template_type, reference, notification_id)
+            notification_id = older_than_from_next_link(result["links"].get("next"))
+            page_number += 1
+            result = self._get_notifications_page(
+                page_number, status, template_type, reference, notification_id, deadline=operation
+            )
             notifications = result.get("notifications")
 
+    def _get_notifications_page(
+        self, page_number, status, template_type, reference, older_than, stream=False, deadline=None
+    ):
+        with self._trace("notifications.page", {"notifications.page": page_number}) as span, within(deadline):
+            result = self.get_all_notifications(status, template_type, reference, older_than, stream=stream)
+            if span is not None and not stream:
+                span.set_attribute("notifications.count", len(result.get("notifications") or ()))
+            return result
+
+    def _stream_all_notifications(self, status, template_type, reference, older_than, deadline=None):
+        for page_number in itertools.count(1):
+            page = self._get_notifications_page(
+                page_number, status, template_type, reference, older_than, True, deadline
+            )
+            with page:
+                received = 0
+                for notification in page:
+                    received += 1
+                    yield notification
+                if not received:
+                    return
+                older_than = older_than_from_next_link(page.get("links").get("next"))
+
     def post_template_preview(self, template_id, personalisation):
         """
         Génère un aperçu d'un gabarit avec des données de personnalisation.
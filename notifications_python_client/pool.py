@@ -0,0 +1,145 @@
+import socket
+import threading
+import time
+import weakref
+from typing import NamedTuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import PoolManager
+
+
+class PoolStats(NamedTuple):
+    """Snapshot of the connections managed by a PooledHTTPAdapter."""
+
+    in_use: int
+    idle: int
+    created: int
+    discarded: int
+
+
+class _PoolCounters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.created = 0
+        self.in_use = 0
+        self.pools = weakref.WeakSet()
+        # seconds the calling thread last waited for a connection
+        self.local = threading.local()
+
+
+class _InstrumentedPoolMixin:
+    counters = None
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        with self.counters.lock:
+            self.counters.created += 1
+        return conn
+
+    def _get_conn(self, timeout=None):
+        start_time = time.monotonic()
+        conn = super()._get_conn(timeout=timeout)
+        self.counters.local.pool_wait = time.monotonic() - start_time
+        with self.counters.lock:
+            self.counters.in_use += 1
+        return conn
+
+    def _put_conn(self, conn):
+        with self.counters.lock:
+            self.counters.in_use -= 1
+        super()._put_conn(conn)
+
+    def idle_connections(self):
+        pool = self.pool
+        if pool is None:
+            return 0
+        return sum(1 for conn in list(pool.queue) if conn is not None)
+
+
+class InstrumentedHTTPConnectionPool(_InstrumentedPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class InstrumentedHTTPSConnectionPool(_InstrumentedPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _InstrumentedPoolManager(PoolManager):
+    def __init__(self, counters, **kwargs):
+        super().__init__(**kwargs)
+        self.counters = counters
+        self.pool_classes_by_scheme = {
+            "http": InstrumentedHTTPConnectionPool,
+            "https": InstrumentedHTTPSConnectionPool,
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.counters = self.counters
+        self.counters.pools.add(pool)
+        return pool
+
+
+def keepalive_socket_options(idle):
+    """
+    Socket options enabling TCP keep-alive probes after `idle` seconds without traffic,
+    so that idle pooled connections are not silently dropped by NATs and load balancers.
+    """
+    options = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, idle))
+    return options
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connection pools keep count of the connections they hand out.
+
+    :param pool_maxsize: connections kept open per host
+    :param pool_block: wait for a free connection instead of opening one that will be discarded
+    :param max_retries: connection-level retries done by urllib3
+    :param tcp_keepalive: seconds of inactivity before TCP keep-alive probes are sent, None to disable
+    """
+
+    def __init__(self, pool_maxsize=10, pool_block=False, max_retries=0, tcp_keepalive=None):
+        self._counters = _PoolCounters()
+        self._tcp_keepalive = tcp_keepalive
+        super().__init__(pool_maxsize=pool_maxsize, pool_block=pool_block, max_retries=max_retries)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+
+        if self._tcp_keepalive is not None:
+            pool_kwargs.setdefault("socket_options", keepalive_socket_options(self._tcp_keepalive))
+
+        self.poolmanager = _InstrumentedPoolManager(
+            self._counters, num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs
+        )
+
+    def pop_pool_wait(self):
+        """
+        :return: seconds the calling thread waited for a connection for its last request, None if it has
+            not taken a connection since the previous call
+        """
+        local = self._counters.local
+        pool_wait = getattr(local, "pool_wait", None)
+        local.pool_wait = None
+        return pool_wait
+
+    def stats(self):
+        """
+        :return: PoolStats across all hosts; connections that were closed because the pool was
+            full, the server dropped them or their pool was evicted count as discarded
+        """
+        counters = self._counters
+        with counters.lock:
+            created = counters.created
+            in_use = counters.in_use
+            idle = sum(pool.idle_connections() for pool in list(counters.pools))
+        return PoolStats(in_use=in_use, idle=idle, created=created, discarded=created - in_use - idle)
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+
+from notifications_python_client.errors import DeadlineExceededError
+from notifications_python_client.retry import parse_retry_after
+from notifications_python_client.timeouts import current_deadline
+
+# values above this are epoch timestamps rather than delays
+_EPOCH_THRESHOLD = 1_000_000_000
+
+
+class TokenBucket:
+    """
+    Token bucket from which each request reserves one token.
+
+    A reservation may take the bucket below zero; the caller then waits until the tokens it
+    borrowed have been refilled, which spaces requests out evenly instead of letting them
+    through in bursts. Safe to share between threads and event loops.
+
+    The refill rate adapts to the server: it is halved on every 429 response, down to
+    min_rate, and climbs back towards rate by a twentieth of it on every successful response.
+
+    :param rate: tokens refilled per second
+    :param burst: tokens that can accumulate while idle
+    :param min_rate: lowest rate the bucket slows down to
+    """
+
+    def __init__(self, rate, burst=1, min_rate=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.current_rate = rate
+
+        self._lock = threading.Lock()
+        self._tokens = burst
+        # tokens accrue from this time; it is moved to the future to pause the bucket
+        self._updated_at = time.monotonic()
+
+    def reserve(self):
+        """
+        Take one token.
+
+        :return: seconds the caller must wait before sending its request
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(0.0, self._updated_at - now)
+            if self._tokens < 0:
+                wait += -self._tokens / self.current_rate
+            return wait
+
+    def refund(self):
+        """Give back a token taken by reserve for a request that will not be sent."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for the given number of seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0)
+            self._updated_at = max(self._updated_at, now + seconds)
+
+    def slow_down(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.current_rate = max(self.min_rate, self.current_rate / 2)
+
+    def speed_up(self):
+        with self._lock:
+            if self.current_rate < self.rate:
+                self._refill(time.monotonic())
+                self.current_rate = min(self.rate, self.current_rate + self.rate / 20)
+
+    def _refill(self, now):
+        if now > self._updated_at:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.current_rate)
+            self._updated_at = now
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter with one token bucket per endpoint family.
+
+    Requests are smoothed to headroom times the configured limits, so that sends stay just under
+    the API limits instead of hitting them. Buckets slow down on 429 responses and pause for
+    their Retry-After, or until the reset announced by RateLimit headers once none remain.
+    One limiter can be shared by several clients, threads and asyncio tasks.
+
+    :param limits: mapping of endpoint family (see endpoints.py) to requests per second; families
+        without a limit are not throttled
+    :param headroom: fraction of each limit actually used
+    :param burst: requests a family can send at once after being idle
+    """
+
+    def __init__(self, limits, headroom=0.9, burst=1):
+        if not 0 < headroom <= 1:
+            raise ValueError("headroom must be between 0 and 1")
+        self.buckets = {family: TokenBucket(rate * headroom, burst=burst) for family, rate in limits.items()}
+
+    def acquire(self, family):
+        """
+        Block until a request of this family can be sent.
+
+        :raises DeadlineExceededError: without waiting, if the request could not be sent before the deadline
+            of the current operation
+        """
+        wait = self._reserve_within_deadline(family)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, family):
+        """
+        Wait, without blocking the event loop, until a request of this family can be sent.
+
+        :raises DeadlineExceededError: without waiting, if the request could not be sent before the deadline
+            of the current operation
+        """
+        wait = self._reserve_within_deadline(family)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def _reserve_within_deadline(self, family):
+        deadline = current_deadline()
+        if deadline is None:
+            return self.reserve(family)
+        if deadline.expired:
+            raise DeadlineExceededError(deadline.seconds)
+        wait = self.reserve(family)
+        if wait and wait >= deadline.remaining():
+            # no request will use the token
+            self.buckets[family].refund()
+            raise DeadlineExceededError(deadline.seconds)
+        return wait
+
+    def reserve(self, family):
+        """
+        :return: seconds to wait before sending a request of this family
+        """
+        bucket = self.buckets.get(family)
+        return bucket.reserve() if bucket is not None else 0.0
+
+    def on_response(self, family, status_code, headers):
+        """
+        Adapt the family's bucket to a response from the API.
+
+        :param status_code: HTTP status, or None if no response was received
+        :param headers: response headers
+        """
+        bucket = self.buckets.get(family)
+        if bucket is None or status_code is None:
+            return
+
+        if status_code == 429:
+            bucket.slow_down()
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = _rate_limit_reset(headers)
+            if retry_after:
+                bucket.pause(retry_after)
+            return
+
+        remaining = headers.get("RateLimit-Remaining", headers.get("X-RateLimit-Remaining"))
+        if remaining is not None and remaining.strip() == "0":
+            reset = _rate_limit_reset(headers)
+            if reset:
+                bucket.pause(reset)
+        elif status_code < 400:
+            bucket.speed_up()
+
+
+def _rate_limit_reset(headers):
+    value = headers.get("RateLimit-Reset", headers.get("X-RateLimit-Reset"))
+    try:
+        reset = float(value)
+    except (TypeError, ValueError):
+        return None
+    if reset > _EPOCH_THRESHOLD:
+        reset -= time.time()
+    return max(0.0, reset)
@@ -0,0 +1,138 @@
+import email.utils
+import random
+import threading
+import time
+from typing import NamedTuple
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class RetryStats(NamedTuple):
+    """Counters kept by a RetryPolicy."""
+
+    retries: int
+    exhausted: int
+
+
+def parse_retry_after(value, now=None):
+    """
+    :param value: Retry-After header, either delay-seconds or an HTTP-date
+    :return: seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - (time.time() if now is None else now))
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed request is retried and how long to wait first.
+
+    429 and 503 responses and connection errors are retried with exponential backoff and full
+    jitter: retry n waits a random time between 0 and min(backoff_cap, backoff_base * 2 ** n),
+    or the server's Retry-After if that is longer. POST requests are not retried unless
+    retry_non_idempotent is set, since the first attempt may have been processed, or
+    retry_idempotency_keys is set and they carry an idempotency key.
+
+    A policy can be shared between clients; its counters then cover all of them.
+
+    :param max_attempts: total number of attempts, including the first one
+    :param backoff_base: upper bound, in seconds, of the wait before the first retry
+    :param backoff_cap: upper bound, in seconds, of any computed wait
+    :param deadline: seconds after the first attempt past which no retry is started, None for no limit
+    :param retry_non_idempotent: also retry POST requests
+    :param retry_idempotency_keys: also retry POST requests carrying an Idempotency-Key header; only set
+        it for an API known to send a request with a key it has already processed only once
+    :param retry_status_codes: HTTP statuses worth retrying
+    """
+
+    def __init__(
+        self,
+        max_attempts=3,
+        backoff_base=0.5,
+        backoff_cap=30,
+        deadline=None,
+        retry_non_idempotent=False,
+        retry_status_codes=(429, 503),
+        retry_idempotency_keys=False,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.deadline = deadline
+        self.retry_non_idempotent = retry_non_idempotent
+        self.retry_idempotency_keys = retry_idempotency_keys
+        self.retry_status_codes = frozenset(retry_status_codes)
+
+        self._lock = threading.Lock()
+        self._retries = 0
+        self._exhausted = 0
+
+    def stats(self):
+        with self._lock:
+            return RetryStats(retries=self._retries, exhausted=self._exhausted)
+
+    def is_retryable(self, method, error, idempotent=False):
+        """
+        :param method: HTTP method of the failed request
+        :param error: the APIError raised for it
+        :param idempotent: the request carries an idempotency key, so it can be sent again whatever its method
+            if retry_idempotency_keys is set
+        """
+        retried = (
+            method.upper() in IDEMPOTENT_METHODS
+            or self.retry_non_idempotent
+            or (idempotent and self.retry_idempotency_keys)
+        )
+        if not retried:
+            return False
+        # connection errors and timeouts have no response
+        return error.response is None or error.status_code in self.retry_status_codes
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        :param attempt: number of attempts made so far
+        :param retry_after: delay requested by the server, in seconds
+        :return: seconds to wait before the next attempt
+        """
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def next_delay(self, method, error, attempt, started_at, time_left=None, idempotent=False):
+        """
+        :param attempt: number of attempts made so far
+        :param started_at: time.monotonic() of the first attempt
+        :param time_left: seconds left before the Deadline of the operation, None if it has none
+        :param idempotent: the request carries an idempotency key
+        :return: seconds to wait before retrying, or None if the error should be raised
+        """
+        if not self.is_retryable(method, error, idempotent):
+            return None
+
+        delay = self.backoff(attempt, retry_after=self._retry_after(error))
+        out_of_time = (self.deadline is not None and time.monotonic() + delay - started_at > self.deadline) or (
+            time_left is not None and delay >= time_left
+        )
+        with self._lock:
+            if attempt >= self.max_attempts or out_of_time:
+                self._exhausted += 1
+                return None
+            self._retries += 1
+        return delay
+
+    @staticmethod
+    def _retry_after(error):
+        headers = getattr(error.response, "headers", None)
+        return parse_retry_after(headers.get("Retry-After")) if headers is not None else None
@@ -0,0 +1,266 @@
+import codecs
+import json
+import re
+
+from notifications_python_client.errors import InvalidResponse
+
+_WHITESPACE = " \t\n\r"
+# characters that can continue a number, like the "5" of a "1.5" split into "1." and "5"
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+# parser states
+_START = "start"
+_FIRST_KEY = "first key"
+_KEY = "key"
+_NEXT_KEY = "next key"
+_COLON = "colon"
+_VALUE = "value"
+_FIRST_ITEM = "first item"
+_ITEM = "item"
+_NEXT_ITEM = "next item"
+_DONE = "done"
+_ITEM_STATES = (_FIRST_ITEM, _ITEM, _NEXT_ITEM)
+
+# results of a parser step other than an array element
+_NEED_MORE = object()
+_CONTINUE = object()
+
+
+class StreamingJSONParser:
+    """
+    Incremental parser for a JSON object holding one potentially large array.
+
+    Bytes are fed as they arrive and each element of the `items_key` array is yielded as soon as
+    it has been fully received, so only the element being parsed is held in memory. The other
+    members of the object, such as links, are collected in `fields`.
+    """
+
+    def __init__(self, items_key):
+        self.items_key = items_key
+        self.fields = {}
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._scanner = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = _START
+        self._key = None
+
+    @property
+    def done(self):
+        return self._state == _DONE
+
+    def feed(self, chunk):
+        """
+        :param chunk: next bytes of the document
+        :return: iterator over the array elements completed by this chunk
+        :raises ValueError: if the document is not valid JSON
+        """
+        self._append(self._decoder.decode(chunk))
+        return self._parse(final=False)
+
+    def close(self):
+        """
+        Signal the end of the document.
+
+        :return: iterator over the remaining array elements
+        :raises ValueError: if the document is incomplete or not valid JSON
+        """
+        self._append(self._decoder.decode(b"", final=True))
+        yield from self._parse(final=True)
+        if self._state != _DONE:
+            raise ValueError("Incomplete JSON document")
+        if self._buffer[self._pos :].strip(_WHITESPACE):
+            raise ValueError("Extra data after JSON document")
+
+    def _append(self, text):
+        self._buffer = self._buffer[self._pos :] + text
+        self._pos = 0
+
+    def _next_char(self):
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return buffer[pos] if pos < len(buffer) else None
+
+    def _expect(self, char, expected):
+        if char not in expected:
+            raise ValueError(f"Expecting one of {expected!r} at position {self._pos}, got {char!r}")
+        self._pos += 1
+
+    def _decode_value(self, final):
+        """
+        :return: (True, value) once a whole value is buffered, (False, None) if more data is needed
+        """
+        try:
+            value, end = self._scanner.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False, None
+        # a number at the end of the buffer may continue in the next chunk, even after a "." or an "e"
+        if not final and (
+            end == len(self._buffer) or type(value) in (int, float) and _NUMBER_TAIL.fullmatch(self._buffer, end)
+        ):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _parse(self, final):
+        while self._state != _DONE:
+            char = self._next_char()
+            if char is None:
+                return
+            step = self._step_items if self._state in _ITEM_STATES else self._step_object
+            result = step(char, final)
+            if result is _NEED_MORE:
+                return
+            if result is not _CONTINUE:
+                yield result
+
+    def _step_object(self, char, final):
+        state = self._state
+        if state == _START:
+            self._expect(char, "{")
+            self._state = _FIRST_KEY
+        elif state == _FIRST_KEY and char == "}" or state == _NEXT_KEY:
+            self._expect(char, ",}")
+            self._state = _KEY if char == "," else _DONE
+        elif state in (_FIRST_KEY, _KEY):
+            if char != '"':
+                raise ValueError(f"Expecting property name at position {self._pos}")
+            complete, self._key = self._decode_value(final)
+            if not complete:
+                return _NEED_MORE
+            self._state = _COLON
+        elif state == _COLON:
+            self._expect(char, ":")
+            self._state = _VALUE
+        elif self._key == self.items_key and char == "[":
+            self._pos += 1
+            self._state = _FIRST_ITEM
+        else:
+            complete, value = self._decode_value(final)
+            if not complete:
+                return _NEED_MORE
+            self.fields[self._key] = value
+            self._state = _NEXT_KEY
+        return _CONTINUE
+
+    def _step_items(self, char, final):
+        if self._state == _FIRST_ITEM and char == "]" or self._state == _NEXT_ITEM:
+            self._expect(char, ",]")
+            self._state = _ITEM if char == "," else _NEXT_KEY
+            return _CONTINUE
+        complete, item = self._decode_value(final)
+        if not complete:
+            return _NEED_MORE
+        self._state = _NEXT_ITEM
+        return item
+
+
+class _StreamedPageBase:
+    def __init__(self, response, items_key):
+        self.response = response
+        self._parser = StreamingJSONParser(items_key)
+
+    def _invalid_response(self, error):
+        return InvalidResponse(self.response, message=f"No JSON response object could be decoded: {error}")
+
+
+class StreamedPage(_StreamedPageBase):
+    """
+    One page of a list response, parsed while it is downloaded.
+
+    Iterating over the page yields the elements of its list one at a time. The other members of
+    the response are available through get() once they have been received; for the notifications
+    endpoint links come after the list, so get("links") skips any element not iterated over yet.
+    The connection is released once the page has been read to the end or closed.
+
+    :param response: streamed requests.Response or httpx.Response
+    :param items_key: name of the list member to stream
+    :param chunk_size: number of bytes read from the connection at a time
+    """
+
+    def __init__(self, response, items_key, chunk_size=8192):
+        super().__init__(response, items_key)
+        chunks = (
+            response.iter_bytes(chunk_size) if hasattr(response, "iter_bytes") else response.iter_content(chunk_size)
+        )
+        self._items = self._iter_items(chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        return self._items
+
+    def close(self):
+        self._items.close()
+        self.response.close()
+
+    def get(self, key, default=None):
+        fields = self._parser.fields
+        if key not in fields:
+            for _ in self._items:
+                if key in fields:
+                    break
+        return fields.get(key, default)
+
+    def _iter_items(self, chunks):
+        try:
+            for chunk in chunks:
+                yield from self._parser.feed(chunk)
+            yield from self._parser.close()
+        except ValueError as e:
+            raise self._invalid_response(e) from e
+        finally:
+            self.response.close()
+
+
+class AsyncStreamedPage(_StreamedPageBase):
+    """
+    asyncio version of StreamedPage, reading a streamed httpx.Response.
+
+    Use `async for` to iterate over the elements and `await page.get(key)` for the other members.
+    """
+
+    def __init__(self, response, items_key):
+        super().__init__(response, items_key)
+        self._items = self._iter_items(response.aiter_bytes())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def __aiter__(self):
+        return self._items
+
+    async def aclose(self):
+        await self._items.aclose()
+        await self.response.aclose()
+
+    async def get(self, key, default=None):
+        fields = self._parser.fields
+        if key not in fields:
+            async for _ in self._items:
+                if key in fields:
+                    break
+        return fields.get(key, default)
+
+    async def _iter_items(self, chunks):
+        try:
+            async for chunk in chunks:
+                for item in self._parser.feed(chunk):
+                    yield item
+            for item in self._parser.close():
+                yield item
+        except ValueError as e:
+            raise self._invalid_response(e) from e
+        finally:
+            await self.response.aclose()
@@ -0,0 +1,128 @@
+import contextlib
+import contextvars
+import time
+
+# Deadline of the operation being run in the current context, None outside of any
+_current_deadline = contextvars.ContextVar("notifications_deadline", default=None)
+
+_UNSET = object()
+
+
+def _shortest(timeout, remaining):
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+class Timeout:
+    """
+    Seconds allowed for each phase of a request attempt, None for no limit.
+
+    Timeout(30, connect=3.05) allows 3.05 seconds to open a connection and 30 for each of the
+    other phases, like httpx.Timeout. The read and write timeouts bound each wait for the socket,
+    not the whole response.
+
+    :param timeout: limit of the phases not given
+    :param connect: opening a connection, including the TLS handshake
+    :param read: waiting for the next part of the response
+    :param write: sending the next part of the request; requests and urllib3 apply the read timeout instead
+    :param pool: waiting for a free pooled connection; only httpx applies it
+    """
+
+    def __init__(self, timeout=None, connect=_UNSET, read=_UNSET, write=_UNSET, pool=_UNSET):
+        self.connect = timeout if connect is _UNSET else connect
+        self.read = timeout if read is _UNSET else read
+        self.write = timeout if write is _UNSET else write
+        self.pool = timeout if pool is _UNSET else pool
+
+    @classmethod
+    def create(cls, timeout):
+        """
+        :param timeout: a Timeout, seconds for every phase, a (connect, read) tuple as accepted by
+            requests, or None for no limit
+        """
+        if isinstance(timeout, Timeout):
+            return timeout
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return cls(read, connect=connect)
+        return cls(timeout)
+
+    def clip(self, remaining):
+        """
+        :return: Timeout allowing each phase at most remaining seconds
+        """
+        return Timeout(
+            connect=_shortest(self.connect, remaining),
+            read=_shortest(self.read, remaining),
+            write=_shortest(self.write, remaining),
+            pool=_shortest(self.pool, remaining),
+        )
+
+    def _values(self):
+        return self.connect, self.read, self.write, self.pool
+
+    def __eq__(self, other):
+        if not isinstance(other, Timeout):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __repr__(self):
+        return f"Timeout(connect={self.connect}, read={self.read}, write={self.write}, pool={self.pool})"
+
+
+class Deadline:
+    """
+    Limits the time an operation may take, across all of its requests, retries and pages.
+
+    Within a `with Deadline(seconds):` block, every call made by a client, including from hedges
+    and asyncio tasks started in the block, gets only the time left: its connect, read and write
+    timeouts are shortened to it, no retry is started that could not finish in it, and a call
+    made once it has passed raises DeadlineExceededError without being sent. A deadline nested
+    in a longer one cannot extend it.
+
+    A Deadline can be entered several times, for example around each page of an iteration; its
+    time runs from its creation.
+
+    :param seconds: time allowed to the operation from now
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._tokens = []
+
+    def remaining(self):
+        """
+        :return: seconds left, zero or negative once the deadline has passed
+        """
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def __enter__(self):
+        current = _current_deadline.get()
+        # an enclosing deadline that expires first keeps applying
+        deadline = current if current is not None and current.expires_at <= self.expires_at else self
+        self._tokens.append(_current_deadline.set(deadline))
+        return self
+
+    def __exit__(self, *exc_info):
+        _current_deadline.reset(self._tokens.pop())
+
+
+def current_deadline():
+    """
+    :return: the Deadline applying to calls made in the current context, None if there is none
+    """
+    return _current_deadline.get()
+
+
+def within(deadline):
+    """
+    :return: context manager applying deadline, or doing nothing if it is None
+    """
+    return deadline if deadline is not None else contextlib.nullcontext()
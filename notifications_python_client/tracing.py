@@ -0,0 +1,148 @@
+import contextlib
+import contextvars
+import secrets
+import threading
+import time
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:  # pragma: no cover - exercised only without the optional dependency
+    propagate = trace = None
+
+from notifications_python_client import __version__
+
+_current_span = contextvars.ContextVar("notifications_python_client_span", default=None)
+
+
+class Span:
+    """
+    A timed operation recorded by Tracer.
+
+    Times are in nanoseconds since the epoch and ids are lowercase hex strings, as in W3C trace
+    context and OpenTelemetry.
+    """
+
+    def __init__(self, name, trace_id, parent_id=None, attributes=None, start_time=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = start_time if start_time is not None else time.time_ns()
+        self.end_time = None
+        self.error = None
+
+    def __repr__(self):
+        return f"<Span {self.name} {self.span_id} parent={self.parent_id}>"
+
+    @property
+    def duration(self):
+        """Seconds between the start and the end of the span, None while it is running."""
+        return None if self.end_time is None else (self.end_time - self.start_time) / 1e9
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception):
+        self.error = exception
+
+    def end(self, end_time=None):
+        self.end_time = end_time if end_time is not None else time.time_ns()
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans in memory, in the order they ended, so they can be inspected in tests."""
+
+    def __init__(self):
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self._spans.append(span)
+
+    def get_finished_spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+class Tracer:
+    """
+    Minimal tracer for applications that do not use OpenTelemetry.
+
+    Spans are nested through a context variable, so they follow threads and asyncio tasks, and
+    are passed to the exporter when they end.
+
+    :param exporter: object with an export(span) method, such as InMemorySpanExporter
+    """
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    @contextlib.contextmanager
+    def span(self, name, attributes=None):
+        span = self._child_span(name, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self.exporter.export(span)
+
+    def record_span(self, name, start_time, end_time, attributes=None):
+        """Record an operation that has already happened as a child of the current span."""
+        span = self._child_span(name, attributes)
+        span.start_time = start_time
+        span.end(end_time)
+        self.exporter.export(span)
+
+    @staticmethod
+    def _child_span(name, attributes):
+        parent = _current_span.get()
+        if parent is None:
+            return Span(name, secrets.token_hex(16), attributes=attributes)
+        return Span(name, parent.trace_id, parent.span_id, attributes)
+
+    def inject(self, headers):
+        """Add the traceparent header identifying the current span."""
+        span = _current_span.get()
+        if span is not None:
+            headers["traceparent"] = f"00-{span.trace_id}-{span.span_id}-01"
+
+
+class OpenTelemetryTracer:
+    """
+    Tracer sending spans to OpenTelemetry and propagating context with its configured propagators.
+
+    Requires opentelemetry-api (pip install notification-python-client[tracing]).
+
+    :param tracer_provider: TracerProvider to use, defaults to the global one
+    """
+
+    def __init__(self, tracer_provider=None):
+        if trace is None:
+            raise ImportError(
+                "OpenTelemetryTracer requires opentelemetry-api: pip install notification-python-client[tracing]"
+            )
+
+        self._tracer = trace.get_tracer(__name__, __version__, tracer_provider=tracer_provider)
+        self._inject = propagate.inject
+
+    @contextlib.contextmanager
+    def span(self, name, attributes=None):
+        with self._tracer.start_as_current_span(name, attributes=attributes) as span:
+            yield span
+
+    def record_span(self, name, start_time, end_time, attributes=None):
+        self._tracer.start_span(name, attributes=attributes, start_time=start_time).end(end_time=end_time)
+
+    def inject(self, headers):
+        self._inject(headers)
@@ -0,0 +1,210 @@
+import abc
+import json
+
+import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
+
+from notifications_python_client.timeouts import Timeout
+
+# bytes read from the connection at a time when a response body is streamed
+CHUNK_SIZE = 8192
+
+
+class TransportError(Exception):
+    """
+    Raised by a Transport when no response could be received, and by
+    TransportResponse.raise_for_status for error responses.
+
+    :param response: the TransportResponse, None if no response was received
+    """
+
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class TransportTimeout(TransportError):
+    """Raised by a Transport when connecting or waiting for the response timed out."""
+
+
+class TransportResponse:
+    """
+    Response returned by Transport.send, before its body has been read.
+
+    The body is read either all at once with content, or in chunks with iter_bytes; the
+    connection is released once it has been read to the end or the response is closed.
+
+    :param status_code: HTTP status code
+    :param headers: mapping of header names to values, looked up case-insensitively
+    :param stream: iterable of the body bytes, in chunks sized by the transport
+    :param close: callable releasing the connection, None if there is nothing to release
+    """
+
+    def __init__(self, status_code, headers, stream, close=None):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self._stream = stream
+        self._close = close
+        self._content = None
+        self._consumed = False
+
+    @property
+    def is_error(self):
+        return self.status_code >= 400
+
+    @property
+    def content(self):
+        if self._content is None:
+            if self._consumed:
+                raise RuntimeError("The response body has already been read with iter_bytes")
+            self._content = b"".join(self.iter_bytes())
+        return self._content
+
+    def read(self):
+        return self.content
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_bytes(self, chunk_size=None):
+        """
+        Iterate over the body as it is received. chunk_size is accepted for compatibility with
+        httpx.Response.iter_bytes; chunks are sized by the transport.
+        """
+        if self._content is not None:
+            yield self._content
+            return
+        self._consumed = True
+        try:
+            for chunk in self._stream:
+                if chunk:
+                    yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if self._close is not None:
+            close, self._close = self._close, None
+            # finish a body iterator that was not read to the end before the connection is released
+            if hasattr(self._stream, "close"):
+                self._stream.close()
+            close()
+
+    def raise_for_status(self):
+        if self.is_error:
+            raise TransportError(f"{self.status_code} error response", response=self)
+
+
+class Transport(abc.ABC):
+    """
+    Sends the HTTP requests of a client, in place of its requests.Session.
+
+    Pass an instance as transport= to BaseAPIClient. A transport is shared by every thread
+    using the client, so send must be thread-safe. Compressed response bodies are decoded by
+    the transport.
+    """
+
+    @abc.abstractmethod
+    def send(self, method, url, headers, body=None, timeout=None):
+        """
+        :param url: absolute URL, including the query string
+        :param headers: mapping of header names to values
+        :param body: request body bytes, None for no body
+        :param timeout: Timeout, or seconds allowed to each phase of the request, None for no limit
+        :return: TransportResponse, returned as soon as the response headers have been received
+        :raises TransportTimeout: if the request timed out
+        :raises TransportError: if no response was received
+        """
+
+    def close(self):  # noqa: B027 – optional, a transport without connections has nothing to close
+        """Close the connections of the transport."""
+
+
+class RequestsTransport(Transport):
+    """
+    Transport sending requests through a requests.Session.
+
+    :param session: the session to use, a new one by default
+    """
+
+    def __init__(self, session=None):
+        self.session = session if session is not None else requests.Session()
+
+    def send(self, method, url, headers, body=None, timeout=None):
+        try:
+            timeout = Timeout.create(timeout)
+            response = self.session.request(
+                method, url, headers=headers, data=body, timeout=(timeout.connect, timeout.read), stream=True
+            )
+        except requests.Timeout as e:
+            raise TransportTimeout(str(e)) from e
+        except requests.RequestException as e:
+            raise TransportError(str(e)) from e
+        return TransportResponse(
+            response.status_code, response.headers, response.iter_content(CHUNK_SIZE), close=response.close
+        )
+
+    def close(self):
+        self.session.close()
+
+
+class Urllib3Transport(Transport):
+    """
+    Transport sending requests through a urllib3.PoolManager, without the request and response
+    processing requests adds on top of it.
+
+    :param pool_maxsize: maximum number of connections kept open to each host
+    :param pool_block: wait for a free connection when pool_maxsize connections are in use,
+        instead of opening one that is discarded after the request
+    """
+
+    def __init__(self, pool_maxsize=10, pool_block=False):
+        self.pool_manager = urllib3.PoolManager(maxsize=pool_maxsize, block=pool_block, retries=False)
+        # offer every encoding urllib3 can decode, as requests does
+        self._default_headers = urllib3.util.make_headers(accept_encoding=True)
+
+    def send(self, method, url, headers, body=None, timeout=None):
+        request_headers = CaseInsensitiveDict(self._default_headers)
+        request_headers.update(headers)
+        timeout = Timeout.create(timeout)
+        try:
+            response = self.pool_manager.request(
+                method,
+                url,
+                body=body,
+                headers=dict(request_headers),
+                timeout=urllib3.Timeout(connect=timeout.connect, read=timeout.read),
+                redirect=True,
+                preload_content=False,
+            )
+        except urllib3.exceptions.NewConnectionError as e:
+            # raised when the connection is refused, despite subclassing ConnectTimeoutError
+            raise TransportError(str(e)) from e
+        except urllib3.exceptions.TimeoutError as e:
+            raise TransportTimeout(str(e)) from e
+        except urllib3.exceptions.HTTPError as e:
+            raise TransportError(str(e)) from e
+        return TransportResponse(
+            response.status, response.headers, response.stream(CHUNK_SIZE), close=response.release_conn
+        )
+
+    def close(self):
+        self.pool_manager.clear()
+
+
+class InProcessTransport(Transport):
+    """
+    Transport answering requests with a function instead of sending them, to fake the API in
+    tests or measure the client without a network.
+
+    :param handler: called with (method, url, headers, body) and returning a
+        (status_code, headers, body bytes) tuple
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+
+    def send(self, method, url, headers, body=None, timeout=None):
+        status_code, response_headers, response_body = self.handler(method, url, dict(headers), body)
+        return TransportResponse(status_code, response_headers, (response_body,))
@@ -61,6 +61,13 @@ setup(
         "PyJWT>=1.5.1",
         "docopt>=0.3.0",
     ],
+    extras_require={
+        "async": ["httpx>=0.23.0"],
+        "fastjson": ["orjson>=3.6"],
+        "compression": ["zstandard>=0.18.0", "brotli>=1.0.9"],
+        "tracing": ["opentelemetry-api>=1.0.0"],
+        "http2": ["httpx[http2]>=0.23.0"],
+    },
     # for running pytest as `python setup.py test`, see
     # http://doc.pytest.org/en/latest/goodpractices.html#integrating-with-setuptools-python-setup-py-test-pytest-runner
     setup_requires=["pytest-runner"],
@@ -1,9 +1,17 @@
+import asyncio
+import gzip
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import mock
 
 import pytest
+import requests
 import requests_mock
 
 from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.errors import HTTPError
 from notifications_python_client.notifications import NotificationsAPIClient
 
 TEST_HOST = "http://test-host"
@@ -13,6 +21,42 @@ COMBINED_API_KEY = f"key_name-{SERVICE_ID}-{API_KEY_ID}"
 CLIENT_ID = "bf5ed2049c2be1a478145c689e14fecb"
 
 
+def make_client(base_url=TEST_HOST, **kwargs):
+    return NotificationsAPIClient(base_url=base_url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, **kwargs)
+
+
+def http_error(status_code=None, headers=None):
+    """HTTPError of a response with status_code and headers, or of a connection error without status_code."""
+    if status_code is None:
+        return HTTPError.create(requests.ConnectionError())
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return HTTPError.create(requests.HTTPError(response=response))
+
+
+class FakeClock:
+    """Stands in for time.monotonic, only moving when `now` is changed."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """
+    Freezes time.monotonic at a FakeClock.
+
+    The asyncio event loop reads the same clock, so async tests can not use it.
+    """
+    clock = FakeClock()
+    with mock.patch("time.monotonic", clock):
+        yield clock
+
+
 @pytest.fixture
 def rmock():
     with requests_mock.mock() as rmock:
@@ -33,3 +77,149 @@ def base_client():
 @pytest.fixture
 def notifications_client():
     yield NotificationsAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID)
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Local HTTP/1.1 server answering requests with the configured JSON response.
+
+    `routes` maps (method, path) to a (status_code, json) response overriding the default one.
+    Requests are recorded as (method, path, headers, body) in `received`. With `gzip_responses`
+    the response is gzipped for clients accepting it.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.received = []
+        self.status_code = 200
+        self.response_json = {}
+        self.response_headers = {}
+        self.routes = {}
+        self.delay = None
+        self.gzip_responses = False
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with self.server.lock:
+            self.server.received.append((self.command, self.path, dict(self.headers), body))
+        if self.server.delay:
+            self.server.delay.wait()
+
+        status_code, response_json = self.server.routes.get(
+            (self.command, self.path), (self.server.status_code, self.server.response_json)
+        )
+        payload = json.dumps(response_json).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        if self.server.gzip_responses and "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in self.server.response_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class ASGIStubServer:
+    """
+    StubServer counterpart served by hypercorn, speaking HTTP/1.1 and cleartext HTTP/2 on the same port.
+
+    Besides `received`, it records the HTTP version of each request in `http_versions` and the client
+    address of each connection in `connections`.
+    """
+
+    def __init__(self):
+        self.received = []
+        self.http_versions = []
+        self.connections = set()
+        self.status_code = 200
+        self.response_json = {}
+        self.response_headers = {}
+        self.routes = {}
+        self.delay = None
+        self.socket = socket.create_server(("127.0.0.1", 0), backlog=1024)
+        self.url = f"http://127.0.0.1:{self.socket.getsockname()[1]}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while (await receive())["type"] != "lifespan.shutdown":
+                await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        path = scope["path"] + (f"?{scope['query_string'].decode()}" if scope["query_string"] else "")
+        headers = {name.decode(): value.decode() for name, value in scope["headers"]}
+        self.received.append((scope["method"], path, headers, body))
+        self.http_versions.append(scope["http_version"])
+        self.connections.add(tuple(scope["client"]))
+        if self.delay:
+            await asyncio.get_running_loop().run_in_executor(None, self.delay.wait)
+
+        status_code, response_json = self.routes.get((scope["method"], path), (self.status_code, self.response_json))
+        payload = json.dumps(response_json).encode()
+        response_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+        response_headers += [(name.encode(), value.encode()) for name, value in self.response_headers.items()]
+        await send({"type": "http.response.start", "status": status_code, "headers": response_headers})
+        await send({"type": "http.response.body", "body": payload})
+
+
+@pytest.fixture
+def asgi_stub_server():
+    hypercorn_asyncio = pytest.importorskip("hypercorn.asyncio")
+    from hypercorn.config import Config
+
+    server = ASGIStubServer()
+    config = Config()
+    # hypercorn takes ownership of the listening socket and closes it on shutdown
+    config.bind = [f"fd://{server.socket.detach()}"]
+    config.loglevel = "ERROR"
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def serve():
+        # created in the server's loop, which Python < 3.10 requires
+        server.shutdown = asyncio.Event()
+        started.set()
+        await hypercorn_asyncio.serve(server, config, shutdown_trigger=server.shutdown.wait)
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True)
+    thread.start()
+    started.wait()
+    yield server
+    loop.call_soon_threadsafe(server.shutdown.set)
+    thread.join(5)
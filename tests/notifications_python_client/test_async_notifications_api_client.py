@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from notifications_python_client.errors import HTTP503Error, HTTPError
+from notifications_python_client.retry import RetryPolicy, RetryStats
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY
+
+pytest.importorskip("httpx")
+
+from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+
+def run(coroutine_function, base_url, **client_kwargs):
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=base_url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, **client_kwargs
+        ) as client:
+            return await coroutine_function(client)
+
+    return asyncio.run(main())
+
+
+def test_send_sms_notification(stub_server):
+    stub_server.response_json = {"id": "123"}
+
+    response = run(lambda client: client.send_sms_notification("+15145550123", "456", reference="ref"), stub_server.url)
+
+    assert response == {"id": "123"}
+    method, path, headers, body = stub_server.received[0]
+    assert (method, path) == ("POST", "/v2/notifications/sms")
+    assert headers["Authorization"].startswith("Bearer ")
+    assert headers["Content-type"] == "application/json"
+    assert body == b'{"phone_number":"+15145550123","template_id":"456","reference":"ref"}'
+
+
+def test_send_email_notification(stub_server):
+    run(lambda client: client.send_email_notification("a@example.com", "456", importance="high"), stub_server.url)
+
+    assert stub_server.received[0][1] == "/v2/notifications/email"
+    assert stub_server.received[0][3] == b'{"email_address":"a@example.com","template_id":"456","importance":"high"}'
+
+
+def test_send_bulk_notifications(stub_server):
+    run(
+        lambda client: client.send_bulk_notifications("456", "bulk", rows=[["email address"], ["a@b.c"]]),
+        stub_server.url,
+    )
+
+    assert stub_server.received[0][:2] == ("POST", "/v2/notifications/bulk")
+
+
+def test_get_template_with_params(stub_server):
+    run(lambda client: client.get_all_templates(template_type="sms"), stub_server.url)
+
+    assert stub_server.received[0][:2] == ("GET", "/v2/templates?type=sms")
+    assert stub_server.received[0][3] == b""
+
+
+def test_get_all_notifications_iterator_paginates(stub_server):
+    first, second = "3d1ce039-5476-414c-99b2-fac1e6add62c", "ea179232-3190-410d-b8ab-23dfecdd3157"
+    stub_server.routes = {
+        ("GET", "/v2/notifications"): (
+            200,
+            {"notifications": [{"id": 1}, {"id": 2}], "links": {"next": f"/v2/notifications?older_than={first}"}},
+        ),
+        ("GET", f"/v2/notifications?older_than={first}"): (
+            200,
+            {"notifications": [{"id": 3}], "links": {"next": f"/v2/notifications?older_than={second}"}},
+        ),
+    }
+    stub_server.response_json = {"notifications": [], "links": {}}
+
+    async def collect(client):
+        return [notification async for notification in client.get_all_notifications_iterator()]
+
+    assert run(collect, stub_server.url) == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+
+def test_requests_run_concurrently_over_shared_pool(stub_server):
+    async def send_many(client):
+        return await asyncio.gather(*(client.get_notification_by_id(i) for i in range(50)))
+
+    assert len(run(send_many, stub_server.url)) == 50
+    assert len(stub_server.received) == 50
+
+
+@pytest.mark.parametrize(
+    "status_code, response_json, error_class, message",
+    [
+        (404, {"errors": "Not found"}, HTTPError, "404 - Not found"),
+        (500, {"message": "Internal"}, HTTPError, "500 - Internal"),
+        (503, {"message": "Unavailable"}, HTTP503Error, "503 - Unavailable"),
+    ],
+)
+def test_http_errors_are_mapped_like_sync_client(stub_server, status_code, response_json, error_class, message):
+    stub_server.status_code = status_code
+    stub_server.response_json = response_json
+
+    with pytest.raises(error_class) as e:
+        run(lambda client: client.get_notification_by_id(1), stub_server.url)
+
+    assert str(e.value) == message
+
+
+def test_retry_policy_is_applied(stub_server):
+    stub_server.status_code = 503
+    policy = RetryPolicy(max_attempts=3, backoff_base=0.001)
+
+    with pytest.raises(HTTP503Error):
+        run(lambda client: client.check_health(), stub_server.url, retry_policy=policy)
+
+    assert len(stub_server.received) == 3
+    assert policy.stats() == RetryStats(retries=2, exhausted=1)
+
+
+def test_connection_error_raises_503():
+    with pytest.raises(HTTP503Error) as e:
+        run(lambda client: client.check_health(), "http://127.0.0.1:9")
+
+    assert str(e.value) == "503 - Request failed"
+
+
+def test_sync_close_and_pool_stats_point_to_the_async_pool():
+    async def main():
+        client = AsyncNotificationsAPIClient(base_url="http://localhost", api_key=COMBINED_API_KEY)
+        assert client.http_adapter is None
+        assert client.request_session is None
+        with pytest.raises(TypeError, match="aclose"):
+            client.close()
+        with pytest.raises(NotImplementedError):
+            client.pool_stats()
+        assert not client.http_client.is_closed
+
+        await client.aclose()
+        assert client.http_client.is_closed
+
+    asyncio.run(main())
@@ -7,6 +7,9 @@ import pytest
 from freezegun import freeze_time
 
 from notifications_python_client.authentication import (
+    JWTSigner,
+    TokenVerifier,
+    VerifiedTokenCache,
     create_jwt_token,
     decode_jwt_token,
     get_token_issuer,
@@ -39,6 +42,37 @@ def test_should_reject_token_request_if_missing_client_id():
     assert str(err.value) == "Missing client id"
 
 
+@pytest.mark.parametrize(
+    "secret, client_id",
+    [
+        ("key", "client_id"),
+        (b"key", "c745a8d8-b48a-4b0d-96e5-dbea0165ebd1"),
+        ("clé", 'service "é" \\ \u2603'),
+    ],
+)
+@pytest.mark.parametrize("issued_at", [0, 1577880000, 4102444800])
+def test_signer_output_is_identical_to_pyjwt(secret, client_id, issued_at):
+    expected = jwt.encode(
+        payload={"iss": client_id, "iat": issued_at}, key=secret, headers={"typ": "JWT", "alg": "HS256"}
+    )
+
+    assert JWTSigner(secret, client_id).sign(issued_at) == expected
+
+
+@freeze_time("2020-01-01 00:00:00")
+def test_signer_uses_current_time_by_default():
+    signer = JWTSigner("key", "client_id")
+
+    assert signer.sign() == signer.sign(calendar.timegm(time.gmtime()))
+
+
+def test_signer_can_sign_repeatedly():
+    signer = JWTSigner("key", "client_id")
+
+    assert signer.sign(1) == signer.sign(1)
+    assert decode_token(signer.sign(2), "key") == {"iss": "client_id", "iat": 2}
+
+
 def test_token_should_contain_correct_headers():
     token = create_jwt_token("key", "client_id")
     headers = jwt.get_unverified_header(token)
@@ -195,3 +229,171 @@ def test_should_return_issuer_from_token():
     issuer = get_token_issuer(token)
 
     assert issuer == "client_id"
+
+
+def test_verifier_returns_claims_of_valid_token():
+    verifier = TokenVerifier({"client_id": "key", "other": "other-key"})
+
+    with freeze_time("2020-01-01 00:00:00"):
+        token = create_jwt_token("key", "client_id")
+        claims = verifier.verify(token)
+
+    assert claims == {"iss": "client_id", "iat": calendar.timegm(time.gmtime(1577836800))}
+
+
+def test_verifier_accepts_secret_lookup_callable():
+    lookup = mock.Mock(return_value="key")
+    token = create_jwt_token("key", "client_id")
+
+    assert TokenVerifier(lookup).verify(token)["iss"] == "client_id"
+    lookup.assert_called_once_with("client_id")
+
+
+@pytest.mark.parametrize("secrets", [{}, {"client_id": None}, lambda issuer: None])
+def test_verifier_rejects_unknown_issuer(secrets):
+    token = create_jwt_token("key", "client_id")
+
+    with pytest.raises(TokenDecodeError) as e:
+        TokenVerifier(secrets).verify(token)
+
+    assert "Invalid token: issuer not recognised. See our requirements" in e.value.message
+
+
+@pytest.mark.parametrize("issuer", [["client_id"], {"client_id": 1}, 1, None])
+def test_verifier_rejects_issuer_that_is_not_a_string(issuer):
+    lookup = mock.Mock(return_value="key")
+    token = _encode({"iss": issuer, "iat": calendar.timegm(time.gmtime())})
+
+    for secrets in ({"client_id": "key"}, lookup):
+        with pytest.raises(TokenDecodeError) as e:
+            TokenVerifier(secrets).verify(token)
+
+        assert "Invalid token: issuer not recognised" in e.value.message
+    assert not lookup.called
+
+
+def _encode(payload, key="key", alg="HS256"):
+    return jwt.encode(payload=payload, key=key, headers={"typ": "JWT", "alg": alg})
+
+
+@pytest.mark.parametrize(
+    "token_factory, exception_class, message",
+    [
+        (lambda now: "token", TokenDecodeError, "Invalid token: signature"),
+        (lambda now: "a.b", TokenDecodeError, "Invalid token: signature"),
+        (lambda now: "eyJhbGciOiJIUzI1NiJ9.W10.", TokenDecodeError, "Invalid token: signature"),
+        (lambda now: "e30.e30.", TokenAlgorithmError, "HS256"),
+        (lambda now: _encode({"iss": "client_id", "iat": now}, key="wrong-key"), TokenDecodeError, "signature"),
+        (lambda now: _encode({"iss": "client_id", "iat": now}, alg="HS512"), TokenAlgorithmError, "HS256"),
+        (lambda now: _encode({"iat": now}), TokenIssuerError, "iss field not provided"),
+        (lambda now: _encode({"iss": "client_id"}), TokenIssuedAtError, "iat field not provided"),
+        (lambda now: _encode({"iss": "client_id", "iat": "soon"}), TokenExpiredError, "Token has invalid iat field"),
+        (lambda now: _encode({"iss": "client_id", "iat": now - 31}), TokenExpiredError, "Token has expired"),
+        (lambda now: _encode({"iss": "client_id", "iat": now + 31}), TokenExpiredError, "can not be in the future"),
+        (lambda now: _encode({"iss": "client_id", "iat": now, "exp": now - 31}), TokenError, "Invalid token: See"),
+        (lambda now: _encode({"iss": "client_id", "iat": now, "aud": "x"}), TokenError, "Invalid token: See"),
+    ],
+)
+def test_verifier_raises_same_errors_as_decode_jwt_token(token_factory, exception_class, message):
+    with freeze_time("2020-01-01 00:00:00"):
+        token = token_factory(calendar.timegm(time.gmtime()))
+
+        with pytest.raises(exception_class) as verifier_error:
+            TokenVerifier({"client_id": "key"}).verify(token)
+        with pytest.raises(exception_class) as decode_error:
+            decode_jwt_token(token, "key")
+
+    assert type(verifier_error.value) is type(decode_error.value)
+    assert verifier_error.value.message == decode_error.value.message
+    assert message in verifier_error.value.message
+
+
+def test_decode_jwt_token_with_cache_verifies_signature_once():
+    cache = VerifiedTokenCache()
+
+    with freeze_time("2001-01-01T12:00:00"):
+        token = create_jwt_token("key", "client_id")
+        with mock.patch("notifications_python_client.authentication.jwt.decode", wraps=jwt.decode) as decode_mock:
+            assert decode_jwt_token(token, "key", cache=cache)
+            assert decode_jwt_token(token, "key", cache=cache)
+
+    decode_mock.assert_called_once()
+    assert len(cache) == 1
+
+
+def test_decode_jwt_token_with_cache_does_not_share_entries_between_secrets():
+    cache = VerifiedTokenCache()
+    token = create_jwt_token("key", "client_id")
+
+    assert decode_jwt_token(token, "key", cache=cache)
+    with pytest.raises(TokenDecodeError):
+        decode_jwt_token(token, "wrong-key", cache=cache)
+
+
+def test_decode_jwt_token_with_cache_does_not_store_invalid_tokens():
+    cache = VerifiedTokenCache()
+    with freeze_time("2001-01-01T12:00:00"):
+        token = create_jwt_token("key", "client_id")
+
+    with freeze_time("2001-01-01T12:00:31"), pytest.raises(TokenExpiredError):
+        decode_jwt_token(token, "key", cache=cache)
+
+    assert len(cache) == 0
+
+
+def test_decode_jwt_token_with_cache_checks_bounds_against_current_time():
+    cache = VerifiedTokenCache()
+    with freeze_time("2001-01-01T12:00:00"):
+        token = create_jwt_token("key", "client_id")
+        decode_jwt_token(token, "key", cache=cache)
+
+    with freeze_time("2001-01-01T12:00:30"):
+        assert decode_jwt_token(token, "key", cache=cache)
+
+    with freeze_time("2001-01-01T12:00:31"), pytest.raises(TokenExpiredError) as e:
+        decode_jwt_token(token, "key", cache=cache)
+
+    assert "Token has expired. See our requirements" in e.value.message
+
+
+def test_verified_token_cache_expires_entries():
+    cache = VerifiedTokenCache()
+    with freeze_time("2001-01-01T12:00:00"):
+        claims = {"iss": "client_id", "iat": calendar.timegm(time.gmtime())}
+        cache.set("token", "key", claims)
+
+    with freeze_time("2001-01-01T12:00:30"):
+        assert cache.get("token", "key") == claims
+    with freeze_time("2001-01-01T12:00:31"):
+        assert cache.get("token", "key") is None
+    assert len(cache) == 0
+
+
+@freeze_time("2001-01-01T12:00:00")
+def test_verified_token_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(maxsize=2)
+    claims = {"iss": "client_id", "iat": calendar.timegm(time.gmtime())}
+    cache.set("token-1", "key", claims)
+    cache.set("token-2", "key", claims)
+    cache.get("token-1", "key")
+    cache.set("token-3", "key", claims)
+
+    assert cache.get("token-1", "key") is not None
+    assert cache.get("token-2", "key") is None
+    assert cache.get("token-3", "key") is not None
+
+
+def test_verified_token_cache_drops_expired_entries_on_insert():
+    cache = VerifiedTokenCache()
+    with freeze_time("2001-01-01T12:00:00"):
+        cache.set("old", "key", {"iat": calendar.timegm(time.gmtime())})
+
+    with freeze_time("2001-01-01T12:01:00"):
+        cache.set("new", "key", {"iat": calendar.timegm(time.gmtime())})
+
+    assert len(cache) == 1
+
+
+def test_verified_token_cache_rejects_invalid_size():
+    with pytest.raises(ValueError):
+        VerifiedTokenCache(maxsize=0)
@@ -1,9 +1,12 @@
 import re
+import threading
 from unittest import mock
 
 import pytest
 import requests
+from freezegun import freeze_time
 
+from notifications_python_client.authentication import JWTSigner, decode_jwt_token, get_token_issuer
 from notifications_python_client.base import BaseAPIClient
 from notifications_python_client.errors import HTTPError, InvalidResponse
 from tests.conftest import API_KEY_ID, CLIENT_ID, COMBINED_API_KEY, SERVICE_ID
@@ -18,11 +21,13 @@ from tests.conftest import API_KEY_ID, CLIENT_ID, COMBINED_API_KEY, SERVICE_ID
     ids=["combined api key", "positional api key"],
 )
 def test_passes_through_service_id_and_key(rmock, client):
-    with mock.patch("notifications_python_client.base.create_jwt_token") as mock_create_token:
-        rmock.request("GET", "https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn/", status_code=204)
-        client.request("GET", "/")
-    mock_create_token.assert_called_once_with(API_KEY_ID, SERVICE_ID)
-    assert client.base_url == "https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn/"
+    rmock.request("GET", "https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn/", status_code=204)
+    client.request("GET", "/")
+
+    _, token = rmock.last_request.headers["Authorization"].split(" ")
+    assert get_token_issuer(token) == SERVICE_ID
+    assert decode_jwt_token(token, API_KEY_ID)
+    assert client.base_url == "https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn"
 
 
 def test_can_set_base_url():
@@ -30,6 +35,16 @@ def test_can_set_base_url():
     assert client.base_url == "https://example.com/api"
 
 
+def test_base_url_trailing_slash_is_removed(rmock):
+    client = BaseAPIClient(base_url="https://example.com/api/", api_key=COMBINED_API_KEY)
+    rmock.request("GET", "https://example.com/api/v2/notifications", json={}, status_code=200)
+
+    client.request("GET", "/v2/notifications")
+
+    assert client.base_url == "https://example.com/api"
+    assert rmock.called
+
+
 def test_set_timeout():
     client = BaseAPIClient(base_url="foo", api_key=COMBINED_API_KEY, timeout=2, client_id=CLIENT_ID)
     assert client.timeout == 2
@@ -153,3 +168,83 @@ def test_client_id_header_absent_if_not_set(base_client, rmock):
     base_client.request("GET", "/")
 
     assert "X-QC-Client-Id" not in rmock.last_request.headers
+
+
+def test_token_is_reused_within_refresh_window(base_client, rmock):
+    rmock.request("GET", "http://test-host/", json={}, status_code=200)
+
+    with mock.patch.object(JWTSigner, "sign", side_effect=["token-1", "token-2"]) as m:
+        with freeze_time("2020-01-01T12:00:00"):
+            base_client.request("GET", "/")
+        with freeze_time("2020-01-01T12:00:19"):
+            base_client.request("GET", "/")
+
+    m.assert_called_once_with(1577880000)
+    assert rmock.last_request.headers["Authorization"] == "Bearer token-1"
+
+
+def test_token_is_refreshed_at_refresh_margin(base_client, rmock):
+    rmock.request("GET", "http://test-host/", json={}, status_code=200)
+
+    with mock.patch.object(JWTSigner, "sign", side_effect=["token-1", "token-2"]) as m:
+        with freeze_time("2020-01-01T12:00:00"):
+            base_client.request("GET", "/")
+        with freeze_time("2020-01-01T12:00:20"):
+            base_client.request("GET", "/")
+
+    assert m.call_count == 2
+    assert rmock.last_request.headers["Authorization"] == "Bearer token-2"
+
+
+def test_token_is_refreshed_if_clock_goes_backwards(base_client):
+    with mock.patch.object(JWTSigner, "sign", side_effect=["token-1", "token-2"]):
+        with freeze_time("2020-01-01T12:00:10"):
+            assert base_client._get_api_token() == "token-1"
+        with freeze_time("2020-01-01T12:00:00"):
+            assert base_client._get_api_token() == "token-2"
+
+
+def test_token_reuse_can_be_disabled(rmock):
+    client = BaseAPIClient(base_url="http://test-host", api_key=COMBINED_API_KEY, token_refresh_margin=30)
+    rmock.request("GET", "http://test-host/", json={}, status_code=200)
+
+    with mock.patch.object(JWTSigner, "sign", return_value="token") as m:
+        with freeze_time("2020-01-01T12:00:00"):
+            client.request("GET", "/")
+            client.request("GET", "/")
+
+    assert m.call_count == 2
+
+
+def test_fails_if_token_refresh_margin_negative():
+    with pytest.raises(ValueError) as err:
+        BaseAPIClient(api_key=COMBINED_API_KEY, base_url="http://test-host", token_refresh_margin=-1)
+    assert str(err.value) == "token_refresh_margin must not be negative"
+
+
+def test_token_is_minted_once_across_threads(base_client):
+    barrier = threading.Barrier(8)
+    tokens = []
+
+    def worker():
+        barrier.wait()
+        tokens.append(base_client._get_api_token())
+
+    with mock.patch.object(JWTSigner, "sign", return_value="token") as m:
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    m.assert_called_once()
+    assert tokens == ["token"] * 8
+
+
+def test_client_prepares_its_signer_once(rmock):
+    with mock.patch("notifications_python_client.base.JWTSigner") as signer:
+        client = BaseAPIClient(base_url="http://test-host", api_key=COMBINED_API_KEY, token_refresh_margin=30)
+    signer.return_value.sign.side_effect = ["token-1", "token-2"]
+
+    assert [client._get_api_token(), client._get_api_token()] == ["token-1", "token-2"]
+    signer.assert_called_once_with(API_KEY_ID, SERVICE_ID)
@@ -0,0 +1,355 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+
+import pytest
+
+from notifications_python_client.batch import SendResult, bounded_map, bounded_map_async
+from notifications_python_client.errors import HTTPError
+from notifications_python_client.timeouts import Deadline, current_deadline
+from notifications_python_client.transport import InProcessTransport
+from tests.conftest import COMBINED_API_KEY, make_client
+
+
+class ConcurrencyGauge:
+    """Records the largest number of calls running at once."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.running -= 1
+
+
+class Consumed:
+    """Iterable counting the items read from it."""
+
+    def __init__(self, items):
+        self.items = items
+        self.count = 0
+
+    def __iter__(self):
+        for item in self.items:
+            self.count += 1
+            yield item
+
+
+def test_bounded_map_yields_results_in_order():
+    gauge = ConcurrencyGauge()
+
+    def square(index, item):
+        with gauge:
+            time.sleep(0.02 if item % 3 == 0 else 0)
+            return item * item
+
+    assert list(bounded_map(square, range(30), concurrency=4)) == [i * i for i in range(30)]
+    assert gauge.peak == 4
+
+
+def test_bounded_map_yields_results_as_completed():
+    def slow_first(index, item):
+        time.sleep(0.2 if index == 0 else 0)
+        return index
+
+    results = list(bounded_map(slow_first, range(5), concurrency=5, ordered=False))
+
+    assert sorted(results) == list(range(5))
+    assert results[-1] == 0
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_bounded_map_reads_items_as_results_are_consumed(ordered):
+    items = Consumed(itertools.count())
+
+    results = bounded_map(lambda index, item: item, items, concurrency=2, ordered=ordered, window=4)
+    next(results)
+    results.close()
+
+    assert items.count <= 5
+
+
+def test_bounded_map_cancels_calls_not_started_when_closed():
+    started = []
+    release = threading.Event()
+
+    def blocked(index, item):
+        started.append(index)
+        if index:
+            release.wait(5)
+        return index
+
+    results = bounded_map(blocked, range(100), concurrency=2, window=10)
+    assert next(results) == 0
+    # the running calls are waited for
+    threading.Timer(0.1, release.set).start()
+    results.close()
+
+    assert len(started) <= 3
+
+
+def test_bounded_map_raises_errors_of_fn():
+    def failing(index, item):
+        if index == 3:
+            raise RuntimeError("failed")
+        return index
+
+    with pytest.raises(RuntimeError, match="failed"):
+        list(bounded_map(failing, range(10), concurrency=2))
+
+
+@pytest.mark.parametrize("concurrency, window", [(0, None), (4, 2)])
+def test_bounded_map_checks_its_arguments(concurrency, window):
+    with pytest.raises(ValueError):
+        bounded_map(lambda index, item: item, [], concurrency, window=window)
+
+
+def test_bounded_map_calls_inherit_the_callers_deadline():
+    with Deadline(10) as deadline:
+        deadlines = list(bounded_map(lambda index, item: current_deadline(), range(3), concurrency=2))
+
+    assert deadlines == [deadline] * 3
+
+
+def api_handler(gauge):
+    def handler(method, url, headers, body):
+        data = json.loads(body)
+        with gauge:
+            if data.get("phone_number") == "+15145550000":
+                return 400, {"Content-Type": "application/json"}, b'{"errors": [{"message": "Invalid number"}]}'
+            recipient = data.get("phone_number") or data.get("email_address")
+            return 201, {"Content-Type": "application/json"}, json.dumps({"to": recipient}).encode()
+
+    return handler
+
+
+def batch_client(gauge, **kwargs):
+    return make_client("http://localhost", transport=InProcessTransport(api_handler(gauge)), **kwargs)
+
+
+def test_send_many_sends_sms_and_email_concurrently():
+    gauge = ConcurrencyGauge()
+    client = batch_client(gauge)
+    items = (
+        {"email_address": f"{i}@example.com", "template_id": "456"}
+        if i % 2
+        else {"phone_number": f"+1514555{i:04}", "template_id": "123", "reference": f"ref-{i}"}
+        for i in range(1, 41)
+    )
+
+    results = list(client.send_many(items, concurrency=8))
+
+    assert [result.index for result in results] == list(range(40))
+    assert all(result.ok for result in results)
+    assert results[0] == SendResult(
+        0, {"email_address": "1@example.com", "template_id": "456"}, {"to": "1@example.com"}, None
+    )
+    assert results[1].response == {"to": "+15145550002"}
+    assert gauge.peak == 8
+
+
+def test_send_many_returns_failures_without_raising():
+    client = batch_client(ConcurrencyGauge(delay=0))
+    items = [
+        {"phone_number": "+15145550000", "template_id": "123"},
+        {"template_id": "123"},
+        {"email_address": "a@example.com", "template_id": "456", "importance": "urgent"},
+        {"phone_number": "+15145550123", "template_id": "123"},
+        {"phone_number": "+15145550123"},
+        {"email_address": "a@example.com", "template_id": "456", "unknown": 1},
+        {"phone_number": "+15145550124", "template_id": "123"},
+    ]
+
+    results = list(client.send_many(items, concurrency=2, ordered=False))
+
+    outcomes = {result.index: result for result in results}
+    assert sorted(outcomes) == list(range(7))
+    assert isinstance(outcomes[0].error, HTTPError)
+    assert outcomes[0].error.status_code == 400
+    assert isinstance(outcomes[1].error, ValueError)
+    assert isinstance(outcomes[2].error, ValueError)
+    assert outcomes[3].ok
+    assert outcomes[3].response == {"to": "+15145550123"}
+    assert isinstance(outcomes[4].error, ValueError)
+    assert "template_id" in str(outcomes[4].error)
+    assert isinstance(outcomes[5].error, ValueError)
+    assert "unknown" in str(outcomes[5].error)
+    assert outcomes[6].ok
+
+
+def run_async_map(fn, items, **kwargs):
+    async def main():
+        return [result async for result in bounded_map_async(fn, items, **kwargs)]
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_bounded_map_async_limits_calls_in_flight(ordered):
+    running = []
+    peak = []
+
+    async def square(index, item):
+        running.append(item)
+        peak.append(len(running))
+        await asyncio.sleep(0.01 if item % 3 else 0.03)
+        running.remove(item)
+        return item * item
+
+    results = run_async_map(square, range(30), concurrency=4, ordered=ordered)
+
+    expected = [i * i for i in range(30)]
+    assert results == expected if ordered else sorted(results) == expected
+    assert max(peak) == 4
+
+
+def test_bounded_map_async_yields_results_while_waiting_for_items():
+    async def main():
+        first_result = asyncio.Event()
+
+        async def items():
+            yield 1
+            # only produced once the first result has been consumed
+            await first_result.wait()
+            yield 2
+
+        async def double(index, item):
+            return item * 2
+
+        results = []
+        async for result in bounded_map_async(double, items(), concurrency=2):
+            results.append(result)
+            first_result.set()
+        return results
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) == [2, 4]
+
+
+def test_bounded_map_async_holds_back_the_producer():
+    produced = []
+
+    async def main():
+        async def items():
+            for item in itertools.count():
+                produced.append(item)
+                yield item
+
+        async def slow(index, item):
+            await asyncio.sleep(0.01)
+            return item
+
+        results = bounded_map_async(slow, items(), concurrency=2, window=4)
+        assert await results.__anext__() == 0
+        await results.aclose()
+
+    asyncio.run(main())
+    assert len(produced) <= 6
+
+
+def test_bounded_map_async_drains_calls_in_flight_once_stopped():
+    async def main():
+        stop = asyncio.Event()
+
+        async def slow(index, item):
+            await asyncio.sleep(0.05 if index else 0)
+            return index
+
+        results = []
+        async for result in bounded_map_async(slow, itertools.count(), concurrency=3, window=3, stop=stop):
+            results.append(result)
+            stop.set()
+        return results
+
+    # the items in the window when stop was set are sent, and no other
+    assert asyncio.run(main()) == [0, 1, 2]
+
+
+def test_bounded_map_async_stops_waiting_for_items_once_stopped():
+    async def main():
+        stop = asyncio.Event()
+
+        async def items():
+            yield 0
+            await asyncio.sleep(10)
+            yield 1
+
+        async def identity(index, item):
+            return item
+
+        asyncio.get_running_loop().call_later(0.05, stop.set)
+        return [result async for result in bounded_map_async(identity, items(), concurrency=2, stop=stop)]
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) == [0]
+
+
+def test_bounded_map_async_cancels_calls_in_flight_when_closed():
+    cancelled = []
+
+    async def main():
+        async def blocked(index, item):
+            if index == 0:
+                return index
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(index)
+                raise
+
+        results = bounded_map_async(blocked, range(10), concurrency=3)
+        assert await results.__anext__() == 0
+        await asyncio.sleep(0.01)
+        await results.aclose()
+
+    asyncio.run(asyncio.wait_for(main(), 5))
+    assert sorted(cancelled) == [1, 2, 3]
+
+
+def test_async_send_many_builds_the_same_payloads():
+    httpx = pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    bodies = []
+
+    async def handle(request):
+        data = json.loads(request.content)
+        bodies.append(data)
+        await asyncio.sleep(0.01)
+        if data.get("phone_number") == "+15145550000":
+            return httpx.Response(400, json={"errors": [{"message": "Invalid number"}]})
+        return httpx.Response(201, json={"to": data.get("phone_number") or data.get("email_address")})
+
+    async def items():
+        yield {"phone_number": "+15145550123", "template_id": "123", "personalisation": {"nom": "Zoé"}}
+        yield {"email_address": "a@example.com", "template_id": "456", "reference": "ref", "importance": "high"}
+        yield {"phone_number": "+15145550000", "template_id": "123"}
+        yield {"email_address": "a@example.com", "template_id": "456", "importance": "urgent"}
+        yield {"phone_number": "+15145550123"}
+        yield {"phone_number": "+15145550123", "template_id": "123", "sender": "x"}
+        yield {"phone_number": "+15145550124", "template_id": "123"}
+
+    async def main():
+        async with AsyncNotificationsAPIClient(base_url="http://localhost", api_key=COMBINED_API_KEY) as client:
+            client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+            return [result async for result in client.send_many(items(), concurrency=2)]
+
+    results = asyncio.run(main())
+
+    assert [result.response for result in results[:2]] == [{"to": "+15145550123"}, {"to": "a@example.com"}]
+    assert results[2].error.status_code == 400
+    assert all(isinstance(result.error, ValueError) for result in results[3:6])
+    assert results[6].response == {"to": "+15145550124"}
+    assert bodies[:2] == [
+        {"phone_number": "+15145550123", "template_id": "123", "personalisation": {"nom": "Zoé"}},
+        {"email_address": "a@example.com", "template_id": "456", "reference": "ref", "importance": "high"},
+    ]
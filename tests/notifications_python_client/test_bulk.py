@@ -0,0 +1,217 @@
+import asyncio
+import csv
+import io
+import itertools
+import json
+import threading
+
+import pytest
+
+from notifications_python_client.bulk import BulkChunk, bulk_chunks
+from notifications_python_client.errors import HTTPError
+from notifications_python_client.notifications import NotificationsAPIClient
+from notifications_python_client.transport import InProcessTransport
+from tests.conftest import COMBINED_API_KEY, TEST_HOST
+
+HEADER = ["email address", "name"]
+
+
+def email_rows(number):
+    yield HEADER
+    for i in range(number):
+        yield [f"{i}@example.com", f"Nom {i}"]
+
+
+def test_rows_are_split_by_count_with_the_header_repeated():
+    chunks = list(bulk_chunks("Campagne", "ref", rows=email_rows(5), max_rows=2))
+
+    assert [chunk.count for chunk in chunks] == [2, 2, 1]
+    assert chunks[0] == BulkChunk(
+        0, "Campagne - 1", "ref-1", 2, [HEADER, ["0@example.com", "Nom 0"], ["1@example.com", "Nom 1"]], None
+    )
+    assert chunks[2].rows == [HEADER, ["4@example.com", "Nom 4"]]
+    assert [(chunk.name, chunk.reference) for chunk in chunks[1:]] == [
+        ("Campagne - 2", "ref-2"),
+        ("Campagne - 3", "ref-3"),
+    ]
+
+
+def test_rows_are_split_by_size():
+    chunks = list(bulk_chunks("Campagne", rows=email_rows(10), max_bytes=150))
+
+    assert sum(chunk.count for chunk in chunks) == 10
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.reference is None
+        assert chunk.rows[0] == HEADER
+        assert sum(len(json.dumps(row)) + 1 for row in chunk.rows) <= 150
+
+
+def test_rows_are_read_as_chunks_are_consumed():
+    chunks = bulk_chunks(
+        "Campagne", rows=itertools.chain([HEADER], itertools.repeat(["a@example.com", "A"])), max_rows=3
+    )
+
+    assert [next(chunks).count for _ in range(2)] == [3, 3]
+
+
+def test_row_larger_than_max_bytes_ends_the_chunks_with_an_error():
+    rows = [HEADER, ["a@example.com", "A"], ["b@example.com", "B"], ["c@example.com", "C" * 200], ["d", "D"]]
+
+    chunks = list(bulk_chunks("Campagne", "ref", rows=rows, max_rows=1, max_bytes=100))
+
+    assert [(chunk.name, chunk.count, chunk.error) for chunk in chunks[:2]] == [
+        ("Campagne - 1", 1, None),
+        ("Campagne - 2", 1, None),
+    ]
+    failed = chunks[2]
+    assert (failed.name, failed.reference, failed.rows, failed.csv) == ("Campagne - 3", "ref-3", None, None)
+    assert isinstance(failed.error, ValueError)
+    assert "row 3" in str(failed.error)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"rows": [], "csv_file": io.StringIO()}, {"rows": [], "max_rows": 0}])
+def test_bulk_chunks_checks_its_arguments(kwargs):
+    with pytest.raises(ValueError):
+        bulk_chunks("Campagne", **kwargs)
+
+
+def test_input_without_header_is_an_error():
+    (chunk,) = bulk_chunks("Campagne", rows=[])
+
+    assert isinstance(chunk.error, ValueError)
+    assert "header" in str(chunk.error)
+
+
+CSV = 'email address,name\r\na@example.com,"Alice\r\nde Québec"\r\n\r\nb@example.com,Bob\r\nc@example.com,Carl'
+
+
+def test_csv_file_records_are_sent_unchanged(tmp_path):
+    path = tmp_path / "campagne.csv"
+    path.write_bytes(b"\xef\xbb\xbf" + CSV.encode())
+
+    chunks = list(bulk_chunks("Campagne", csv_file=path, max_rows=2))
+
+    assert [(chunk.count, chunk.rows) for chunk in chunks] == [(2, None), (1, None)]
+    # quoted values spanning lines stay in their record, the BOM and blank lines are dropped
+    assert chunks[0].csv == 'email address,name\r\na@example.com,"Alice\r\nde Québec"\r\nb@example.com,Bob\r\n'
+    assert chunks[1].csv == "email address,name\r\nc@example.com,Carl\n"
+
+
+def test_csv_stream_is_split_by_size_and_left_open():
+    stream = io.BytesIO(CSV.encode())
+
+    chunks = list(bulk_chunks("Campagne", csv_file=stream, max_bytes=60))
+
+    assert [chunk.count for chunk in chunks] == [1, 2]
+    assert all(len(chunk.csv.encode()) <= 60 for chunk in chunks)
+    assert not stream.closed
+
+
+def bulk_handler(received, failing_name=None):
+    def handler(method, url, headers, body):
+        data = json.loads(body)
+        received.append(data)
+        if data["name"] == failing_name:
+            return 400, {"Content-Type": "application/json"}, b'{"errors": [{"message": "Too many rows"}]}'
+        job = {"data": {"id": f"job-{data['reference']}", "notification_count": len(data.get("rows", [])) - 1}}
+        return 201, {"Content-Type": "application/json"}, json.dumps(job).encode()
+
+    return handler
+
+
+def test_chunked_bulk_send_creates_a_job_per_chunk():
+    received = []
+    transport = InProcessTransport(bulk_handler(received, failing_name="Campagne - 3"))
+    client = NotificationsAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, transport=transport)
+
+    result = client.send_bulk_notifications_chunked(
+        "template-id", "Campagne", rows=email_rows(9), reference="ref", scheduled_for="2026-10-19T08:00:00", max_rows=2
+    )
+
+    assert [chunk.job_id for chunk in result.chunks] == ["job-ref-1", "job-ref-2", None, "job-ref-4", "job-ref-5"]
+    assert result.job_ids == ["job-ref-1", "job-ref-2", "job-ref-4", "job-ref-5"]
+    assert not result.ok
+    assert [chunk.name for chunk in result.failed] == ["Campagne - 3"]
+    assert isinstance(result.failed[0].error, HTTPError)
+    assert result.count == 7
+    assert sorted(data["reference"] for data in received) == [f"ref-{i}" for i in range(1, 6)]
+    assert all(data["rows"][0] == HEADER and data["template_id"] == "template-id" for data in received)
+    assert all(data["scheduled_for"] == "2026-10-19T08:00:00" for data in received)
+
+
+@pytest.mark.parametrize(
+    "bad_record, error",
+    [
+        # not UTF-8
+        (b"c@example.com,\xff\r\n", UnicodeDecodeError),
+        (b'c@example.com,"' + b"x" * (csv.field_size_limit() + 1) + b'"\r\n', csv.Error),
+    ],
+    ids=["undecodable", "field-too-large"],
+)
+def test_chunked_bulk_send_reports_the_jobs_created_before_an_invalid_input(bad_record, error):
+    received = []
+    transport = InProcessTransport(bulk_handler(received))
+    client = NotificationsAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, transport=transport)
+    records = [b"email address,name\r\n"] + [f"{i}@example.com,Nom {i}\r\n".encode() for i in range(4)]
+    stream = io.BytesIO(b"".join(records) + bad_record + b"d@example.com,Dan\r\n")
+
+    result = client.send_bulk_notifications_chunked(
+        "template-id", "Campagne", csv_file=stream, reference="ref", max_rows=2
+    )
+
+    assert result.job_ids == ["job-ref-1", "job-ref-2"]
+    assert not result.ok
+    (failed,) = result.failed
+    assert (failed.index, failed.name, failed.response) == (2, "Campagne - 3", None)
+    assert isinstance(failed.error, error)
+    assert len(received) == 2
+
+
+def test_chunked_bulk_send_needs_rows_or_csv_file():
+    client = NotificationsAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY)
+
+    with pytest.raises(ValueError, match="csv_file"):
+        client.send_bulk_notifications_chunked("template-id", "Campagne")
+
+
+def test_async_chunked_bulk_send_creates_a_job_per_chunk():
+    httpx = pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    received = []
+
+    async def handle(request):
+        data = json.loads(request.content)
+        received.append(data)
+        await asyncio.sleep(0.01)
+        return httpx.Response(201, json={"data": {"id": f"job-{data['name']}"}})
+
+    class Stream(io.StringIO):
+        def readline(self, *args):
+            read_from.add(threading.current_thread())
+            return super().readline(*args)
+
+        def __next__(self):
+            read_from.add(threading.current_thread())
+            return super().__next__()
+
+    read_from = set()
+
+    async def main():
+        async with AsyncNotificationsAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY) as client:
+            client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+            return await client.send_bulk_notifications_chunked(
+                "template-id", "Campagne", csv_file=Stream(CSV), max_rows=2, concurrency=2
+            )
+
+    result = asyncio.run(main())
+
+    assert result.ok
+    # the file is not read from the event loop
+    assert read_from and threading.main_thread() not in read_from
+    assert result.job_ids == ["job-Campagne - 1", "job-Campagne - 2"]
+    assert sorted(data["csv"] for data in received) == [
+        'email address,name\r\na@example.com,"Alice\r\nde Québec"\r\nb@example.com,Bob\r\n',
+        "email address,name\r\nc@example.com,Carl\n",
+    ]
@@ -0,0 +1,248 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.circuitbreaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from notifications_python_client.endpoints import READS, SMS
+from notifications_python_client.errors import APIError, CircuitOpenError, DeadlineExceededError, HTTPError
+from notifications_python_client.ratelimit import RateLimiter
+from notifications_python_client.retry import RetryPolicy
+from notifications_python_client.timeouts import Deadline
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY, TEST_HOST, http_error
+
+KEY = ("https://api", SMS)
+
+
+def _call(breaker, error=None, duration=0.1, key=KEY):
+    breaker.before_call(key)
+    breaker.record(key, error, duration)
+
+
+def test_circuit_opens_when_failure_rate_reaches_threshold(clock):
+    breaker = CircuitBreaker(failure_rate_threshold=0.5, minimum_calls=4, window_size=4)
+    _call(breaker)
+    _call(breaker)
+    _call(breaker, http_error(500))
+    assert breaker.state(KEY) == CLOSED
+
+    _call(breaker, http_error())
+
+    assert breaker.state(KEY) == OPEN
+    with pytest.raises(CircuitOpenError) as e:
+        breaker.before_call(KEY)
+    assert e.value.retry_after == 30
+    assert e.value.status_code == 503
+    assert str(e.value) == "503 - Circuit open for sms requests to https://api"
+
+
+@pytest.mark.parametrize("status_code", [400, 404, 429])
+def test_client_errors_do_not_open_circuit(clock, status_code):
+    breaker = CircuitBreaker(minimum_calls=2, window_size=2)
+
+    for _ in range(5):
+        _call(breaker, http_error(status_code))
+
+    assert breaker.state(KEY) == CLOSED
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = CircuitBreaker(slow_call_duration=2, minimum_calls=2, window_size=2)
+
+    _call(breaker, duration=1.9)
+    _call(breaker, duration=2.5)
+
+    assert breaker.state(KEY) == OPEN
+
+
+def test_circuits_are_independent(clock):
+    breaker = CircuitBreaker(minimum_calls=1, window_size=1)
+
+    _call(breaker, http_error(503))
+
+    assert breaker.states() == {KEY: OPEN}
+    _call(breaker, key=("https://api", READS))
+    assert breaker.state(("https://api", READS)) == CLOSED
+
+
+def test_open_circuit_lets_a_probe_through_after_open_duration(clock):
+    changes = []
+    breaker = CircuitBreaker(
+        minimum_calls=1, window_size=1, open_duration=10, on_state_change=lambda *change: changes.append(change)
+    )
+    _call(breaker, http_error(503))
+
+    clock.now += 9.5
+    with pytest.raises(CircuitOpenError) as e:
+        breaker.before_call(KEY)
+    assert e.value.retry_after == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert breaker.state(KEY) == HALF_OPEN
+    breaker.before_call(KEY)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call(KEY)
+
+    breaker.record(KEY, None, 0.1)
+    assert breaker.state(KEY) == CLOSED
+    assert changes == [(KEY, CLOSED, OPEN), (KEY, OPEN, HALF_OPEN), (KEY, HALF_OPEN, CLOSED)]
+
+
+def test_failed_probe_reopens_circuit(clock):
+    breaker = CircuitBreaker(minimum_calls=1, window_size=1, open_duration=10)
+    _call(breaker, http_error(503))
+    clock.now += 10
+
+    _call(breaker, http_error())
+
+    assert breaker.state(KEY) == OPEN
+    clock.now += 9
+    assert breaker.state(KEY) == OPEN
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_rate_threshold=0)
+    with pytest.raises(ValueError):
+        CircuitBreaker(minimum_calls=5, window_size=2)
+
+
+def test_client_fails_fast_once_circuit_is_open(rmock, clock):
+    breaker = CircuitBreaker(minimum_calls=2, window_size=2)
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, circuit_breaker=breaker)
+    rmock.get(f"{TEST_HOST}/health", status_code=500)
+
+    for _ in range(2):
+        with pytest.raises(HTTPError):
+            client.get("/health")
+    with pytest.raises(CircuitOpenError) as e:
+        client.get("/health")
+
+    assert isinstance(e.value, APIError)
+    assert rmock.call_count == 2
+    assert breaker.state((TEST_HOST, READS)) == OPEN
+    # other endpoint families are not affected
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", json={})
+    client.post("/v2/notifications/sms", data={})
+
+
+def test_client_with_retries_stops_when_circuit_opens(rmock, clock):
+    client = BaseAPIClient(
+        base_url=TEST_HOST,
+        api_key=COMBINED_API_KEY,
+        circuit_breaker=CircuitBreaker(minimum_calls=2, window_size=2),
+        retry_policy=RetryPolicy(max_attempts=5),
+    )
+    rmock.get(f"{TEST_HOST}/health", status_code=503)
+
+    with mock.patch("notifications_python_client.base.time.sleep"), pytest.raises(CircuitOpenError):
+        client.get("/health")
+
+    assert rmock.call_count == 2
+
+
+def open_circuit(breaker, family):
+    breaker.before_call((TEST_HOST, family))
+    breaker.record((TEST_HOST, family), http_error(503), 0.1)
+
+
+def test_open_circuit_fails_without_waiting_for_the_rate_limiter(rmock, clock):
+    limiter = RateLimiter({SMS: 1}, headroom=1)
+    breaker = CircuitBreaker(minimum_calls=1, window_size=1)
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, rate_limiter=limiter, circuit_breaker=breaker)
+    # the next SMS has to wait a second for its token
+    limiter.reserve(SMS)
+    open_circuit(breaker, SMS)
+
+    with mock.patch("notifications_python_client.ratelimit.time.sleep") as sleep, pytest.raises(CircuitOpenError):
+        client.post("/v2/notifications/sms", data={})
+
+    assert not sleep.called
+    assert not rmock.called
+    # no token was spent
+    assert limiter.reserve(SMS) == 1
+
+
+def test_half_open_probe_is_released_when_the_rate_limiter_gives_up(rmock, clock):
+    limiter = RateLimiter({SMS: 1}, headroom=1)
+    breaker = CircuitBreaker(minimum_calls=1, window_size=1, open_duration=10)
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, rate_limiter=limiter, circuit_breaker=breaker)
+    open_circuit(breaker, SMS)
+    clock.now += 10
+    limiter.reserve(SMS)
+
+    with Deadline(0.5), pytest.raises(DeadlineExceededError):
+        client.post("/v2/notifications/sms", data={})
+
+    assert not rmock.called
+    assert breaker.state((TEST_HOST, SMS)) == HALF_OPEN
+    # the probe slot is free for the next request
+    breaker.before_call((TEST_HOST, SMS))
+
+
+def test_released_probe_lets_another_probe_through(clock):
+    breaker = CircuitBreaker(minimum_calls=1, window_size=1, open_duration=10)
+    _call(breaker, http_error(503))
+    clock.now += 10
+
+    breaker.before_call(KEY)
+    breaker.release(KEY)
+
+    assert breaker.state(KEY) == HALF_OPEN
+    _call(breaker)
+    assert breaker.state(KEY) == CLOSED
+
+
+def test_async_client_open_circuit_fails_without_waiting_for_the_rate_limiter():
+    httpx = pytest.importorskip("httpx")
+    from notifications_python_client.async_base import AsyncBaseAPIClient
+
+    limiter = RateLimiter({SMS: 1}, headroom=1)
+    breaker = CircuitBreaker(minimum_calls=1, window_size=1)
+    limiter.reserve(SMS)
+    open_circuit(breaker, SMS)
+
+    async def main():
+        async with AsyncBaseAPIClient(
+            base_url=TEST_HOST, api_key=COMBINED_API_KEY, rate_limiter=limiter, circuit_breaker=breaker
+        ) as client:
+            client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+            with pytest.raises(CircuitOpenError):
+                await asyncio.wait_for(client.post("/v2/notifications/sms", data={}), 0.5)
+
+    asyncio.run(main())
+    # no token was spent: the next SMS still waits about a second, not two
+    assert limiter.reserve(SMS) < 1.5
+
+
+def test_async_client_releases_a_cancelled_probe():
+    httpx = pytest.importorskip("httpx")
+    from notifications_python_client.async_base import AsyncBaseAPIClient
+
+    # the fake clock would stop the event loop's clock too
+    breaker = CircuitBreaker(minimum_calls=1, window_size=1, open_duration=0)
+    slow = True
+
+    async def handle(request):
+        if slow:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json={})
+
+    async def main():
+        nonlocal slow
+        async with AsyncBaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, circuit_breaker=breaker) as client:
+            client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+            breaker.before_call((TEST_HOST, READS))
+            breaker.record((TEST_HOST, READS), http_error(503), 0.1)
+
+            # the probe is cancelled, like a request losing a hedge race
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(client.get("/health"), 0.05)
+            assert breaker.state((TEST_HOST, READS)) == HALF_OPEN
+
+            slow = False
+            await client.get("/health")
+
+    asyncio.run(main())
+    assert breaker.state((TEST_HOST, READS)) == CLOSED
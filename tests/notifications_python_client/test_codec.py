@@ -0,0 +1,88 @@
+import importlib.util
+import json
+from unittest import mock
+
+import pytest
+
+from notifications_python_client import codec
+from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.codec import JSONCodec, OrjsonCodec, UjsonCodec, default_codec
+from notifications_python_client.errors import InvalidResponse
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY, TEST_HOST
+
+CODECS = [
+    pytest.param(JSONCodec, id="json"),
+    pytest.param(
+        OrjsonCodec,
+        id="orjson",
+        marks=pytest.mark.skipif(not importlib.util.find_spec("orjson"), reason="orjson not installed"),
+    ),
+    pytest.param(
+        UjsonCodec,
+        id="ujson",
+        marks=pytest.mark.skipif(not importlib.util.find_spec("ujson"), reason="ujson not installed"),
+    ),
+]
+
+DATA = {"name": "Envoi été", "rows": [["email address", "nom"], ["a@b.c", "Zoé"]], "url": "https://a/b", "count": 2}
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_codec_encodes_compact_utf8_bytes(codec_class):
+    encoded = codec_class().dumps(DATA)
+
+    assert encoded == json.dumps(DATA, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_codec_uses_default_hook(codec_class):
+    encoded = codec_class().dumps({"list": {1}}, default=list)
+
+    assert json.loads(encoded) == {"list": [1]}
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_codec_decodes_bytes(codec_class):
+    assert codec_class().loads(json.dumps(DATA).encode()) == DATA
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+@pytest.mark.parametrize("data", [b"", b"Internal Error", b'{"a":'])
+def test_codec_raises_value_error_for_invalid_json(codec_class, data):
+    with pytest.raises(ValueError):
+        codec_class().loads(data)
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_client_sends_and_receives_through_codec(rmock, codec_class):
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, json_codec=codec_class())
+    rmock.post(f"{TEST_HOST}/v2/notifications/bulk", json={"data": {"id": "1"}})
+
+    assert client.post("/v2/notifications/bulk", data={"rows": {("a", "b")}}) == {"data": {"id": "1"}}
+    assert rmock.last_request.body == b'{"rows":[["a","b"]]}'
+
+
+@pytest.mark.parametrize("codec_class", CODECS)
+def test_client_raises_invalid_response_through_codec(rmock, codec_class):
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, json_codec=codec_class())
+    rmock.get(f"{TEST_HOST}/", text="Internal Error")
+
+    with pytest.raises(InvalidResponse):
+        client.get("/")
+
+
+def test_default_codec_prefers_fastest_installed():
+    with mock.patch.object(codec, "_default_codec", None):
+        expected = (
+            "orjson" if importlib.util.find_spec("orjson") else "ujson" if importlib.util.find_spec("ujson") else "json"
+        )
+        assert default_codec().name == expected
+        assert default_codec() is default_codec()
+
+
+def test_default_codec_falls_back_to_stdlib():
+    with (
+        mock.patch.object(codec, "_default_codec", None),
+        mock.patch.dict("sys.modules", {"orjson": None, "ujson": None}),
+    ):
+        assert type(default_codec()) is JSONCodec
@@ -0,0 +1,149 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from notifications_python_client import compression
+from notifications_python_client.compression import RequestCompression, available_encodings
+from notifications_python_client.notifications import NotificationsAPIClient
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY
+
+ROWS = [["email address", "name", "reference"]] + [
+    [f"user{i}@example.com", f"User {i}", f"ref-{i}"] for i in range(500)
+]
+
+
+def decompress(encoding, body):
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "zstd":
+        return compression.zstandard.ZstdDecompressor().decompress(body)
+    return compression.brotli.decompress(body)
+
+
+ENCODINGS = [
+    pytest.param("gzip"),
+    pytest.param("zstd", marks=pytest.mark.skipif(compression.zstandard is None, reason="zstandard not installed")),
+    pytest.param("br", marks=pytest.mark.skipif(compression.brotli is None, reason="brotli not installed")),
+]
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_compress_round_trips(encoding):
+    body = json.dumps(ROWS).encode()
+
+    compressed = RequestCompression(encoding).compress(body)
+
+    assert len(compressed) < len(body) / 4
+    assert decompress(encoding, compressed) == body
+
+
+def test_compress_leaves_small_bodies_alone():
+    assert RequestCompression(min_size=100).compress(b"x" * 99) is None
+    assert RequestCompression(min_size=100).compress(b"x" * 100) is not None
+
+
+def test_compress_uses_level():
+    body = json.dumps(ROWS).encode()
+
+    assert RequestCompression(level=1).compress(body) == gzip.compress(body, compresslevel=1, mtime=0)
+    assert RequestCompression().level == 6
+
+
+def test_gzip_output_is_deterministic():
+    body = json.dumps(ROWS).encode()
+
+    assert RequestCompression().compress(body) == RequestCompression().compress(body)
+
+
+def test_rejects_unknown_encoding():
+    with pytest.raises(ValueError):
+        RequestCompression("lzma")
+
+
+def test_rejects_unavailable_encoding(mocker):
+    mocker.patch.object(compression, "zstandard", None)
+
+    assert "zstd" not in available_encodings()
+    with pytest.raises(ImportError):
+        RequestCompression("zstd")
+
+
+def test_rejects_negative_min_size():
+    with pytest.raises(ValueError, match="min_size must not be negative"):
+        RequestCompression(min_size=-1)
+    assert RequestCompression(min_size=0).compress(b"") is not None
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_bulk_send_is_compressed(stub_server, encoding):
+    client = NotificationsAPIClient(
+        base_url=stub_server.url,
+        api_key=COMBINED_API_KEY,
+        client_id=CLIENT_ID,
+        request_compression=RequestCompression(encoding),
+    )
+
+    client.send_bulk_notifications("456", "bulk", rows=ROWS)
+
+    _, _, headers, body = stub_server.received[0]
+    assert headers["Content-Encoding"] == encoding
+    assert json.loads(decompress(encoding, body)) == {"template_id": "456", "name": "bulk", "rows": ROWS}
+
+
+def test_small_request_is_not_compressed(stub_server):
+    client = NotificationsAPIClient(
+        base_url=stub_server.url,
+        api_key=COMBINED_API_KEY,
+        client_id=CLIENT_ID,
+        request_compression=RequestCompression(),
+    )
+
+    client.send_sms_notification("+15145550123", "456")
+
+    _, _, headers, body = stub_server.received[0]
+    assert "Content-Encoding" not in headers
+    assert json.loads(body) == {"phone_number": "+15145550123", "template_id": "456"}
+
+
+def test_requests_are_not_compressed_by_default(stub_server):
+    client = NotificationsAPIClient(base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID)
+
+    client.send_bulk_notifications("456", "bulk", rows=ROWS)
+
+    assert "Content-Encoding" not in stub_server.received[0][2]
+
+
+def test_compressed_response_is_negotiated_and_decoded(stub_server):
+    stub_server.gzip_responses = True
+    stub_server.response_json = {"notifications": [{"id": i} for i in range(100)], "links": {}}
+    client = NotificationsAPIClient(base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID)
+
+    assert client.get_all_notifications() == stub_server.response_json
+    with client.get_all_notifications(stream=True) as page:
+        assert list(page) == stub_server.response_json["notifications"]
+    assert "gzip" in stub_server.received[0][2]["Accept-Encoding"]
+
+
+def test_async_client_compresses_and_negotiates(stub_server):
+    pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    stub_server.gzip_responses = True
+    stub_server.response_json = {"id": "bulk-1"}
+
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=stub_server.url,
+            api_key=COMBINED_API_KEY,
+            client_id=CLIENT_ID,
+            request_compression=RequestCompression(),
+        ) as client:
+            return await client.send_bulk_notifications("456", "bulk", rows=ROWS)
+
+    assert asyncio.run(main()) == {"id": "bulk-1"}
+    _, _, headers, body = stub_server.received[0]
+    assert headers["Content-Encoding"] == "gzip"
+    assert "gzip" in headers["Accept-Encoding"]
+    assert json.loads(gzip.decompress(body))["rows"] == ROWS
@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from notifications_python_client.notifications import NotificationsAPIClient
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY
+
+THREADS = 16
+REQUESTS_PER_THREAD = 20
+
+
+@pytest.mark.parametrize("session_per_thread", [False, True], ids=["shared session", "session per thread"])
+def test_client_can_be_shared_between_threads(stub_server, session_per_thread):
+    client = NotificationsAPIClient(
+        base_url=stub_server.url + "/",
+        api_key=COMBINED_API_KEY,
+        client_id=CLIENT_ID,
+        pool_maxsize=THREADS,
+        session_per_thread=session_per_thread,
+    )
+    stub_server.response_json = {"id": "ok"}
+    barrier = threading.Barrier(THREADS)
+
+    def worker(thread_number):
+        barrier.wait()
+        return [client.get_notification_by_id(f"{thread_number}-{i}")["id"] for i in range(REQUESTS_PER_THREAD)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        results = list(executor.map(worker, range(THREADS)))
+
+    assert results == [["ok"] * REQUESTS_PER_THREAD] * THREADS
+    assert sorted(path for _, path, _, _ in stub_server.received) == sorted(
+        f"/v2/notifications/{t}-{i}" for t in range(THREADS) for i in range(REQUESTS_PER_THREAD)
+    )
+    assert all(headers["Authorization"].startswith("Bearer ") for _, _, headers, _ in stub_server.received)
+    assert client.base_url == stub_server.url
+    assert client.pool_stats().created <= THREADS
+
+
+def test_session_per_thread_gives_each_thread_its_own_session():
+    client = NotificationsAPIClient(base_url="http://test-host", api_key=COMBINED_API_KEY, session_per_thread=True)
+    sessions = []
+
+    thread = threading.Thread(target=lambda: sessions.append(client.request_session))
+    thread.start()
+    thread.join()
+
+    assert client.request_session is client.request_session
+    assert sessions[0] is not client.request_session
+    assert sessions[0].get_adapter("http://test-host") is client.request_session.get_adapter("http://test-host")
+
+
+def test_shared_session_is_the_same_for_all_threads():
+    client = NotificationsAPIClient(base_url="http://test-host", api_key=COMBINED_API_KEY)
+    sessions = []
+
+    thread = threading.Thread(target=lambda: sessions.append(client.request_session))
+    thread.start()
+    thread.join()
+
+    assert sessions[0] is client.request_session
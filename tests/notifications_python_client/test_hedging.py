@@ -0,0 +1,265 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from notifications_python_client.errors import HTTPError
+from notifications_python_client.hedging import CachedThreadPool, HedgeStats, HedgingPolicy
+from notifications_python_client.metrics import MetricsRegistry
+from notifications_python_client.tracing import InMemorySpanExporter, Tracer
+from notifications_python_client.transport import InProcessTransport
+from tests.conftest import COMBINED_API_KEY, make_client
+
+BASE_URL = "http://localhost"
+NOTIFICATION_ID = "3d1ce039-5476-414c-99b2-fac1e6add62c"
+# a request with this delay only completes when the test ends
+STALLED = None
+
+
+class Handler:
+    """
+    Answers the n-th request with {"call": n} after delays[n] seconds, and status statuses[n];
+    the last delay and status are used for any further request.
+    """
+
+    def __init__(self, delays, statuses=(200,)):
+        self.delays = delays
+        self.statuses = statuses
+        self.calls = []
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, method, url, headers, body):
+        with self._lock:
+            index = len(self.calls)
+            self.calls.append((method, url, headers))
+        delay = self.delays[min(index, len(self.delays) - 1)]
+        if delay is STALLED:
+            self.release.wait(5)
+        else:
+            time.sleep(delay)
+        status_code = self.statuses[min(index, len(self.statuses) - 1)]
+        return status_code, {"Content-Type": "application/json"}, json.dumps({"call": index}).encode()
+
+
+@pytest.fixture
+def handler():
+    handlers = []
+
+    def create(delays, statuses=(200,)):
+        handlers.append(Handler(delays, statuses))
+        return handlers[-1]
+
+    yield create
+    for created in handlers:
+        created.release.set()
+
+
+def hedged_client(handler, policy, **kwargs):
+    return make_client(BASE_URL, transport=InProcessTransport(handler), hedging=policy, **kwargs)
+
+
+def test_policy_only_hedges_get_requests_to_its_paths():
+    policy = HedgingPolicy()
+
+    assert policy.endpoint("GET", f"/v2/notifications/{NOTIFICATION_ID}") == "/v2/notifications/"
+    assert policy.endpoint("GET", "/v2/template/456/version/2") == "/v2/template/"
+    assert policy.endpoint("GET", "/v2/notifications") is None
+    assert policy.endpoint("GET", "/v2/templates") is None
+    assert policy.endpoint("POST", "/v2/template/456/preview") is None
+
+
+def test_policy_delay_is_fixed_or_the_observed_percentile():
+    assert HedgingPolicy(delay=0.2).hedge_delay("/v2/template/") == 0.2
+
+    policy = HedgingPolicy(percentile=0.9, initial_delay=1, min_samples=10, min_delay=0.05)
+    for latency in range(1, 10):
+        policy.observe("/v2/template/", latency / 100)
+    assert policy.hedge_delay("/v2/template/") == 1
+
+    policy.observe("/v2/template/", 0.1)
+    assert policy.hedge_delay("/v2/template/") == pytest.approx(0.09)
+    assert policy.hedge_delay("/v2/notifications/") == 1
+
+    for _ in range(100):
+        policy.observe("/v2/template/", 0.001)
+    assert policy.hedge_delay("/v2/template/") == 0.05
+
+
+def test_policy_budget_limits_hedges():
+    policy = HedgingPolicy(budget=0.25, max_burst=1)
+
+    hedged = []
+    for _ in range(8):
+        policy.hedge_delay("/v2/template/")
+        hedged.append(policy.acquire())
+
+    assert hedged == [True, False, False, False, True, False, False, False]
+    assert policy.stats() == HedgeStats(calls=8, hedges=2, wins=0, throttled=6)
+    assert policy.stats().hedge_rate == 0.25
+
+
+def test_slow_request_is_hedged_and_the_first_response_returned(handler):
+    slow_first = handler([STALLED, 0])
+    policy = HedgingPolicy(delay=0.05)
+    registry = MetricsRegistry()
+    client = hedged_client(slow_first, policy, metrics=registry)
+
+    start = time.monotonic()
+    assert client.get_notification_by_id(NOTIFICATION_ID) == {"call": 1}
+
+    assert time.monotonic() - start < 1
+    assert [call[:2] for call in slow_first.calls] == [("GET", f"{BASE_URL}/v2/notifications/{NOTIFICATION_ID}")] * 2
+    assert slow_first.calls[1][2]["Authorization"] == slow_first.calls[0][2]["Authorization"]
+    assert policy.stats() == HedgeStats(calls=1, hedges=1, wins=1, throttled=0)
+    assert registry.get("GET", "reads").hedges == 1
+
+
+def test_fast_request_is_not_hedged(handler):
+    fast = handler([0])
+    policy = HedgingPolicy(delay=0.5)
+
+    assert hedged_client(fast, policy).get_template("456") == {"call": 0}
+
+    assert len(fast.calls) == 1
+    assert policy.stats() == HedgeStats(calls=1, hedges=0, wins=0, throttled=0)
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda client: client.get_all_templates(),
+        lambda client: client.send_sms_notification("+15145550123", "456"),
+        lambda client: list(client.get_all_notifications(stream=True)),
+    ],
+)
+def test_other_requests_are_not_hedged(handler, call):
+    slow = handler([0.05])
+    policy = HedgingPolicy(delay=0)
+
+    call(hedged_client(slow, policy))
+
+    assert len(slow.calls) == 1
+    assert policy.stats().calls == 0
+
+
+def test_no_hedge_is_sent_once_the_budget_is_spent(handler):
+    slow = handler([0.1])
+    policy = HedgingPolicy(delay=0.01, max_burst=0)
+
+    assert hedged_client(slow, policy).get_template("456") == {"call": 0}
+
+    assert len(slow.calls) == 1
+    assert policy.stats() == HedgeStats(calls=1, hedges=0, wins=0, throttled=1)
+
+
+def test_failed_hedge_waits_for_the_first_request(handler):
+    slow_then_failing = handler([0.2, 0], statuses=(200, 500))
+    policy = HedgingPolicy(delay=0.05)
+
+    assert hedged_client(slow_then_failing, policy).get_template("456") == {"call": 0}
+
+    assert policy.stats().wins == 0
+
+
+def test_error_of_the_first_request_is_raised_when_both_fail(handler):
+    both_failing = handler([0.2, 0], statuses=(503, 500))
+
+    with pytest.raises(HTTPError) as e:
+        hedged_client(both_failing, HedgingPolicy(delay=0.05)).get_template("456")
+
+    assert e.value.status_code == 503
+
+
+def test_hedged_calls_are_not_queued_behind_each_other():
+    callers = 64
+    # every request waits until all callers have a request in flight
+    barrier = threading.Barrier(callers, timeout=5)
+
+    def handle(method, url, headers, body):
+        barrier.wait()
+        return 200, {"Content-Type": "application/json"}, b"{}"
+
+    client = hedged_client(handle, HedgingPolicy(delay=10), pool_maxsize=4)
+    responses = []
+
+    def call():
+        responses.append(client.get_template("456"))
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(responses) == callers
+    client.close()
+
+
+def test_cached_thread_pool_reuses_idle_workers():
+    pool = CachedThreadPool("test-pool", idle_timeout=0.2)
+
+    names = [pool.submit(lambda: threading.current_thread().name).result() for _ in range(3)]
+    assert names == ["test-pool_1"] * 3
+
+    release = threading.Event()
+    blocked = [pool.submit(release.wait, 5) for _ in range(3)]
+    # no call waits for a busy worker
+    assert pool.submit(lambda: threading.current_thread().name).result(1) == "test-pool_4"
+    release.set()
+    assert all(future.result(1) for future in blocked)
+
+    time.sleep(0.5)
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("test-pool")]
+    pool.shutdown()
+    with pytest.raises(RuntimeError):
+        pool.submit(print)
+
+
+def test_hedge_spans_nest_under_the_call(handler):
+    exporter = InMemorySpanExporter()
+    client = hedged_client(handler([STALLED, 0]), HedgingPolicy(delay=0.05), tracer=Tracer(exporter))
+
+    client.get_template("456")
+
+    request = next(span for span in exporter.get_finished_spans() if span.name == "notifications.request")
+    sends = [span for span in exporter.get_finished_spans() if span.name == "notifications.send"]
+    hedge = next(span for span in sends if span.attributes.get("notifications.hedge"))
+    assert hedge.parent_id == request.span_id
+    assert hedge.trace_id == request.trace_id
+
+
+def test_async_client_cancels_the_request_that_lost():
+    httpx = pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    calls = []
+    cancelled = []
+
+    async def handle(request):
+        calls.append(request)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(request)
+                raise
+        return httpx.Response(200, json={"call": len(calls) - 1})
+
+    policy = HedgingPolicy(delay=0.05)
+    registry = MetricsRegistry()
+
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=BASE_URL, api_key=COMBINED_API_KEY, hedging=policy, metrics=registry
+        ) as client:
+            client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+            return await client.get_template("456")
+
+    assert asyncio.run(main()) == {"call": 1}
+    assert cancelled == [calls[0]]
+    assert policy.stats() == HedgeStats(calls=1, hedges=1, wins=1, throttled=0)
+    # the cancelled request is not recorded
+    assert registry.get("GET", "reads").responses == {200: 1}
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from notifications_python_client.errors import HTTP429Error, HTTP503Error, HTTPError
+from notifications_python_client.notifications import NotificationsAPIClient
+from notifications_python_client.transport import TransportError, TransportTimeout
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY, make_client
+
+pytest.importorskip("h2")
+httpx = pytest.importorskip("httpx")
+
+TEMPLATES = "/v2/templates"
+
+
+def test_http2_prior_knowledge_sends_requests_over_http2(asgi_stub_server):
+    asgi_stub_server.response_json = {"templates": []}
+    client = make_client(asgi_stub_server.url, http2=True, http1=False)
+
+    assert client.get_all_templates() == {"templates": []}
+    assert client.send_sms_notification("+15145550123", "456", reference="ref") == {"templates": []}
+
+    assert asgi_stub_server.http_versions == ["2", "2"]
+    method, path, headers, body = asgi_stub_server.received[1]
+    assert (method, path) == ("POST", "/v2/notifications/sms")
+    assert headers["authorization"].startswith("Bearer ")
+    assert headers["user-agent"].startswith("NOTIFY-API-PYTHON-CLIENT/")
+    assert json.loads(body)["reference"] == "ref"
+
+
+def test_http2_with_http1_negotiates_and_falls_back_to_http1_over_cleartext(asgi_stub_server):
+    client = make_client(asgi_stub_server.url, http2=True)
+
+    client.get_all_templates()
+
+    assert asgi_stub_server.http_versions == ["1.1"]
+
+
+def test_http2_multiplexes_concurrent_requests_on_one_connection(asgi_stub_server):
+    asgi_stub_server.delay = threading.Event()
+    client = make_client(asgi_stub_server.url, http2=True, http1=False, pool_maxsize=1)
+
+    with ThreadPoolExecutor(50) as executor:
+        futures = [executor.submit(client.get_all_templates) for _ in range(50)]
+        # hold the responses until every request is in flight
+        deadline = time.monotonic() + 5
+        while len(asgi_stub_server.received) < 50 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        asgi_stub_server.delay.set()
+        for future in futures:
+            future.result()
+
+    assert len(asgi_stub_server.connections) == 1
+
+
+@pytest.mark.parametrize(
+    "status_code, error_class",
+    [(400, HTTPError), (404, HTTPError), (429, HTTP429Error), (500, HTTPError), (503, HTTP503Error)],
+)
+def test_http2_errors_match_default_transport(asgi_stub_server, status_code, error_class):
+    asgi_stub_server.status_code = status_code
+    asgi_stub_server.response_json = {"errors": [{"error": "Error", "message": f"Failed with {status_code}"}]}
+    errors = []
+    for kwargs in ({}, {"http2": True, "http1": False}):
+        with pytest.raises(HTTPError) as e:
+            make_client(asgi_stub_server.url, **kwargs).get_all_templates()
+        errors.append(e.value)
+
+    default, http2 = errors
+    assert type(default) is type(http2) is error_class
+    assert (http2.status_code, http2.message) == (default.status_code, default.message)
+    assert http2.message == [{"error": "Error", "message": f"Failed with {status_code}"}]
+
+
+def test_http2_connection_errors_are_mapped_like_the_default_transport():
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{unused.getsockname()[1]}"
+
+    with pytest.raises(HTTPError) as e:
+        NotificationsAPIClient(base_url=url, api_key=COMBINED_API_KEY, http2=True, http1=False).get_all_templates()
+
+    assert type(e.value) is HTTP503Error
+    assert (e.value.status_code, e.value.message) == (503, "Request failed")
+    assert isinstance(e.value.__cause__, TransportError)
+    assert isinstance(e.value.__cause__.__cause__, httpx.ConnectError)
+
+
+def test_http2_timeouts_are_mapped_and_counted(asgi_stub_server, mocker):
+    asgi_stub_server.delay = threading.Event()
+    sink = mocker.Mock()
+    client = make_client(asgi_stub_server.url, http2=True, http1=False, timeout=0.2, metrics=sink)
+
+    try:
+        with pytest.raises(HTTP503Error) as e:
+            client.get_all_templates()
+    finally:
+        asgi_stub_server.delay.set()
+
+    assert isinstance(e.value.__cause__, TransportTimeout)
+    assert isinstance(e.value.__cause__.__cause__, httpx.TimeoutException)
+    sample = sink.record.call_args[0][0]
+    assert (sample.status_code, sample.timed_out) == (None, True)
+
+
+def test_http2_streams_notification_pages(asgi_stub_server):
+    asgi_stub_server.response_json = {"notifications": [{"id": 1}, {"id": 2}], "links": {"next": "n"}}
+    client = make_client(asgi_stub_server.url, http2=True, http1=False)
+
+    with client.get_all_notifications(stream=True) as page:
+        assert list(page) == [{"id": 1}, {"id": 2}]
+        assert page.get("links") == {"next": "n"}
+
+    assert asgi_stub_server.http_versions == ["2"]
+
+
+def test_http2_prepared_requests_match_default_requests(asgi_stub_server):
+    def call(client):
+        client.get_all_notifications(status="delivered")
+        client.send_email_notification("a@b.c", "456", personalisation={"nom": "Zoé"})
+
+    call(make_client(asgi_stub_server.url, http2=True, http1=False, prepared_requests=True))
+    prepared = asgi_stub_server.received[:]
+    asgi_stub_server.received.clear()
+    call(make_client(asgi_stub_server.url, http2=True, http1=False))
+
+    assert [request[:2] + request[3:] for request in prepared] == [
+        request[:2] + request[3:] for request in asgi_stub_server.received
+    ]
+
+
+def test_http2_close_closes_the_http2_client(asgi_stub_server):
+    client = make_client(asgi_stub_server.url, http2=True)
+
+    client.close()
+
+    assert client.transport.is_closed
+
+
+def test_http2_requires_h2(mocker):
+    mocker.patch("notifications_python_client.httpx_transport.h2", None)
+
+    with pytest.raises(ImportError, match=r"notification-python-client\[http2\]"):
+        NotificationsAPIClient(base_url="http://localhost", api_key=COMBINED_API_KEY, http2=True)
+
+
+def test_async_client_sends_requests_over_http2(asgi_stub_server):
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    asgi_stub_server.routes[("GET", TEMPLATES)] = (200, {"templates": []})
+    asgi_stub_server.routes[("GET", "/v2/notifications/1")] = (404, {"message": "Not found"})
+
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=asgi_stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, http2=True, http1=False
+        ) as client:
+            results = await asyncio.gather(*[client.get_all_templates() for _ in range(5)])
+            with pytest.raises(HTTPError) as e:
+                await client.get_notification_by_id("1")
+            return results, e.value
+
+    results, error = asyncio.run(main())
+
+    assert results == [{"templates": []}] * 5
+    assert (error.status_code, error.message) == (404, "Not found")
+    assert asgi_stub_server.http_versions == ["2"] * 6
+    assert len(asgi_stub_server.connections) == 1
@@ -0,0 +1,243 @@
+import asyncio
+import threading
+import types
+
+import pytest
+import requests
+
+from notifications_python_client.errors import HTTP503Error, HTTPError
+from notifications_python_client.idempotency import (
+    IdempotencyStats,
+    IdempotencyStore,
+    idempotency_key_for,
+)
+from notifications_python_client.retry import RetryPolicy
+from tests.conftest import COMBINED_API_KEY, SERVICE_ID, TEST_HOST, http_error, make_client
+
+
+class Call:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+SMS = {"phone_number": "+15145550123", "template_id": "456", "reference": "ref"}
+
+
+def test_key_derived_from_reference_is_stable():
+    key = idempotency_key_for(SERVICE_ID, "sms", "ref", SMS)
+
+    assert key == idempotency_key_for(SERVICE_ID, "sms", "ref", dict(reversed(SMS.items())))
+    assert key != idempotency_key_for(SERVICE_ID, "email", "ref", SMS)
+    assert key != idempotency_key_for("other-service", "sms", "ref", SMS)
+    assert key != idempotency_key_for(SERVICE_ID, "sms", "ref", dict(SMS, phone_number="+15145550124"))
+    assert key != idempotency_key_for(SERVICE_ID, "sms", "ref", dict(SMS, personalisation={"nom": "Zoé"}))
+
+
+def test_store_replays_the_first_response():
+    store = IdempotencyStore()
+    call = Call({"id": "1"})
+
+    first = store.call("key", call)
+    replayed = store.call("key", call)
+
+    assert first == replayed == {"id": "1"}
+    assert replayed is not first
+    assert call.count == 1
+    assert store.stats() == IdempotencyStats(sent=1, replayed=1, size=1)
+
+
+def test_store_replays_errors_of_requests_that_were_processed():
+    store = IdempotencyStore()
+    error = http_error(400)
+    call = Call(error)
+
+    for _ in range(2):
+        with pytest.raises(HTTPError) as e:
+            store.call("key", call)
+        assert e.value is error
+
+    assert call.count == 1
+
+
+@pytest.mark.parametrize("status_code", [None, 429, 500, 503])
+def test_store_sends_again_after_transient_errors(status_code):
+    store = IdempotencyStore()
+    call = Call(http_error(status_code), {"id": "1"})
+
+    with pytest.raises(HTTPError):
+        store.call("key", call)
+
+    assert store.call("key", call) == {"id": "1"}
+    assert call.count == 2
+
+
+def test_concurrent_call_waits_for_the_call_in_flight():
+    store = IdempotencyStore()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def send():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"id": "1"}
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(store.call("key", send)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: results.append(store.call("key", send)))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert results == [{"id": "1"}, {"id": "1"}]
+    assert len(calls) == 1
+
+
+def test_store_rejects_a_key_sent_with_another_request():
+    store = IdempotencyStore()
+    store.call("key", Call({"id": "1"}), fingerprint="a")
+
+    with pytest.raises(ValueError):
+        store.call("key", Call({"id": "2"}), fingerprint="b")
+    assert store.stats() == IdempotencyStats(sent=1, replayed=0, size=1)
+
+
+def test_store_is_bounded(mocker):
+    clock = types.SimpleNamespace(now=0.0)
+    mocker.patch("notifications_python_client.idempotency.time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    store = IdempotencyStore(max_size=2, ttl=10)
+
+    for key in ("a", "b", "c"):
+        store.call(key, Call(key))
+    assert store.stats().size == 2
+    assert store.call("a", Call("sent again")) == "sent again"
+
+    clock.now += 10
+    assert store.call("c", Call("expired")) == "expired"
+    assert store.stats().size == 1
+
+
+def test_notification_with_reference_is_only_sent_once(rmock):
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", json={"id": "1"})
+    client = make_client(idempotency=IdempotencyStore())
+
+    responses = [client.send_sms_notification("+15145550123", "456", reference="ref") for _ in range(2)]
+
+    assert responses == [{"id": "1"}, {"id": "1"}]
+    assert rmock.call_count == 1
+    assert rmock.last_request.headers["Idempotency-Key"] == idempotency_key_for(SERVICE_ID, "sms", "ref", SMS)
+
+
+def test_notifications_sharing_a_reference_are_all_sent(rmock):
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", [{"json": {"id": "1"}}, {"json": {"id": "2"}}])
+    client = make_client(idempotency=IdempotencyStore())
+
+    first = client.send_sms_notification("+15145550001", "tpl", reference="campaign-42")
+    second = client.send_sms_notification("+15145550002", "tpl-other", reference="campaign-42")
+
+    assert [first, second] == [{"id": "1"}, {"id": "2"}]
+    assert rmock.call_count == 2
+
+
+def test_key_reused_for_another_notification_is_an_error(rmock):
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", json={"id": "1"})
+    client = make_client(idempotency=IdempotencyStore())
+    client.send_sms_notification("+15145550001", "456", idempotency_key="my-key")
+
+    with pytest.raises(ValueError, match="my-key"):
+        client.send_sms_notification("+15145550002", "456", idempotency_key="my-key")
+
+    assert rmock.call_count == 1
+
+
+def test_notifications_without_reference_get_a_key_per_call(rmock):
+    rmock.post(f"{TEST_HOST}/v2/notifications/email", json={"id": "1"})
+    client = make_client(idempotency=IdempotencyStore())
+
+    client.send_email_notification("a@example.com", "456")
+    client.send_email_notification("a@example.com", "456")
+
+    keys = [request.headers["Idempotency-Key"] for request in rmock.request_history]
+    assert len(set(keys)) == 2
+
+
+def test_key_is_only_sent_when_given_without_a_store(rmock):
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", json={"id": "1"})
+    client = make_client()
+
+    client.send_sms_notification("+15145550123", "456", reference="ref")
+    client.send_sms_notification("+15145550123", "456", reference="ref", idempotency_key="my-key")
+
+    assert [request.headers.get("Idempotency-Key") for request in rmock.request_history] == [None, "my-key"]
+
+
+def test_post_with_a_key_is_retried_with_the_same_key(rmock, mocker):
+    mocker.patch("notifications_python_client.base.time.sleep")
+    rmock.post(
+        f"{TEST_HOST}/v2/notifications/sms", [{"exc": requests.ConnectTimeout}, {"status_code": 503}, {"json": {}}]
+    )
+    client = make_client(
+        idempotency=IdempotencyStore(), retry_policy=RetryPolicy(max_attempts=3, retry_idempotency_keys=True)
+    )
+
+    client.send_sms_notification("+15145550123", "456", reference="ref")
+
+    assert rmock.call_count == 3
+    assert len({request.headers["Idempotency-Key"] for request in rmock.request_history}) == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"retry_policy": RetryPolicy(max_attempts=3, retry_idempotency_keys=True)},
+        # the API is not known to honour the key
+        {"retry_policy": RetryPolicy(max_attempts=3), "idempotency": IdempotencyStore()},
+    ],
+)
+def test_post_is_only_retried_with_a_key_and_retry_idempotency_keys(rmock, mocker, kwargs):
+    mocker.patch("notifications_python_client.base.time.sleep")
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", [{"status_code": 503}, {"json": {}}])
+    client = make_client(**kwargs)
+
+    with pytest.raises(HTTP503Error):
+        client.send_sms_notification("+15145550123", "456", reference="ref")
+
+    assert rmock.call_count == 1
+
+
+def test_async_concurrent_sends_share_one_request():
+    httpx = pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    received = []
+
+    async def handle(request):
+        received.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(201, json={"id": "1"})
+
+    store = IdempotencyStore()
+
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=TEST_HOST, api_key=COMBINED_API_KEY, idempotency=store
+        ) as client:
+            client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+            return await asyncio.gather(
+                *(client.send_email_notification("a@example.com", "456", reference="ref") for _ in range(3))
+            )
+
+    assert asyncio.run(main()) == [{"id": "1"}] * 3
+    assert len(received) == 1
+    assert store.stats() == IdempotencyStats(sent=1, replayed=2, size=1)
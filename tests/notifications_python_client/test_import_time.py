@@ -0,0 +1,71 @@
+import subprocess
+import sys
+
+import pytest
+
+# Budget, in microseconds, for importing the package together with its errors and authentication helpers
+IMPORT_TIME_BUDGET_US = 50_000
+
+HEAVY_MODULES = {"requests", "urllib3", "jwt", "cryptography"}
+
+
+def _import_times(statement):
+    """
+    :return: list of (module, cumulative import time in us, nesting depth) as reported by -X importtime
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        depth = (len(module) - len(module.lstrip())) // 2
+        times.append((module.strip(), int(cumulative), depth))
+    return times
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import notifications_python_client",
+        "from notifications_python_client.errors import HTTPError",
+        "from notifications_python_client.authentication import create_jwt_token, TokenVerifier",
+    ],
+)
+def test_package_import_does_not_load_http_or_jwt_libraries(statement):
+    imported = {module.split(".")[0] for module, _, _ in _import_times(statement)}
+
+    assert not imported & HEAVY_MODULES
+
+
+def test_package_import_is_within_budget():
+    # best of three to smooth out a cold filesystem cache
+    totals = [
+        sum(
+            cumulative
+            for module, cumulative, depth in _import_times("import notifications_python_client.authentication")
+            if depth == 0 and module.startswith("notifications_python_client")
+        )
+        for _ in range(3)
+    ]
+
+    assert min(totals) < IMPORT_TIME_BUDGET_US
+
+
+def test_client_is_imported_on_first_access():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, notifications_python_client as n; "
+            "assert 'requests' not in sys.modules; "
+            "assert n.NotificationsAPIClient.__name__ == 'NotificationsAPIClient'; "
+            "assert 'requests' in sys.modules",
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
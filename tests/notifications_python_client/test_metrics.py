@@ -0,0 +1,210 @@
+import asyncio
+import threading
+
+import pytest
+
+from notifications_python_client.endpoints import READS, SMS
+from notifications_python_client.errors import HTTPError
+from notifications_python_client.metrics import Histogram, MetricsRegistry, MetricsSink, RequestSample
+from notifications_python_client.retry import RetryPolicy
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY, make_client
+
+
+class ListSink(MetricsSink):
+    def __init__(self):
+        self.samples = []
+
+    def record(self, sample):
+        self.samples.append(sample)
+
+
+def sample(**fields):
+    defaults = {
+        "method": "POST",
+        "family": SMS,
+        "status_code": 201,
+        "duration": 0.02,
+        "attempt": 1,
+        "timed_out": False,
+        "request_bytes": 100,
+        "response_bytes": 50,
+        "pool_wait": 0.0005,
+    }
+    return RequestSample(**{**defaults, **fields})
+
+
+def test_histogram_counts_observations_per_bucket():
+    histogram = Histogram([1, 0.1])
+    for value in (0.05, 0.1, 0.5, 2):
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == [(0.1, 2), (1, 3), (float("inf"), 4)]
+    assert histogram.sum == pytest.approx(2.65)
+    assert histogram.count == 4
+
+
+def test_registry_aggregates_per_method_and_family():
+    registry = MetricsRegistry()
+    registry.record(sample())
+    registry.record(sample(status_code=None, attempt=2, timed_out=True, response_bytes=None, pool_wait=None))
+    registry.record(sample(method="GET", family=READS, status_code=200, request_bytes=0))
+
+    sms = registry.get("POST", SMS)
+    assert sms.responses == {201: 1, "error": 1}
+    assert (sms.retries, sms.timeouts, sms.request_bytes, sms.response_bytes) == (1, 1, 200, 50)
+    assert sms.latency.count == 2
+    assert sms.pool_wait.count == 1
+    assert registry.get("GET", READS).responses == {200: 1}
+    assert registry.get("DELETE", READS) is None
+
+    registry.clear()
+    assert registry.get("POST", SMS) is None
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry(prefix="pgn", latency_buckets=(0.1,), pool_wait_buckets=(0.001,))
+    registry.record(sample())
+    registry.record(sample(status_code=429, attempt=2, duration=0.5))
+
+    assert registry.render() == (
+        "# HELP pgn_requests_total API call attempts by response status.\n"
+        "# TYPE pgn_requests_total counter\n"
+        'pgn_requests_total{method="POST",family="sms",status="201"} 1\n'
+        'pgn_requests_total{method="POST",family="sms",status="429"} 1\n'
+        "# HELP pgn_retries_total Attempts that were retries.\n"
+        "# TYPE pgn_retries_total counter\n"
+        'pgn_retries_total{method="POST",family="sms"} 1\n'
+        "# HELP pgn_hedges_total Attempts that were hedges of a slow request.\n"
+        "# TYPE pgn_hedges_total counter\n"
+        'pgn_hedges_total{method="POST",family="sms"} 0\n'
+        "# HELP pgn_timeouts_total Attempts that timed out.\n"
+        "# TYPE pgn_timeouts_total counter\n"
+        'pgn_timeouts_total{method="POST",family="sms"} 0\n'
+        "# HELP pgn_request_bytes_total Request body bytes sent.\n"
+        "# TYPE pgn_request_bytes_total counter\n"
+        'pgn_request_bytes_total{method="POST",family="sms"} 200\n'
+        "# HELP pgn_response_bytes_total Response body bytes received.\n"
+        "# TYPE pgn_response_bytes_total counter\n"
+        'pgn_response_bytes_total{method="POST",family="sms"} 100\n'
+        "# HELP pgn_request_duration_seconds Time until the response headers were received.\n"
+        "# TYPE pgn_request_duration_seconds histogram\n"
+        'pgn_request_duration_seconds_bucket{method="POST",family="sms",le="0.1"} 1\n'
+        'pgn_request_duration_seconds_bucket{method="POST",family="sms",le="+Inf"} 2\n'
+        'pgn_request_duration_seconds_sum{method="POST",family="sms"} 0.52\n'
+        'pgn_request_duration_seconds_count{method="POST",family="sms"} 2\n'
+        "# HELP pgn_pool_wait_seconds Time spent waiting for a pooled connection.\n"
+        "# TYPE pgn_pool_wait_seconds histogram\n"
+        'pgn_pool_wait_seconds_bucket{method="POST",family="sms",le="0.001"} 2\n'
+        'pgn_pool_wait_seconds_bucket{method="POST",family="sms",le="+Inf"} 2\n'
+        'pgn_pool_wait_seconds_sum{method="POST",family="sms"} 0.001\n'
+        'pgn_pool_wait_seconds_count{method="POST",family="sms"} 2\n'
+    )
+
+
+def test_client_records_a_sample_per_request(stub_server):
+    stub_server.response_json = {"id": "1"}
+    sink = ListSink()
+    client = make_client(stub_server.url, metrics=sink)
+
+    client.send_sms_notification("+15145550123", "456")
+    client.get_all_templates()
+
+    post, get = sink.samples
+    assert (post.method, post.family, post.status_code, post.attempt, post.timed_out) == ("POST", SMS, 200, 1, False)
+    assert post.request_bytes == len(stub_server.received[0][3])
+    assert post.response_bytes == len(b'{"id": "1"}')
+    assert post.duration > 0
+    assert post.pool_wait is not None
+    assert (get.method, get.family, get.request_bytes) == ("GET", READS, 0)
+
+
+def test_client_records_retries_and_errors(stub_server, mocker):
+    mocker.patch("time.sleep")
+    stub_server.status_code = 503
+    registry = MetricsRegistry()
+    client = make_client(stub_server.url, metrics=[registry, ListSink()], retry_policy=RetryPolicy(max_attempts=3))
+
+    with pytest.raises(HTTPError):
+        client.get_all_templates()
+
+    metrics = registry.get("GET", READS)
+    assert metrics.responses == {503: 3}
+    assert metrics.retries == 2
+
+
+def test_client_records_timeouts(stub_server):
+    stub_server.delay = threading.Event()
+    sink = ListSink()
+    client = make_client(stub_server.url, metrics=sink, timeout=0.05)
+
+    try:
+        with pytest.raises(HTTPError):
+            client.get_all_templates()
+    finally:
+        stub_server.delay.set()
+
+    assert sink.samples[0].timed_out
+    assert sink.samples[0].status_code is None
+    assert sink.samples[0].response_bytes is None
+
+
+def test_client_records_streamed_responses(stub_server):
+    stub_server.response_json = {"notifications": [{"id": 1}], "links": {}}
+    sink = ListSink()
+    client = make_client(stub_server.url, metrics=sink)
+
+    with client.get_all_notifications(stream=True) as page:
+        list(page)
+
+    assert sink.samples[0].response_bytes == len(b'{"notifications": [{"id": 1}], "links": {}}')
+
+
+def test_failing_sink_does_not_fail_the_request(stub_server, caplog):
+    class FailingSink(MetricsSink):
+        def record(self, sample):
+            raise RuntimeError("boom")
+
+    registry = MetricsRegistry()
+    client = make_client(stub_server.url, metrics=[FailingSink(), registry])
+
+    assert client.get_all_templates() == {}
+    assert registry.get("GET", READS).responses == {200: 1}
+    assert "failed to record" in caplog.text
+
+
+def test_sink_without_record_cannot_be_created():
+    class NoRecordSink(MetricsSink):
+        pass
+
+    with pytest.raises(TypeError, match="record"):
+        NoRecordSink()
+
+
+def test_nothing_is_recorded_without_sinks(stub_server, mocker):
+    client = make_client(stub_server.url)
+    record_metrics = mocker.spy(client, "_record_metrics")
+
+    client.get_all_templates()
+
+    assert client.metrics_sinks == ()
+    record_metrics.assert_not_called()
+
+
+def test_async_client_records_samples(stub_server):
+    pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    sink = ListSink()
+
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, metrics=sink
+        ) as client:
+            await client.send_sms_notification("+15145550123", "456")
+
+    asyncio.run(main())
+
+    (post,) = sink.samples
+    assert (post.method, post.family, post.status_code, post.pool_wait) == ("POST", SMS, 200, None)
+    assert post.request_bytes == len(stub_server.received[0][3])
+    assert post.response_bytes == 2
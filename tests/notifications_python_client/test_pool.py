@@ -0,0 +1,83 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.pool import PooledHTTPAdapter, PoolStats, keepalive_socket_options
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY
+
+
+@pytest.fixture
+def pooled_client(stub_server):
+    yield BaseAPIClient(base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, pool_maxsize=2)
+
+
+def test_pool_stats_are_empty_before_first_request(pooled_client):
+    assert pooled_client.pool_stats() == PoolStats(in_use=0, idle=0, created=0, discarded=0)
+
+
+def test_connections_are_reused_between_requests(pooled_client):
+    for _ in range(5):
+        pooled_client.get("/")
+
+    assert pooled_client.pool_stats() == PoolStats(in_use=0, idle=1, created=1, discarded=0)
+
+
+def test_pool_stats_count_connections_in_use_and_discarded(pooled_client, stub_server):
+    stub_server.delay = threading.Event()
+    threads = [threading.Thread(target=pooled_client.get, args=("/",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+
+    while len(stub_server.received) < 4:
+        time.sleep(0.001)
+    assert pooled_client.pool_stats() == PoolStats(in_use=4, idle=0, created=4, discarded=0)
+
+    stub_server.delay.set()
+    for thread in threads:
+        thread.join()
+
+    # only pool_maxsize connections can be kept once they are all released
+    assert pooled_client.pool_stats() == PoolStats(in_use=0, idle=2, created=4, discarded=2)
+
+
+def test_blocking_pool_never_exceeds_maxsize(stub_server):
+    client = BaseAPIClient(
+        base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, pool_maxsize=2, pool_block=True
+    )
+    threads = [threading.Thread(target=client.get, args=("/",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.pool_stats() == PoolStats(in_use=0, idle=2, created=2, discarded=0)
+    assert len(stub_server.received) == 8
+
+
+def test_adapter_is_configured_from_client_settings():
+    client = BaseAPIClient(
+        base_url="https://example.com", api_key=COMBINED_API_KEY, pool_maxsize=50, pool_block=True, max_retries=3
+    )
+
+    adapter = client.request_session.get_adapter("https://example.com/")
+    assert adapter is client.http_adapter
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == 50
+    assert adapter.poolmanager.connection_pool_kw["block"] is True
+    assert adapter.max_retries.total == 3
+
+
+def test_tcp_keepalive_sets_socket_options():
+    adapter = PooledHTTPAdapter(tcp_keepalive=60)
+
+    socket_options = adapter.poolmanager.connection_pool_kw["socket_options"]
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in socket_options
+    assert socket_options == keepalive_socket_options(60)
+
+
+def test_tcp_keepalive_is_disabled_by_default():
+    adapter = PooledHTTPAdapter()
+
+    assert "socket_options" not in adapter.poolmanager.connection_pool_kw
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from notifications_python_client.compression import RequestCompression
+from notifications_python_client.errors import HTTPError
+from notifications_python_client.notifications import NotificationsAPIClient
+from notifications_python_client.retry import RetryPolicy
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY
+
+CALLS = [
+    lambda client: client.send_sms_notification("+15145550123", "456", personalisation={"nom": "Zoé"}),
+    lambda client: client.send_bulk_notifications("456", "bulk", rows=[["email address"], ["a@b.c"]]),
+    lambda client: client.get_notification_by_id("3d1ce039-5476-414c-99b2-fac1e6add62c"),
+    lambda client: client.get_all_notifications(status="delivered", template_type="sms"),
+    lambda client: client.get_all_templates(),
+    lambda client: client.delete("/v2/resource"),
+    lambda client: client.put("/v2/resource", data={"a": 1}),
+]
+
+
+def received(stub_server, call, **client_kwargs):
+    stub_server.received.clear()
+    client = NotificationsAPIClient(
+        base_url=f"{stub_server.url}/pgn/", api_key=COMBINED_API_KEY, client_id=CLIENT_ID, **client_kwargs
+    )
+    call(client)
+    call(client)
+    return [normalise(request) for request in stub_server.received]
+
+
+def normalise(request):
+    # tokens signed in different seconds differ, so only check one was sent
+    method, path, headers, body = request
+    headers = {name.lower(): value for name, value in headers.items()}
+    assert headers.pop("authorization").startswith("Bearer ")
+    return method, path, headers, body
+
+
+@pytest.mark.parametrize("call", CALLS)
+def test_prepared_requests_match_default_requests(stub_server, call):
+    stub_server.response_json = {"id": "1"}
+
+    assert received(stub_server, call, prepared_requests=True) == received(stub_server, call)
+
+
+def test_prepared_requests_match_default_requests_with_compression(stub_server):
+    rows = [["email address"]] + [[f"user{i}@example.com"] for i in range(200)]
+    kwargs = {"request_compression": RequestCompression(min_size=100)}
+
+    def call(client):
+        return client.send_bulk_notifications("456", "bulk", rows=rows)
+
+    prepared = received(stub_server, call, prepared_requests=True, **kwargs)
+
+    assert prepared == received(stub_server, call, **kwargs)
+    assert prepared[0][2]["content-encoding"] == "gzip"
+
+
+def test_prepared_requests_add_client_id_for_pggapi(mocker):
+    client = NotificationsAPIClient(
+        base_url="https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn",
+        api_key=COMBINED_API_KEY,
+        client_id=CLIENT_ID,
+        prepared_requests=True,
+    )
+
+    url, kwargs = client._create_request_objects("/v2/notifications", None, {"status": "sent"})
+
+    assert url == "https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn/v2/notifications"
+    assert kwargs["prepared"].url == "https://gw-gouvqc.mcn.api.gouv.qc.ca/pgn/v2/notifications?status=sent"
+    assert kwargs["headers"]["X-QC-Client-Id"] == CLIENT_ID
+    assert kwargs["headers"]["Authorization"].startswith("Bearer ")
+
+
+def test_prepared_requests_reuse_endpoint_preparation(stub_server, mocker):
+    client = NotificationsAPIClient(
+        base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, prepared_requests=True
+    )
+    prepare_request = mocker.spy(client.request_session, "prepare_request")
+
+    for _ in range(3):
+        client.get_all_templates()
+        client.send_sms_notification("+15145550123", "456")
+
+    assert prepare_request.call_count == 2
+    assert len(stub_server.received) == 6
+
+
+def test_prepared_requests_raise_http_errors_and_retry(stub_server, mocker):
+    mocker.patch("time.sleep")
+    stub_server.status_code = 503
+    stub_server.response_json = {"message": "Unavailable"}
+    client = NotificationsAPIClient(
+        base_url=stub_server.url,
+        api_key=COMBINED_API_KEY,
+        client_id=CLIENT_ID,
+        prepared_requests=True,
+        retry_policy=RetryPolicy(max_attempts=2),
+    )
+
+    with pytest.raises(HTTPError) as e:
+        client.get_all_templates()
+
+    assert e.value.message == "Unavailable"
+    assert len(stub_server.received) == 2
+
+
+def test_prepared_requests_stream(stub_server):
+    stub_server.response_json = {"notifications": [{"id": 1}, {"id": 2}], "links": {}}
+    client = NotificationsAPIClient(
+        base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, prepared_requests=True
+    )
+
+    with client.get_all_notifications(stream=True) as page:
+        assert list(page) == [{"id": 1}, {"id": 2}]
+
+
+def test_async_prepared_requests_match_default_requests(stub_server):
+    pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    async def main(**client_kwargs):
+        async with AsyncNotificationsAPIClient(
+            base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, **client_kwargs
+        ) as client:
+            await client.send_sms_notification("+15145550123", "456")
+            await client.get_all_notifications(status="delivered")
+
+    asyncio.run(main(prepared_requests=True))
+    prepared = [normalise(request) for request in stub_server.received]
+    stub_server.received.clear()
+    asyncio.run(main())
+
+    assert prepared == [normalise(request) for request in stub_server.received]
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.endpoints import BULK, EMAIL, READS, SMS, endpoint_family
+from notifications_python_client.errors import DeadlineExceededError, HTTP429Error
+from notifications_python_client.ratelimit import RateLimiter, TokenBucket
+from notifications_python_client.timeouts import Deadline
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY, TEST_HOST
+
+
+@pytest.mark.parametrize(
+    "method, url, family",
+    [
+        ("POST", "https://host/pgn/v2/notifications/sms", SMS),
+        ("POST", "/v2/notifications/email/", EMAIL),
+        ("POST", "https://host/v2/notifications/bulk", BULK),
+        ("GET", "https://host/v2/notifications/sms", READS),
+        ("POST", "https://host/v2/template/1/preview", READS),
+        ("GET", "https://host/v2/notifications?status=sent", READS),
+    ],
+)
+def test_endpoint_family(method, url, family):
+    assert endpoint_family(method, url) == family
+
+
+def test_bucket_spaces_requests_at_rate(clock):
+    bucket = TokenBucket(rate=10, burst=1)
+
+    assert [bucket.reserve() for _ in range(4)] == pytest.approx([0, 0.1, 0.2, 0.3])
+
+
+def test_bucket_allows_burst_after_idle(clock):
+    bucket = TokenBucket(rate=10, burst=3)
+    clock.now += 60
+
+    assert [bucket.reserve() for _ in range(4)] == pytest.approx([0, 0, 0, 0.1])
+
+
+def test_bucket_refills_over_time(clock):
+    bucket = TokenBucket(rate=10, burst=1)
+    bucket.reserve()
+    bucket.reserve()
+
+    clock.now += 0.1
+    assert bucket.reserve() == pytest.approx(0.1)
+
+
+def test_bucket_pause_delays_every_reservation(clock):
+    bucket = TokenBucket(rate=10, burst=5)
+    bucket.pause(2)
+
+    assert [bucket.reserve() for _ in range(2)] == pytest.approx([2.1, 2.2])
+
+
+def test_bucket_slows_down_and_recovers(clock):
+    bucket = TokenBucket(rate=10, min_rate=4)
+
+    bucket.slow_down()
+    assert bucket.current_rate == 5
+    bucket.slow_down()
+    assert bucket.current_rate == 4
+
+    for _ in range(20):
+        bucket.speed_up()
+    assert bucket.current_rate == 10
+
+
+def test_limiter_applies_headroom(clock):
+    limiter = RateLimiter({SMS: 10}, headroom=0.5)
+
+    assert limiter.reserve(SMS) == 0
+    assert limiter.reserve(SMS) == pytest.approx(0.2)
+
+
+def test_limiter_does_not_throttle_unconfigured_families(clock):
+    limiter = RateLimiter({SMS: 1})
+
+    assert [limiter.reserve(EMAIL) for _ in range(100)] == [0] * 100
+
+
+def test_limiter_slows_down_and_pauses_on_429(clock):
+    limiter = RateLimiter({SMS: 10}, headroom=1)
+    limiter.reserve(SMS)
+
+    limiter.on_response(SMS, 429, CaseInsensitiveDict({"retry-after": "3"}))
+
+    assert limiter.buckets[SMS].current_rate == 5
+    assert limiter.reserve(SMS) == pytest.approx(3.2)
+
+
+def test_limiter_pauses_until_reset_when_no_requests_remain(clock):
+    limiter = RateLimiter({EMAIL: 10}, headroom=1, burst=5)
+
+    limiter.on_response(EMAIL, 200, CaseInsensitiveDict({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "4"}))
+
+    assert limiter.reserve(EMAIL) == pytest.approx(4.1)
+
+
+def test_limiter_reset_can_be_an_epoch_timestamp(clock):
+    limiter = RateLimiter({EMAIL: 10}, headroom=1, burst=5)
+
+    with mock.patch("notifications_python_client.ratelimit.time.time", return_value=1_700_000_000):
+        limiter.on_response(EMAIL, 200, {"RateLimit-Remaining": "0", "RateLimit-Reset": "1700000006"})
+
+    assert limiter.reserve(EMAIL) == pytest.approx(6.1)
+
+
+def test_client_throttles_through_rate_limiter(rmock):
+    limiter = mock.Mock(spec=RateLimiter)
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, rate_limiter=limiter)
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", json={}, headers={"X-RateLimit-Remaining": "5"})
+
+    client.post("/v2/notifications/sms", data={})
+
+    limiter.acquire.assert_called_once_with(SMS)
+    family, status_code, headers = limiter.on_response.call_args[0]
+    assert (family, status_code, headers["x-ratelimit-remaining"]) == (SMS, 200, "5")
+
+
+def test_client_reports_429_to_rate_limiter(rmock):
+    limiter = RateLimiter({READS: 100})
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, rate_limiter=limiter)
+    rmock.get(f"{TEST_HOST}/health", status_code=429)
+
+    with pytest.raises(HTTP429Error):
+        client.get("/health")
+
+    assert limiter.buckets[READS].current_rate == 45
+
+
+def test_limiter_can_be_awaited(clock):
+    limiter = RateLimiter({SMS: 10}, headroom=1)
+
+    with mock.patch("notifications_python_client.ratelimit.asyncio.sleep") as sleep:
+        asyncio.run(limiter.acquire_async(SMS))
+        asyncio.run(limiter.acquire_async(SMS))
+
+    sleep.assert_called_once_with(pytest.approx(0.1))
+
+
+def test_limiter_does_not_wait_past_the_deadline(clock):
+    limiter = RateLimiter({SMS: 10}, headroom=1)
+    limiter.buckets[SMS].pause(3)
+
+    with mock.patch("notifications_python_client.ratelimit.time.sleep") as sleep, Deadline(0.5):
+        with pytest.raises(DeadlineExceededError):
+            limiter.acquire(SMS)
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(limiter.acquire_async(SMS))
+
+    sleep.assert_not_called()
+    # the tokens reserved were given back
+    assert limiter.reserve(SMS) == pytest.approx(3.1)
+
+
+def test_limiter_waits_within_the_deadline(clock):
+    limiter = RateLimiter({SMS: 10}, headroom=1)
+    limiter.buckets[SMS].pause(0.2)
+
+    with mock.patch("notifications_python_client.ratelimit.time.sleep") as sleep, Deadline(0.5):
+        limiter.acquire(SMS)
+
+    sleep.assert_called_once_with(pytest.approx(0.3))
+
+
+def test_client_does_not_wait_for_the_limiter_past_the_deadline(rmock):
+    limiter = RateLimiter({SMS: 10})
+    limiter.buckets[SMS].pause(3)
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, rate_limiter=limiter)
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", json={})
+
+    start = time.monotonic()
+    with Deadline(0.5), pytest.raises(DeadlineExceededError):
+        client.post("/v2/notifications/sms", data={})
+
+    assert time.monotonic() - start < 0.5
+    assert not rmock.called
@@ -0,0 +1,154 @@
+from unittest import mock
+
+import pytest
+import requests
+
+from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.errors import HTTP429Error, HTTP503Error, HTTPError
+from notifications_python_client.retry import RetryPolicy, RetryStats, parse_retry_after
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY, TEST_HOST, http_error
+
+
+@pytest.fixture
+def sleep():
+    with mock.patch("notifications_python_client.base.time.sleep") as sleep:
+        yield sleep
+
+
+def retrying_client(**policy_kwargs):
+    return BaseAPIClient(
+        base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, retry_policy=RetryPolicy(**policy_kwargs)
+    )
+
+
+@pytest.mark.parametrize("status_code", [429, 503])
+def test_get_is_retried_on_transient_status(rmock, sleep, status_code):
+    rmock.get(f"{TEST_HOST}/v2/notifications/1", [{"status_code": status_code}, {"json": {"id": 1}}])
+    client = retrying_client()
+
+    assert client.get("/v2/notifications/1") == {"id": 1}
+    assert rmock.call_count == 2
+    assert sleep.call_count == 1
+    assert client.retry_policy.stats() == RetryStats(retries=1, exhausted=0)
+
+
+def test_get_is_retried_on_connection_error(rmock, sleep):
+    rmock.get(f"{TEST_HOST}/health", [{"exc": requests.ConnectionError}, {"json": {"status": "ok"}}])
+
+    assert retrying_client().get("/health") == {"status": "ok"}
+
+
+def test_error_is_raised_once_attempts_are_exhausted(rmock, sleep):
+    rmock.get(f"{TEST_HOST}/health", status_code=503)
+    client = retrying_client(max_attempts=3)
+
+    with pytest.raises(HTTP503Error):
+        client.get("/health")
+
+    assert rmock.call_count == 3
+    assert client.retry_policy.stats() == RetryStats(retries=2, exhausted=1)
+
+
+@pytest.mark.parametrize("status_code", [400, 404, 500])
+def test_other_errors_are_not_retried(rmock, sleep, status_code):
+    rmock.get(f"{TEST_HOST}/health", status_code=status_code)
+    client = retrying_client()
+
+    with pytest.raises(HTTPError):
+        client.get("/health")
+
+    assert rmock.call_count == 1
+    assert client.retry_policy.stats() == RetryStats(retries=0, exhausted=0)
+
+
+def test_post_is_not_retried_by_default(rmock, sleep):
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", status_code=503)
+
+    with pytest.raises(HTTP503Error):
+        retrying_client().post("/v2/notifications/sms", data={})
+
+    assert rmock.call_count == 1
+
+
+def test_post_is_retried_when_opted_in(rmock, sleep):
+    rmock.post(f"{TEST_HOST}/v2/notifications/sms", [{"status_code": 503}, {"json": {"id": 1}}])
+
+    assert retrying_client(retry_non_idempotent=True).post("/v2/notifications/sms", data={}) == {"id": 1}
+    assert rmock.request_history[0].body == rmock.request_history[1].body
+
+
+def test_retry_waits_for_retry_after(rmock, sleep):
+    rmock.get(f"{TEST_HOST}/health", [{"status_code": 429, "headers": {"Retry-After": "7"}}, {"json": {}}])
+
+    retrying_client(backoff_base=0.1).get("/health")
+
+    sleep.assert_called_once_with(7.0)
+
+
+def test_retry_refreshes_authorization(rmock, sleep):
+    rmock.get(f"{TEST_HOST}/health", [{"status_code": 503}, {"json": {}}])
+    client = retrying_client()
+
+    with mock.patch.object(client, "_get_api_token", side_effect=["token-1", "token-2"]):
+        client.get("/health")
+
+    assert rmock.request_history[0].headers["Authorization"] == "Bearer token-1"
+    assert rmock.request_history[1].headers["Authorization"] == "Bearer token-2"
+
+
+def test_client_does_not_retry_without_policy(rmock, sleep, base_client):
+    rmock.get(f"{TEST_HOST}/health", status_code=503)
+
+    with pytest.raises(HTTP503Error):
+        base_client.get("/health")
+
+    assert rmock.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_429_maps_to_http429_error():
+    assert isinstance(http_error(429), HTTP429Error)
+
+
+@pytest.mark.parametrize("attempt, cap", [(1, 0.5), (2, 1), (3, 2), (10, 30)])
+def test_backoff_uses_full_jitter_up_to_cap(attempt, cap):
+    policy = RetryPolicy(backoff_base=0.5, backoff_cap=30)
+
+    with mock.patch("notifications_python_client.retry.random.uniform", side_effect=lambda a, b: b) as uniform:
+        assert policy.backoff(attempt) == cap
+
+    uniform.assert_called_once_with(0, cap)
+
+
+def test_next_delay_respects_deadline():
+    policy = RetryPolicy(max_attempts=10, deadline=5)
+
+    with mock.patch("notifications_python_client.retry.time.monotonic", return_value=104.9):
+        assert policy.next_delay("GET", http_error(503, {"Retry-After": "1"}), 1, started_at=100) is None
+
+    assert policy.stats() == RetryStats(retries=0, exhausted=1)
+
+
+def test_next_delay_retries_connection_errors():
+    assert RetryPolicy().next_delay("GET", http_error(), 1, started_at=0) is not None
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, None),
+        ("", None),
+        ("12", 12.0),
+        ("-3", 0.0),
+        ("Wed, 21 Oct 2015 07:28:10 GMT", 10.0),
+        ("Wed, 21 Oct 2015 07:27:00 GMT", 0.0),
+        ("soon", None),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value, now=1445412480) == expected
+
+
+def test_max_attempts_must_be_positive():
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
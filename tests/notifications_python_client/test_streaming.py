@@ -0,0 +1,215 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from notifications_python_client.errors import HTTPError, InvalidResponse
+from notifications_python_client.streaming import StreamedPage, StreamingJSONParser
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY, TEST_HOST
+
+FIRST, SECOND = "3d1ce039-5476-414c-99b2-fac1e6add62c", "ea179232-3190-410d-b8ab-23dfecdd3157"
+
+PAGE = {
+    "notifications": [{"id": i, "body": "Bonjour, été ✓ " * i, "cost": 1.25e2, "sent_at": None} for i in range(20)],
+    "links": {"current": "/v2/notifications", "next": f"/v2/notifications?older_than={FIRST}"},
+}
+
+
+def parse(chunks):
+    parser = StreamingJSONParser("notifications")
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    return items, parser.fields
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 100_000])
+def test_parser_matches_json_loads_whatever_the_chunking(indent, chunk_size):
+    raw = json.dumps(PAGE, indent=indent, ensure_ascii=False).encode()
+
+    items, fields = parse(raw[i : i + chunk_size] for i in range(0, len(raw), chunk_size))
+
+    assert items == PAGE["notifications"]
+    assert fields == {"links": PAGE["links"]}
+
+
+def test_parser_handles_random_chunk_boundaries():
+    items = PAGE["notifications"] + [1.5, -0.25, 2e300, 12, -3e-7]
+    fields = {"total": 12345, "ratio": 1.5, "links": PAGE["links"], "rate": -2.5e-30, "count": 20}
+    raw = json.dumps({**fields, "notifications": items}, ensure_ascii=False).encode()
+    rng = random.Random(0)
+    for _ in range(50):
+        bounds = [0, *sorted(rng.sample(range(1, len(raw)), 30)), len(raw)]
+        chunks = [raw[bounds[i] : bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+        assert parse(chunks) == (items, fields)
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        ([b'{"notifications":[1.', b"5]}"], ([1.5], {})),
+        ([b'{"notifications":[2e', b"3]}"], ([2000.0], {})),
+        ([b'{"notifications":[-1e', b"+", b"2]}"], ([-100.0], {})),
+        ([b'{"total":1.', b'5,"notifications":[]}'], ([], {"total": 1.5})),
+        ([b'{"notifications":[12', b"]}"], ([12], {})),
+    ],
+)
+def test_parser_waits_for_the_end_of_numbers_split_across_chunks(chunks, expected):
+    assert parse(chunks) == expected
+
+
+def test_parser_yields_items_as_soon_as_they_are_complete():
+    parser = StreamingJSONParser("notifications")
+
+    assert list(parser.feed(b'{"notifications": [{"id": 1}, {"id"')) == [{"id": 1}]
+    assert list(parser.feed(b": 2}, 3")) == [{"id": 2}]
+    assert list(parser.feed(b"4]")) == [34]
+    assert not parser.done
+    assert list(parser.feed(b', "links": {}}')) == []
+    assert parser.done
+
+
+@pytest.mark.parametrize("raw", [b'{"notifications": []}', b"{}", b' {"links": {"next": null}} '])
+def test_parser_accepts_empty_pages(raw):
+    items, _ = parse([raw])
+
+    assert items == []
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b"",
+        b"[1, 2]",
+        b"Internal Error",
+        b'{"notifications": [1, 2',
+        b'{"notifications": [1,]}',
+        b'{"notifications": [1 2]}',
+        b'{"notifications": [], }',
+        b'{"links": {}} {}',
+        b"{links: {}}",
+    ],
+)
+def test_parser_rejects_invalid_documents(raw):
+    with pytest.raises(ValueError):
+        parse([raw])
+
+
+class FakeResponse:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_streamed_page_yields_first_item_before_body_is_read():
+    response = FakeResponse([b'{"notifications": [{"id": 1}, ', b'{"id": 2}], ', b'"links": {"next": "n"}}'])
+    page = StreamedPage(response, "notifications")
+    items = iter(page)
+
+    assert next(items) == {"id": 1}
+    assert response.read == 1
+    assert page.get("links") == {"next": "n"}
+    assert response.read == 3
+    assert response.closed
+
+
+def test_streamed_page_close_releases_connection():
+    response = FakeResponse([b'{"notifications": [{"id": 1}, ', b"{"])
+
+    with StreamedPage(response, "notifications") as page:
+        next(iter(page))
+
+    assert response.closed
+
+
+def test_streamed_page_raises_invalid_response():
+    page = StreamedPage(FakeResponse([b'{"notifications": [{"id": 1}, oops]}']), "notifications")
+
+    with pytest.raises(InvalidResponse):
+        list(page)
+
+
+def test_get_all_notifications_stream(notifications_client, rmock):
+    rmock.get(f"{TEST_HOST}/v2/notifications?status=delivered", json=PAGE)
+
+    with notifications_client.get_all_notifications(status="delivered", stream=True) as page:
+        assert list(page) == PAGE["notifications"]
+        assert page.get("links") == PAGE["links"]
+
+
+def test_get_all_notifications_stream_raises_http_error(notifications_client, rmock):
+    rmock.get(f"{TEST_HOST}/v2/notifications", status_code=400, json={"message": "Bad status"})
+
+    with pytest.raises(HTTPError) as e:
+        notifications_client.get_all_notifications(stream=True)
+
+    assert e.value.message == "Bad status"
+
+
+def test_get_all_notifications_iterator_stream_paginates(notifications_client, rmock):
+    rmock.get(f"{TEST_HOST}/v2/notifications", json=PAGE)
+    rmock.get(
+        f"{TEST_HOST}/v2/notifications?older_than={FIRST}",
+        json={"notifications": [{"id": 20}], "links": {"next": f"/v2/notifications?older_than={SECOND}"}},
+    )
+    rmock.get(f"{TEST_HOST}/v2/notifications?older_than={SECOND}", json={"notifications": [], "links": {}})
+
+    notifications = list(notifications_client.get_all_notifications_iterator(stream=True))
+
+    assert notifications == [*PAGE["notifications"], {"id": 20}]
+    assert rmock.call_count == 3
+
+
+def test_async_get_all_notifications_iterator_stream_paginates(stub_server):
+    pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    stub_server.routes = {
+        ("GET", "/v2/notifications"): (200, PAGE),
+        ("GET", f"/v2/notifications?older_than={FIRST}"): (
+            200,
+            {"notifications": [{"id": 20}], "links": {"next": f"/v2/notifications?older_than={SECOND}"}},
+        ),
+    }
+    stub_server.response_json = {"notifications": [], "links": {}}
+
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID
+        ) as client:
+            return [notification async for notification in client.get_all_notifications_iterator(stream=True)]
+
+    assert asyncio.run(main()) == [*PAGE["notifications"], {"id": 20}]
+    assert len(stub_server.received) == 3
+
+
+def test_async_get_all_notifications_stream_raises_http_error(stub_server):
+    pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    stub_server.status_code = 400
+    stub_server.response_json = {"message": "Bad status"}
+
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID
+        ) as client:
+            await client.get_all_notifications(stream=True)
+
+    with pytest.raises(HTTPError) as e:
+        asyncio.run(main())
+
+    assert e.value.message == "Bad status"
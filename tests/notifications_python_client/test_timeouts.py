@@ -0,0 +1,201 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.errors import DeadlineExceededError, HTTP503Error, HTTPError
+from notifications_python_client.notifications import NotificationsAPIClient
+from notifications_python_client.retry import RetryPolicy, RetryStats
+from notifications_python_client.timeouts import Deadline, Timeout, current_deadline
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY, TEST_HOST
+
+NOTIFICATION_ID = "3d1ce039-5476-414c-99b2-fac1e6add62c"
+
+
+def test_timeout_defaults_the_phases_not_given():
+    assert Timeout(30, connect=3.05)._values() == (3.05, 30, 30, 30)
+    assert Timeout(read=10)._values() == (None, 10, None, None)
+
+
+@pytest.mark.parametrize(
+    "timeout, expected",
+    [
+        (5, Timeout(5)),
+        (None, Timeout(None)),
+        ((3.05, 27), Timeout(27, connect=3.05)),
+        (Timeout(1, write=2), Timeout(1, write=2)),
+    ],
+)
+def test_timeout_create(timeout, expected):
+    assert Timeout.create(timeout) == expected
+
+
+def test_timeout_clip_shortens_every_phase_to_the_time_left():
+    assert Timeout(30, connect=1, pool=None).clip(2) == Timeout(2, connect=1)
+
+
+def test_deadline_applies_within_its_block(clock):
+    assert current_deadline() is None
+
+    with Deadline(10) as deadline:
+        assert current_deadline() is deadline
+        clock.now += 4
+        assert deadline.remaining() == 6
+        assert not deadline.expired
+        clock.now += 6
+        assert deadline.expired
+
+    assert current_deadline() is None
+
+
+def test_nested_deadline_cannot_extend_the_enclosing_one(clock):
+    with Deadline(10) as outer:
+        with Deadline(60):
+            assert current_deadline() is outer
+        with Deadline(1) as inner:
+            assert current_deadline() is inner
+        assert current_deadline() is outer
+
+
+def test_deadline_is_inherited_by_tasks():
+    async def deadline_of_task():
+        return current_deadline()
+
+    async def main():
+        with Deadline(10) as deadline:
+            return deadline, await asyncio.ensure_future(deadline_of_task())
+
+    deadline, inherited = asyncio.run(main())
+    assert inherited is deadline
+
+
+def test_client_passes_connect_and_read_timeouts_to_requests(rmock):
+    rmock.get(f"{TEST_HOST}/health", json={})
+    client = BaseAPIClient(
+        base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, timeout=Timeout(30, connect=3)
+    )
+
+    client.get("/health")
+
+    assert rmock.last_request.timeout == (3, 30)
+
+
+def test_requests_only_get_the_time_left(rmock, clock):
+    def respond(request, context):
+        clock.now += 4
+        return {}
+
+    rmock.get(f"{TEST_HOST}/health", json=respond)
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, timeout=(3, 30))
+
+    with Deadline(10):
+        client.get("/health")
+        client.get("/health")
+
+    assert [request.timeout for request in rmock.request_history] == [(3, 10), (3, 6)]
+
+
+def test_call_after_the_deadline_is_not_sent(rmock, clock):
+    rmock.get(f"{TEST_HOST}/health", json={})
+    client = BaseAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID)
+
+    with Deadline(10), pytest.raises(DeadlineExceededError) as e:
+        clock.now += 10
+        client.get("/health")
+
+    assert e.value.seconds == 10
+    assert e.value.message == "Deadline of 10s exceeded"
+    assert not rmock.called
+
+
+def test_no_retry_is_started_that_cannot_finish_in_time(rmock, clock, mocker):
+    sleep = mocker.patch("notifications_python_client.base.time.sleep")
+    rmock.get(f"{TEST_HOST}/health", status_code=503, headers={"Retry-After": "5"})
+    client = BaseAPIClient(
+        base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, retry_policy=RetryPolicy(max_attempts=5)
+    )
+
+    with Deadline(4), pytest.raises(HTTP503Error):
+        client.get("/health")
+
+    assert rmock.call_count == 1
+    assert not sleep.called
+    assert client.retry_policy.stats() == RetryStats(retries=0, exhausted=1)
+
+
+def test_retry_policy_counts_the_time_left():
+    policy = RetryPolicy(backoff_base=0)
+    error = HTTPError.create(Exception())
+
+    assert policy.next_delay("GET", error, 1, time.monotonic(), time_left=1) == 0
+    assert policy.next_delay("GET", error, 1, time.monotonic(), time_left=0) is None
+
+
+def test_timeout_shortened_by_the_deadline_raises_deadline_exceeded(stub_server):
+    stub_server.delay = threading.Event()
+    client = BaseAPIClient(base_url=stub_server.url, api_key=COMBINED_API_KEY, timeout=30)
+
+    start = time.monotonic()
+    try:
+        with Deadline(0.2), pytest.raises(DeadlineExceededError) as e:
+            client.get("/health")
+    finally:
+        stub_server.delay.set()
+
+    assert time.monotonic() - start < 5
+    assert isinstance(e.value.__cause__, HTTPError)
+
+
+def test_iterator_deadline_covers_every_page(rmock, clock):
+    def page(request, context):
+        clock.now += 4
+        return {
+            "notifications": [{"id": len(rmock.request_history)}],
+            "links": {"next": f"{TEST_HOST}/v2/notifications?older_than={NOTIFICATION_ID}"},
+        }
+
+    rmock.get(f"{TEST_HOST}/v2/notifications", json=page)
+    client = NotificationsAPIClient(base_url=TEST_HOST, api_key=COMBINED_API_KEY, client_id=CLIENT_ID)
+
+    received = []
+    with pytest.raises(DeadlineExceededError):
+        for notification in client.get_all_notifications_iterator(deadline=10):
+            received.append(notification)
+
+    assert received == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert [request.timeout for request in rmock.request_history] == [(10, 10), (6, 6), (2, 2)]
+    assert current_deadline() is None
+
+
+def test_async_client_requests_only_get_the_time_left(clock):
+    httpx = pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    timeouts = []
+
+    def handle(request):
+        timeouts.append(request.extensions["timeout"])
+        clock.now += 4
+        return httpx.Response(200, json={})
+
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=TEST_HOST, api_key=COMBINED_API_KEY, timeout=Timeout(30, connect=3)
+        ) as client:
+            client.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+            await client.check_health()
+            with Deadline(6):
+                await client.check_health()
+                await client.check_health()
+                await client.check_health()
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(main())
+
+    assert timeouts == [
+        {"connect": 3, "read": 30, "write": 30, "pool": 30},
+        {"connect": 3, "read": 6, "write": 6, "pool": 6},
+        {"connect": 2, "read": 2, "write": 2, "pool": 2},
+    ]
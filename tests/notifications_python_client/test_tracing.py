@@ -0,0 +1,188 @@
+import asyncio
+
+import pytest
+
+from notifications_python_client.errors import HTTPError
+from notifications_python_client.retry import RetryPolicy
+from notifications_python_client.tracing import InMemorySpanExporter, OpenTelemetryTracer, Tracer
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY, make_client
+
+FIRST = "3d1ce039-5476-414c-99b2-fac1e6add62c"
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+def spans_by_name(exporter):
+    spans = {}
+    for span in exporter.get_finished_spans():
+        spans.setdefault(span.name, []).append(span)
+    return spans
+
+
+def test_tracer_nests_spans_and_exports_them_when_they_end(exporter):
+    tracer = Tracer(exporter)
+
+    with tracer.span("outer", {"a": 1}) as outer:
+        with tracer.span("inner") as inner:
+            pass
+        tracer.record_span("past", 10, 20)
+    with tracer.span("other") as other:
+        pass
+
+    assert exporter.get_finished_spans() == [inner, exporter.get_finished_spans()[1], outer, other]
+    past = exporter.get_finished_spans()[1]
+    assert (inner.parent_id, past.parent_id, outer.parent_id) == (outer.span_id, outer.span_id, None)
+    assert inner.trace_id == past.trace_id == outer.trace_id != other.trace_id
+    assert (past.start_time, past.end_time, past.duration) == (10, 20, 1e-8)
+    assert outer.attributes == {"a": 1}
+    assert outer.duration >= inner.duration >= 0
+
+
+def test_tracer_records_exceptions(exporter):
+    tracer = Tracer(exporter)
+
+    with pytest.raises(ValueError), tracer.span("failing"):
+        raise ValueError("boom")
+
+    (span,) = exporter.get_finished_spans()
+    assert isinstance(span.error, ValueError)
+    assert span.end_time is not None
+
+
+def test_tracer_injects_traceparent_of_current_span(exporter):
+    tracer = Tracer(exporter)
+    headers = {}
+
+    tracer.inject(headers)
+    assert headers == {}
+
+    with tracer.span("send") as span:
+        tracer.inject(headers)
+    assert headers == {"traceparent": f"00-{span.trace_id}-{span.span_id}-01"}
+    assert len(span.trace_id) == 32
+    assert len(span.span_id) == 16
+
+
+def test_client_records_a_span_per_phase(stub_server, exporter):
+    stub_server.response_json = {"id": "1"}
+    client = make_client(stub_server.url, tracer=Tracer(exporter))
+
+    client.send_sms_notification("+15145550123", "456")
+
+    spans = spans_by_name(exporter)
+    (request,) = spans["notifications.request"]
+    (send,) = spans["notifications.send"]
+    assert {name: [span.parent_id for span in found] for name, found in spans.items()} == {
+        "notifications.token": [request.span_id],
+        "notifications.serialize": [request.span_id],
+        "notifications.pool_wait": [send.span_id],
+        "notifications.send": [request.span_id],
+        "notifications.parse": [request.span_id],
+        "notifications.request": [None],
+    }
+    assert request.attributes == {"http.request.method": "POST", "url.path": "/v2/notifications/sms"}
+    assert send.attributes == {
+        "notifications.family": "sms",
+        "notifications.attempt": 1,
+        "http.response.status_code": 200,
+    }
+    assert stub_server.received[0][2]["traceparent"] == f"00-{send.trace_id}-{send.span_id}-01"
+
+
+def test_client_records_a_send_span_per_attempt(stub_server, exporter, mocker):
+    mocker.patch("time.sleep")
+    stub_server.status_code = 503
+    client = make_client(stub_server.url, tracer=Tracer(exporter), retry_policy=RetryPolicy(max_attempts=2))
+
+    with pytest.raises(HTTPError):
+        client.get_all_templates()
+
+    spans = spans_by_name(exporter)
+    assert [span.attributes["notifications.attempt"] for span in spans["notifications.send"]] == [1, 2]
+    assert all(isinstance(span.error, HTTPError) for span in spans["notifications.send"])
+    assert isinstance(spans["notifications.request"][0].error, HTTPError)
+    assert {headers["traceparent"] for _, _, headers, _ in stub_server.received} == {
+        f"00-{span.trace_id}-{span.span_id}-01" for span in spans["notifications.send"]
+    }
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_pagination_records_a_span_per_page(stub_server, exporter, stream):
+    stub_server.routes = {
+        ("GET", "/v2/notifications"): (
+            200,
+            {"notifications": [{"id": 1}, {"id": 2}], "links": {"next": f"/v2/notifications?older_than={FIRST}"}},
+        ),
+    }
+    stub_server.response_json = {"notifications": [], "links": {}}
+    client = make_client(stub_server.url, tracer=Tracer(exporter))
+
+    assert len(list(client.get_all_notifications_iterator(stream=stream))) == 2
+
+    pages = spans_by_name(exporter)["notifications.page"]
+    assert [span.attributes["notifications.page"] for span in pages] == [1, 2]
+    if not stream:
+        assert [span.attributes["notifications.count"] for span in pages] == [2, 0]
+    requests = spans_by_name(exporter)["notifications.request"]
+    assert [span.parent_id for span in requests] == [span.span_id for span in pages]
+
+
+def test_client_without_tracer_sends_no_traceparent(stub_server):
+    client = make_client(stub_server.url, tracer=None)
+
+    client.get_all_templates()
+
+    assert "traceparent" not in stub_server.received[0][2]
+
+
+def test_opentelemetry_tracer(stub_server):
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter as OTelExporter
+
+    otel_exporter = OTelExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(otel_exporter))
+    client = make_client(stub_server.url, tracer=OpenTelemetryTracer(tracer_provider=provider))
+
+    client.send_sms_notification("+15145550123", "456")
+
+    spans = {span.name: span for span in otel_exporter.get_finished_spans()}
+    assert set(spans) == {
+        "notifications.token",
+        "notifications.serialize",
+        "notifications.pool_wait",
+        "notifications.send",
+        "notifications.parse",
+        "notifications.request",
+    }
+    send = spans["notifications.send"].context
+    assert spans["notifications.pool_wait"].parent.span_id == send.span_id
+    assert spans["notifications.send"].parent.span_id == spans["notifications.request"].context.span_id
+    assert stub_server.received[0][2]["traceparent"].startswith(f"00-{send.trace_id:032x}-{send.span_id:016x}-")
+
+
+def test_async_client_records_spans(stub_server, exporter):
+    pytest.importorskip("httpx")
+    from notifications_python_client.async_notifications import AsyncNotificationsAPIClient
+
+    async def main():
+        async with AsyncNotificationsAPIClient(
+            base_url=stub_server.url, api_key=COMBINED_API_KEY, client_id=CLIENT_ID, tracer=Tracer(exporter)
+        ) as client:
+            await asyncio.gather(client.get_all_templates(), client.send_sms_notification("+15145550123", "456"))
+
+    asyncio.run(main())
+
+    spans = spans_by_name(exporter)
+    assert len(spans["notifications.request"]) == 2
+    assert {span.parent_id for span in spans["notifications.send"]} == {
+        span.span_id for span in spans["notifications.request"]
+    }
+    assert {headers["traceparent"] for _, _, headers, _ in stub_server.received} == {
+        f"00-{span.trace_id}-{span.span_id}-01" for span in spans["notifications.send"]
+    }
@@ -0,0 +1,281 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from notifications_python_client.errors import HTTP429Error, HTTPError
+from notifications_python_client.notifications import NotificationsAPIClient
+from notifications_python_client.timeouts import Timeout
+from notifications_python_client.transport import (
+    InProcessTransport,
+    RequestsTransport,
+    Transport,
+    TransportError,
+    TransportResponse,
+    TransportTimeout,
+    Urllib3Transport,
+)
+from tests.conftest import CLIENT_ID, COMBINED_API_KEY
+
+
+def httpx_transport(stub_server):
+    pytest.importorskip("httpx")
+    from notifications_python_client.httpx_transport import HTTPXTransport
+
+    return HTTPXTransport()
+
+
+def http2_transport(stub_server):
+    pytest.importorskip("h2")
+    from notifications_python_client.httpx_transport import HTTP2Transport
+
+    # the stub only speaks HTTP/1.1, which HTTP2Transport falls back to over cleartext
+    return HTTP2Transport()
+
+
+def in_process_transport(stub_server):
+    def handler(method, url, headers, body):
+        # answer like the stub server would, without sending anything
+        path = url[len(stub_server.url) :]
+        stub_server.received.append((method, path, headers, body or b""))
+        status_code, response_json = stub_server.routes.get(
+            (method, path), (stub_server.status_code, stub_server.response_json)
+        )
+        headers = {"Content-Type": "application/json", **stub_server.response_headers}
+        return status_code, headers, json.dumps(response_json).encode()
+
+    return InProcessTransport(handler)
+
+
+NETWORK_TRANSPORTS = {
+    "requests": lambda stub_server: RequestsTransport(),
+    "urllib3": lambda stub_server: Urllib3Transport(),
+    "httpx": httpx_transport,
+    "http2": http2_transport,
+}
+TRANSPORTS = {**NETWORK_TRANSPORTS, "in_process": in_process_transport}
+
+
+@pytest.fixture(params=TRANSPORTS)
+def transport(request, stub_server):
+    transport = TRANSPORTS[request.param](stub_server)
+    yield transport
+    transport.close()
+
+
+@pytest.fixture(params=NETWORK_TRANSPORTS)
+def network_transport(request, stub_server):
+    transport = NETWORK_TRANSPORTS[request.param](stub_server)
+    yield transport
+    transport.close()
+
+
+def lower_keys(headers):
+    return {name.lower(): value for name, value in headers.items()}
+
+
+def test_transport_sends_request_and_returns_response(transport, stub_server):
+    stub_server.response_json = {"id": "1"}
+    stub_server.response_headers = {"X-Request-Id": "abc"}
+
+    response = transport.send(
+        "POST", f"{stub_server.url}/v2/notifications/sms?a=1", {"Content-Type": "application/json"}, b'{"x":1}', 5
+    )
+
+    assert isinstance(response, TransportResponse)
+    assert response.status_code == 200
+    assert response.headers["x-request-id"] == response.headers["X-REQUEST-ID"] == "abc"
+    assert response.json() == {"id": "1"}
+    method, path, headers, body = stub_server.received[0]
+    assert (method, path, body) == ("POST", "/v2/notifications/sms?a=1", b'{"x":1}')
+    assert lower_keys(headers)["content-type"] == "application/json"
+
+
+def test_transport_sends_requests_without_body(transport, stub_server):
+    response = transport.send("GET", f"{stub_server.url}/v2/templates", {}, None, 5)
+
+    assert response.content == b"{}"
+    assert stub_server.received[0][::3] == ("GET", b"")
+
+
+def test_transport_returns_error_responses(transport, stub_server):
+    stub_server.status_code = 429
+    stub_server.response_json = {"message": "Slow down"}
+
+    response = transport.send("GET", f"{stub_server.url}/v2/templates", {}, None, 5)
+
+    assert (response.status_code, response.is_error, response.json()) == (429, True, {"message": "Slow down"})
+    with pytest.raises(TransportError) as e:
+        response.raise_for_status()
+    assert e.value.response is response
+
+
+def test_transport_streams_body(transport, stub_server):
+    stub_server.response_json = {"notifications": [{"id": i} for i in range(5000)]}
+
+    for _ in range(3):
+        response = transport.send("GET", f"{stub_server.url}/v2/notifications", {}, None, 5)
+        chunks = list(response.iter_bytes())
+
+        assert json.loads(b"".join(chunks)) == stub_server.response_json
+        with pytest.raises(RuntimeError):
+            response.read()
+
+
+def test_transport_releases_connection_of_responses_closed_early(transport, stub_server):
+    stub_server.response_json = {"notifications": [{"id": i} for i in range(5000)]}
+
+    for _ in range(15):
+        response = transport.send("GET", f"{stub_server.url}/v2/notifications", {}, None, 5)
+        next(response.iter_bytes())
+        response.close()
+
+    assert len(stub_server.received) == 15
+
+
+def test_transport_decodes_compressed_responses(network_transport, stub_server):
+    stub_server.gzip_responses = True
+    stub_server.response_json = {"data": "x" * 1000}
+
+    response = network_transport.send("GET", f"{stub_server.url}/v2/templates", {"Accept-Encoding": "gzip"}, None, 5)
+
+    assert response.json() == {"data": "x" * 1000}
+
+
+def test_transport_raises_timeout(network_transport, stub_server):
+    stub_server.delay = threading.Event()
+
+    try:
+        with pytest.raises(TransportTimeout):
+            network_transport.send("GET", f"{stub_server.url}/v2/templates", {}, None, 0.1)
+    finally:
+        stub_server.delay.set()
+
+
+def test_transport_applies_the_read_timeout(network_transport, stub_server):
+    stub_server.delay = threading.Event()
+
+    try:
+        start = time.monotonic()
+        with pytest.raises(TransportTimeout):
+            network_transport.send("GET", f"{stub_server.url}/v2/templates", {}, None, Timeout(30, read=0.1))
+        assert time.monotonic() - start < 5
+    finally:
+        stub_server.delay.set()
+
+
+def test_transport_raises_error_when_it_cannot_connect(network_transport):
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{unused.getsockname()[1]}/v2/templates"
+
+    with pytest.raises(TransportError) as e:
+        network_transport.send("GET", url, {}, None, 5)
+
+    assert not isinstance(e.value, TransportTimeout)
+    assert e.value.response is None
+
+
+def received_by_client(stub_server, **client_kwargs):
+    stub_server.received.clear()
+    client = NotificationsAPIClient(
+        base_url=f"{stub_server.url}/pgn", api_key=COMBINED_API_KEY, client_id=CLIENT_ID, **client_kwargs
+    )
+    client.send_sms_notification("+15145550123", "456", personalisation={"nom": "Zoé"}, reference="ref")
+    client.get_all_notifications(status="delivered", template_type="sms")
+    client.get_all_templates()
+    client.delete("/v2/resource")
+    received = []
+    for method, path, headers, body in stub_server.received:
+        headers = lower_keys(headers)
+        assert headers.pop("authorization").startswith("Bearer ")
+        received.append((method, path, headers["content-type"], headers["user-agent"], body))
+    return received
+
+
+@pytest.mark.parametrize("prepared_requests", [False, True])
+def test_client_with_transport_sends_the_same_requests(transport, stub_server, prepared_requests):
+    sent = received_by_client(stub_server, transport=transport, prepared_requests=prepared_requests)
+
+    assert sent == received_by_client(stub_server)
+    assert sent[1][1] == "/pgn/v2/notifications?status=delivered&template_type=sms"
+
+
+@pytest.mark.parametrize("status_code", [400, 429, 500, 503])
+def test_client_with_transport_raises_the_same_errors(transport, stub_server, status_code):
+    stub_server.status_code = status_code
+    stub_server.response_json = {"errors": [{"error": "Error", "message": "Failed"}]}
+    stub_server.response_headers = {"Retry-After": "7"}
+    errors = []
+    for kwargs in ({"transport": transport}, {}):
+        client = NotificationsAPIClient(base_url=stub_server.url, api_key=COMBINED_API_KEY, **kwargs)
+        with pytest.raises(HTTPError) as e:
+            client.get_all_templates()
+        errors.append(e.value)
+
+    with_transport, default = errors
+    assert type(with_transport) is type(default)
+    assert (with_transport.status_code, with_transport.message) == (default.status_code, default.message)
+    assert with_transport.response.headers["retry-after"] == "7"
+    if status_code == 429:
+        assert isinstance(with_transport, HTTP429Error)
+
+
+def test_client_with_transport_maps_connection_errors(network_transport):
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{unused.getsockname()[1]}"
+    client = NotificationsAPIClient(base_url=url, api_key=COMBINED_API_KEY, transport=network_transport)
+
+    with pytest.raises(HTTPError) as e:
+        client.get_all_templates()
+
+    assert (e.value.status_code, e.value.message) == (503, "Request failed")
+
+
+def test_client_with_transport_streams_pages(transport, stub_server):
+    stub_server.response_json = {"notifications": [{"id": 1}, {"id": 2}], "links": {"next": "n"}}
+    client = NotificationsAPIClient(base_url=stub_server.url, api_key=COMBINED_API_KEY, transport=transport)
+
+    with client.get_all_notifications(stream=True) as page:
+        assert list(page) == [{"id": 1}, {"id": 2}]
+        assert page.get("links") == {"next": "n"}
+
+
+def test_client_closes_its_transport(mocker):
+    transport = mocker.Mock()
+    client = NotificationsAPIClient(base_url="http://localhost", api_key=COMBINED_API_KEY, transport=transport)
+
+    client.close()
+
+    transport.close.assert_called_once_with()
+
+
+def test_transport_without_send_cannot_be_created():
+    class NoSendTransport(Transport):
+        def close(self):
+            pass
+
+    with pytest.raises(TypeError, match="send"):
+        NoSendTransport()
+
+
+def test_in_process_transport_fakes_the_api():
+    def handler(method, url, headers, body):
+        assert (method, url) == ("GET", "http://localhost/v2/notifications/1")
+        return 200, {"Content-Type": "application/json"}, b'{"id": "1", "status": "delivered"}'
+
+    client = NotificationsAPIClient(
+        base_url="http://localhost", api_key=COMBINED_API_KEY, transport=InProcessTransport(handler)
+    )
+
+    assert client.get_notification_by_id("1") == {"id": "1", "status": "delivered"}
+
+
+def test_http2_and_transport_cannot_be_combined():
+    with pytest.raises(ValueError, match="http2 and transport"):
+        NotificationsAPIClient(
+            base_url="http://localhost", api_key=COMBINED_API_KEY, http2=True, transport=RequestsTransport()
+        )